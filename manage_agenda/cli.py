@@ -6,22 +6,31 @@ from .utils import (
     authorize,
     clean_events_cli,
     copy_events_cli,
+    deferred_review,
     delete_events_cli,
     get_add_sources,
     list_emails_folder,
     list_events_folder,
     move_events_cli,
+    process_all_email_cli,
     process_email_cli,
+    process_feed_cli,
     process_web_cli,
     process_txt_cli,
+    review_cli,
+    run_journal,
     select_api_source,
     select_email_prompt,
     select_llm,
     update_event_status_cli,
+    watch_email_cli,
+    watch_txt_cli,
 )
 from .utils_base import (
+    format_size,
     setup_logging,
 )
+from .utils_cache import WebCache
 from .utils_llm import (
     evaluate_models,
 )
@@ -103,6 +112,51 @@ def evaluate(ctx, prompt):
         evaluate_models(prompt)
 
 
+@cli.group()
+@click.pass_context
+def cache(ctx):
+    """Web cache related operations"""
+    pass
+
+
+@cache.command()
+@click.pass_context
+def stats(ctx):
+    """Show web cache usage"""
+    info = WebCache().stats()
+    budget = format_size(info["max_bytes"]) if info["max_bytes"] else "unlimited"
+    print(f"Directory: {info['directory']}")
+    print(f"Entries: {info['entries']}")
+    print(f"Size: {format_size(info['bytes'])} (budget: {budget})")
+    print(f"Compression: {info['compression']} (zstd available: {info['zstd_available']})")
+
+
+@cache.command()
+@click.option(
+    "-m",
+    "--max-bytes",
+    type=int,
+    default=None,
+    help="Budget to enforce (defaults to CACHE_MAX_BYTES)",
+)
+@click.option(
+    "-a",
+    "--all",
+    "prune_all",
+    is_flag=True,
+    default=False,
+    help="Remove every cache entry",
+)
+@click.pass_context
+def prune(ctx, max_bytes, prune_all):
+    """Evict least recently used web cache entries"""
+    web_cache = WebCache()
+    if prune_all:
+        max_bytes = 0
+    removed, freed = web_cache.prune(max_bytes=max_bytes)
+    print(f"Removed {removed} entries ({format_size(freed)} freed)")
+
+
 @cli.command()
 @click.option(
     "-i",
@@ -122,11 +176,66 @@ def evaluate(ctx, prompt):
     "--force-refresh",
     is_flag=True,
     default=False,
-    help="Force refresh web content to bypass cache",
+    help="Force refresh web content to bypass cache and reprocess all the email folder",
+)
+@click.option(
+    "-c",
+    "--crawl",
+    is_flag=True,
+    default=False,
+    help="Treat web URLs as event listings and process the event pages they link to",
+)
+@click.option(
+    "--crawl-depth",
+    type=int,
+    default=1,
+    help="Levels of links to follow when crawling",
 )
+@click.option(
+    "--feeds",
+    is_flag=True,
+    default=False,
+    help="Process the new entries of the configured feeds",
+)
+@click.option(
+    "-a",
+    "--all-sources",
+    is_flag=True,
+    default=False,
+    help="Process the new messages of all the email accounts at once",
+)
+@click.option(
+    "-d",
+    "--defer",
+    is_flag=True,
+    default=False,
+    help="Extract without questions, queueing the events for the review command",
+)
+@click.option(
+    "-r",
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Continue an interrupted run, without extracting or publishing again",
+)
+@click.argument("urls", nargs=-1)
 @click.pass_context
-def add(ctx, interactive, source, force_refresh):
-    """Add entries to the calendar."""
+def add(
+    ctx,
+    interactive,
+    source,
+    force_refresh,
+    crawl,
+    crawl_depth,
+    feeds,
+    all_sources,
+    defer,
+    resume,
+    urls,
+):
+    """Add entries to the calendar (from the web pages at URLS, if given)."""
+    if crawl and not urls and not interactive:
+        raise click.UsageError("--crawl needs the URLs of the listing pages (or -i to enter them)")
     verbose = ctx.obj["VERBOSE"]
     args = Args(
         interactive=interactive,
@@ -147,7 +256,36 @@ def add(ctx, interactive, source, force_refresh):
     if verbose:
         print(f"Model: {model}")
 
-    if interactive:
+    # The progress is journaled: an interrupted run can be resumed
+    with run_journal(resume=resume):
+        if defer:
+            with deferred_review() as review_queue:
+                _add_from_sources(args, model, rules, interactive, force_refresh, crawl,
+                                  crawl_depth, feeds, all_sources, urls)
+            pending = len(review_queue.pending())
+            print(f"{pending} candidates waiting for review (manage-agenda review).")
+        else:
+            _add_from_sources(args, model, rules, interactive, force_refresh, crawl, crawl_depth,
+                              feeds, all_sources, urls)
+
+
+def _add_from_sources(args, model, rules, interactive, force_refresh, crawl, crawl_depth, feeds,
+                      all_sources, urls=()):
+    """Runs the add command on the selected sources."""
+    if urls:
+        process_web_cli(
+            args,
+            model,
+            urls=list(urls),
+            force_refresh=force_refresh,
+            crawl=crawl,
+            crawl_depth=crawl_depth,
+        )
+    elif feeds:
+        process_feed_cli(args, model)
+    elif all_sources:
+        process_all_email_cli(args, model, rules=rules, force_refresh=force_refresh)
+    elif interactive:
         sources = get_add_sources(rules=rules)
         sel, selected = select_from_list(sources)
 
@@ -156,20 +294,104 @@ def add(ctx, interactive, source, force_refresh):
 
         # if "Web" in selected_source:  # Check if "Web" is in the selected source string
         print(f"\nSelected: {selected}")
-        if isinstance(selected, str) and (("Web" in selected) or selected.startswith("http")):
+        if isinstance(selected, str) and selected.startswith("Feeds"):
+            process_feed_cli(args, model)
+        elif isinstance(selected, str) and (("Web" in selected) or selected.startswith("http")):
             url = None
             if selected.startswith("http"):
-                process_web_cli(args, model, urls=selected.split(" "), force_refresh=force_refresh)
+                process_web_cli(
+                    args,
+                    model,
+                    urls=selected.split(" "),
+                    force_refresh=force_refresh,
+                    crawl=crawl,
+                    crawl_depth=crawl_depth,
+                )
             else:
-                process_web_cli(args, model, force_refresh=force_refresh)
+                process_web_cli(
+                    args, model, force_refresh=force_refresh, crawl=crawl, crawl_depth=crawl_depth
+                )
         elif isinstance(selected, str) and ("Text" in selected):
             process_txt_cli(args, model, source_name=selected, rules=rules)
         else:
-            process_email_cli(args, model, source_name=selected, rules=rules)
+            process_email_cli(
+                args, model, source_name=selected, rules=rules, force_refresh=force_refresh
+            )
     else:
         process_txt_cli(args, model, rules=rules)
 
 
+@cli.command()
+@click.option(
+    "-s",
+    "--source",
+    default="gemini",
+    help="Select LLM (used to retry extractions)",
+)
+@click.pass_context
+def review(ctx, source):
+    """Review the events extracted with add --defer and publish them."""
+    verbose = ctx.obj["VERBOSE"]
+    args = Args(
+        interactive=True,
+        delete=None,
+        source=source,
+        verbose=verbose,
+        destination=None,
+        text=None,
+    )
+    # The LLM given with -s, without asking
+    model = select_llm(Args(source=source, verbose=verbose))
+    review_cli(args, model)
+
+
+@cli.command()
+@click.option(
+    "-s",
+    "--source",
+    default="gemini",
+    help="Select LLM",
+)
+@click.option(
+    "--interval",
+    type=int,
+    default=None,
+    help="Seconds between checks of Gmail accounts, or of the text directory when "
+    "inotify is not available (defaults to WATCH_POLL_INTERVAL)",
+)
+@click.option(
+    "-t",
+    "--txt",
+    is_flag=True,
+    default=False,
+    help="Watch the text messages directory (MSG_TXT_DIR) instead of the email accounts",
+)
+@click.argument("accounts", nargs=-1)
+@click.pass_context
+def watch(ctx, source, interval, txt, accounts):
+    """Add entries as new messages arrive to the email accounts."""
+    verbose = ctx.obj["VERBOSE"]
+    args = Args(
+        interactive=False,
+        delete=None,
+        source=source,
+        verbose=verbose,
+        destination=None,
+        text=None,
+    )
+
+    if txt:
+        watch_txt_cli(args, select_llm(args), poll_interval=interval)
+        return
+
+    from .utils import ensure_rules
+
+    rules = ensure_rules()
+    model = select_llm(args)
+
+    watch_email_cli(args, model, rules=rules, source_names=list(accounts), interval=interval)
+
+
 @cli.command()
 @click.option(
     "-i",
@@ -12,6 +12,7 @@ from typing import Optional
 BASE_DIR = Path(__file__).parent.parent
 CONFIG_DIR = Path.home() / ".config" / "manage-agenda"
 DATA_DIR = Path.home() / ".local" / "share" / "manage-agenda"
+CACHE_DIR = Path.home() / ".cache" / "manage_agenda"
 RUN_START_TIME = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
 # Ensure directories exist
@@ -31,6 +32,8 @@ class Config:
 
     # Email
     DEFAULT_EMAIL_TAG: str = os.getenv("DEFAULT_EMAIL_TAG", "zAgenda")
+    # Processed IMAP messages are moved here when the server lacks UIDPLUS
+    IMAP_TRASH_FOLDER: str = os.getenv("IMAP_TRASH_FOLDER", "Trash")
 
     # API Keys
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -43,6 +46,74 @@ class Config:
     # Paths
     GOOGLE_CREDENTIALS_DIR: Path = CONFIG_DIR
     MSG_TXT_DIR: str = os.getenv("MSG_TXT_DIR", os.path.expanduser("~/Documents/data/msgs/"))
+    FEEDS_FILE: str = os.getenv("FEEDS_FILE", str(CONFIG_DIR / "feeds.txt"))
+    FEEDS_STATE_FILE: str = os.getenv("FEEDS_STATE_FILE", str(DATA_DIR / "feeds_state.json"))
+    EVENT_MAP_FILE: str = os.getenv("EVENT_MAP_FILE", str(DATA_DIR / "event_map.json"))
+    MAIL_SYNC_FILE: str = os.getenv("MAIL_SYNC_FILE", str(DATA_DIR / "mail_sync.json"))
+    CLEANUP_QUEUE_FILE: str = os.getenv(
+        "CLEANUP_QUEUE_FILE", str(DATA_DIR / "cleanup_queue.json")
+    )
+    NOTES_INDEX_FILE: str = os.getenv("NOTES_INDEX_FILE", str(DATA_DIR / "notes_links.json"))
+    TXT_MANIFEST_FILE: str = os.getenv("TXT_MANIFEST_FILE", str(DATA_DIR / "txt_manifest.json"))
+    REVIEW_QUEUE_FILE: str = os.getenv("REVIEW_QUEUE_FILE", str(DATA_DIR / "review_queue.json"))
+    RUN_JOURNAL_FILE: str = os.getenv("RUN_JOURNAL_FILE", str(DATA_DIR / "run_journal.jsonl"))
+
+    # Web cache (CACHE_MAX_BYTES=0 disables eviction)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", str(CACHE_DIR))
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    # One of "auto", "zstd", "gzip" or "none"
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "auto")
+
+    # Limits applied to downloaded pages before parsing
+    PAGE_MAX_BYTES: int = int(os.getenv("PAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+    PAGE_MAX_NODES: int = int(os.getenv("PAGE_MAX_NODES", "50000"))
+    # Larger inline scripts are dropped
+    SCRIPT_MAX_BYTES: int = int(os.getenv("SCRIPT_MAX_BYTES", "10000"))
+
+    # Processes used to parse and reduce web pages (0 or 1: in the main process)
+    REDUCE_WORKERS: int = int(os.getenv("REDUCE_WORKERS", "0"))
+
+    # Long documents are split into chunks extracted in parallel
+    CHUNK_MAX_CHARS: int = int(os.getenv("CHUNK_MAX_CHARS", "12000"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "800"))
+    CHUNK_WORKERS: int = int(os.getenv("CHUNK_WORKERS", "4"))
+
+    # Messages retrieved per request when hydrating a mail folder (Gmail
+    # batches accept up to 100)
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+
+    # add --all-sources: accounts read at the same time and seconds between
+    # two requests to the same account
+    EMAIL_SOURCE_WORKERS: int = int(os.getenv("EMAIL_SOURCE_WORKERS", "4"))
+    EMAIL_ACCOUNT_DELAY: float = float(os.getenv("EMAIL_ACCOUNT_DELAY", "0"))
+
+    # Posts older than this (days) are skipped; mail folders are filtered
+    # on the server, so older messages are not downloaded (0: no limit)
+    MAX_POST_AGE_DAYS: int = int(os.getenv("MAX_POST_AGE_DAYS", "7"))
+
+    # Staged processing flow (without -i): threads preparing the content
+    # of the items and extracting their events, items waiting before each
+    # stage, and whether results are handled in the order of the items
+    PIPELINE_CONTENT_WORKERS: int = int(os.getenv("PIPELINE_CONTENT_WORKERS", "1"))
+    PIPELINE_EXTRACT_WORKERS: int = int(os.getenv("PIPELINE_EXTRACT_WORKERS", "1"))
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+    PIPELINE_ORDERED: bool = os.getenv("PIPELINE_ORDERED", "true").lower() in ("1", "true", "yes")
+    # Extraction threads with add --defer, where nothing is published nor asked
+    DEFER_EXTRACT_WORKERS: int = int(os.getenv("DEFER_EXTRACT_WORKERS", "4"))
+
+    # Watch mode: IDLE renewal (servers drop idle connections after 30
+    # minutes), Gmail polling interval and maximum reconnection delay, in seconds
+    WATCH_IDLE_TIMEOUT: int = int(os.getenv("WATCH_IDLE_TIMEOUT", "1500"))
+    WATCH_POLL_INTERVAL: int = int(os.getenv("WATCH_POLL_INTERVAL", "60"))
+    WATCH_MAX_BACKOFF: int = int(os.getenv("WATCH_MAX_BACKOFF", "300"))
+
+    # Event-listing crawler
+    CRAWL_MAX_PAGES: int = int(os.getenv("CRAWL_MAX_PAGES", "50"))
+    CRAWL_WORKERS: int = int(os.getenv("CRAWL_WORKERS", "4"))
+    # Seconds between two requests to the same host
+    CRAWL_DELAY: float = float(os.getenv("CRAWL_DELAY", "1.0"))
+    # Seconds a crawled page is reused from the web cache (0 disables it)
+    CRAWL_CACHE_TTL: int = int(os.getenv("CRAWL_CACHE_TTL", str(6 * 3600)))
 
     @classmethod
     def validate(cls) -> bool:
@@ -1,12 +1,18 @@
 import datetime
+import imaplib
+import itertools
 import json
 import logging
 import os
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import timedelta
 from pathlib import Path, PosixPath
 from typing import Optional
+from urllib.parse import urlparse
 
 import dateparser
 import googleapiclient
@@ -29,6 +35,11 @@ DATE_CONFIRM_PROMPT = (
     "(Y)ear, (M)onth, (D)ay, (h)our, m(i)nute, (f)ull date/time: "
 )
 
+# Options offered for each candidate event in a review session
+REVIEW_PROMPT = (
+    "(a)ccept, (e)dit, (r)etry with LLM, show (t)ext, (s)kip, (q)uit review: "
+)
+
 # Datetime format string for parsing and formatting
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -95,8 +106,46 @@ from manage_agenda.utils_base import (
     format_time,
     write_file,
 )
+from manage_agenda.utils_chunks import merge_events, split_into_chunks
+from manage_agenda.utils_events import EventMap, created_event_id, event_changes
+from manage_agenda.utils_feed import (
+    FeedState,
+    commit_feeds,
+    entry_datetime,
+    poll_feeds,
+    read_feed_list,
+)
+from manage_agenda.utils_journal import DONE, EXTRACTED, PUBLISHED, RunJournal
 from manage_agenda.utils_llm import GeminiClient, MistralClient, OllamaClient
-from manage_agenda.utils_web import reduce_html
+from manage_agenda.utils_mail import (
+    CleanupQueue,
+    MailSyncState,
+    fetch_email_bodies,
+    folder_message_ids,
+    mailbox_delta,
+    normalize_email_body,
+    recent_positions,
+    remove_messages,
+)
+from manage_agenda.utils_notes import NotesLinkIndex
+from manage_agenda.utils_pipeline import SKIP, Pipeline, Stage, StageTimer
+from manage_agenda.utils_review import ReviewQueue, reference_datetime
+from manage_agenda.utils_txt import TxtManifest, iter_txt_files, iter_txt_messages
+from manage_agenda.utils_watch import watch_directory, watch_gmail, watch_imap
+from manage_agenda.utils_web import (
+    cache_page,
+    canonicalize_url,
+    dedup_urls,
+    find_event_links,
+    get_cached_page,
+    get_memo,
+    html_content_hash,
+    html_title,
+    page_item_id,
+    reduce_html,
+    reduce_pages_in_pool,
+    remember_events,
+)
 
 
 @dataclass
@@ -128,7 +177,8 @@ def get_add_sources(rules=None):
     """Returns a list of available sources for the add command."""
     rules = ensure_rules(rules)
     email_sources = _get_email_sources(rules)
-    return email_sources + ["Web (Enter URL)"] + ["Text in default directory"]
+    feed_sources = ["Feeds (RSS, Atom, iCal)"] if read_feed_list() else []
+    return email_sources + ["Web (Enter URL)"] + feed_sources + ["Text in default directory"]
 
 
 def print_first_10_lines(content, content_type="content"):
@@ -584,8 +634,31 @@ def _get_sources_by_type(source_type, rules):
         return rules.selectRule(source_type, "")
 
 
+# API sources selected non-interactively, by type, inside shared_api_sources
+_api_source_cache = None
+
+
+@contextmanager
+def shared_api_sources():
+    """
+    Reuses the API sources (calendar clients) selected non-interactively
+    inside the block, instead of reading the rules and connecting again for
+    each event.
+    """
+    global _api_source_cache
+    previous = _api_source_cache
+    _api_source_cache = {} if previous is None else previous
+    try:
+        yield
+    finally:
+        _api_source_cache = previous
+
+
 def select_source_by_type(args, source_type, rules=None, title=""):
     """Factory function to select sources by type."""
+    cache = _api_source_cache
+    if cache is not None and not args.interactive and source_type in cache:
+        return cache[source_type]
     rules = ensure_rules(rules)
 
     sources = _get_sources_by_type(source_type, rules)
@@ -612,6 +685,8 @@ def select_source_by_type(args, source_type, rules=None, title=""):
             source_details = rules.more.get(source_name, {})
             logging.info(f"Source: {source_name} - {source_details}")
             api_src = rules.readConfigSrc("", source_name, source_details)
+            if cache is not None:
+                cache[source_type] = api_src
             return api_src
 
 
@@ -632,8 +707,12 @@ def list_events_folder(args, api_src, calendar=""):
     else:
         print("Some problem with the account")
 
-def _get_msgs_from_folder(args, source_name, rules=None):
-    """Helper function to get posts stored in some folder."""
+def _get_msgs_from_folder(args, source_name, rules=None, manifest=None, stats=None):
+    """Helper function to get posts stored in some folder.
+
+    Returns an iterator over the files not processed yet (see
+    iter_txt_messages), or None when there are none.
+    """
     "FIXME: maybe a folder argument?"
     #rules = ensure_rules(rules)
     #source_details = rules.more.get(source_name, {})
@@ -656,18 +735,22 @@ def _get_msgs_from_folder(args, source_name, rules=None):
     # posts = api_src.getPosts()
 
     target_dir = Path(config.MSG_TXT_DIR)
-    txt_files = target_dir.glob("*.txt")
-    posts = []
-    for file_path in txt_files:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            posts.append([file_path, content])
+    manifest = manifest or TxtManifest(target_dir)
+    posts = iter_txt_messages(target_dir, manifest, stats)
+    first = next(posts, None)
+    if first is None:
+        print(f"There are no new text files in {target_dir}")
+        if manifest.changed:
+            manifest.save()
+        return None, None
 
-    if not posts:
-        print(f"There are no posts tagged with label {folder}")
-        posts = None
+    # Files are read lazily, as the flow reaches them
+    return None, itertools.chain([first], posts)
 
-    return None, posts
+
+def _agenda_folder(api_src):
+    """Returns the folder (IMAP) or label (Gmail) with the messages to process."""
+    return "INBOX/zAgenda" if "imap" in api_src.service.lower() else "zAgenda"
 
 
 def _get_emails_from_folder(args, source_name, rules=None):
@@ -681,7 +764,7 @@ def _get_emails_from_folder(args, source_name, rules=None):
         print("Some problem with the account")
         return None, None
 
-    folder = "INBOX/zAgenda" if "imap" in api_src.service.lower() else "zAgenda"
+    folder = _agenda_folder(api_src)
     api_src.setPostsType("posts")
     api_src.setLabels()
     label = api_src.getLabels(folder)
@@ -943,6 +1026,46 @@ def _modify_single_component(dt, component, time_label):
         return dt
 
 
+def get_events_from_llm_in_chunks(model, content_text, reference_date_time, args):
+    """Extracts the events of a long document, chunk by chunk in parallel.
+
+    The chunks overlap, so the events found are merged and deduplicated.
+    The elapsed time returned is the one of the slowest chunk.
+
+    Returns:
+        tuple: (events, vcal_json, elapsed_time) as get_event_from_llm_with_retry
+    """
+    chunks = split_into_chunks(content_text)
+    print(f"Long document: extracting events from {len(chunks)} chunks")
+    # Workers never prompt the user
+    chunk_args = Args(
+        interactive=False,
+        delete=args.delete,
+        source=args.source,
+        verbose=args.verbose,
+        destination=args.destination,
+        text=args.text,
+    )
+
+    def extract(chunk):
+        prompt = _create_llm_prompt(chunk, reference_date_time)
+        return get_event_from_llm_with_retry(model, prompt, chunk_args)
+
+    with ThreadPoolExecutor(max_workers=config.CHUNK_WORKERS) as executor:
+        results = list(executor.map(extract, chunks))
+
+    elapsed_time = max(elapsed for _, _, elapsed in results)
+    event_lists = [
+        event if isinstance(event, (list, tuple)) else [event] for event, _, _ in results if event
+    ]
+    if not event_lists:
+        return None, results[-1][1], elapsed_time
+
+    events = merge_events(event_lists)
+    print(f"Found {len(events)} events in {len(event_lists)} of {len(chunks)} chunks")
+    return events, events, elapsed_time
+
+
 def _extract_event_with_llm_retry(
     args, model, content_text, reference_date_time, post_identifier, subject_for_print
 ):
@@ -967,14 +1090,20 @@ def _extract_event_with_llm_retry(
     total_elapsed_time = 0
 
     while True:
-        # Create initial event dict for helper
-        prompt = _create_llm_prompt(prompt_content, reference_date_time)
-        if args.verbose:
-            print(f"Prompt:\n{prompt}")
-            print("\nEnd Prompt:")
+        if len(prompt_content) > config.CHUNK_MAX_CHARS:
+            # Long-document mode: too long for a single reply
+            event, vcal_json, elapsed_time = get_events_from_llm_in_chunks(
+                model, prompt_content, reference_date_time, args
+            )
+        else:
+            # Create initial event dict for helper
+            prompt = _create_llm_prompt(prompt_content, reference_date_time)
+            if args.verbose:
+                print(f"Prompt:\n{prompt}")
+                print("\nEnd Prompt:")
 
-        # Get AI reply with retry logic
-        event, vcal_json, elapsed_time = get_event_from_llm_with_retry(model, prompt, args)
+            # Get AI reply with retry logic
+            event, vcal_json, elapsed_time = get_event_from_llm_with_retry(model, prompt, args)
         total_elapsed_time += elapsed_time
 
         # Check for memory error
@@ -1326,6 +1455,54 @@ def _display_event_info(event, subject_for_print, elapsed_time=None):
     return start_time_local, end_time_local
 
 
+# Event map shared by the publications of the process, read only once
+_event_map = None
+_event_map_lock = threading.Lock()
+
+
+def _get_event_map():
+    """Returns the event map of the current EVENT_MAP_FILE."""
+    global _event_map
+    with _event_map_lock:
+        if _event_map is None or _event_map.path != str(config.EVENT_MAP_FILE):
+            _event_map = EventMap()
+        return _event_map
+
+
+def _publish_or_update_event(api_dst, selected_calendar, event, source):
+    """Creates the calendar event, or patches the one created before from source.
+
+    A source processed again (its page changed, or it was seen twice) gives
+    events that are matched against the ones it produced before: those are
+    patched with the changed fields only, instead of being inserted again.
+    """
+    event_map = _get_event_map()
+    existing = event_map.find(source, event)
+    if existing:
+        changes = event_changes(existing["event"], event)
+        if not changes:
+            print("Calendar event unchanged")
+            return existing
+        result = (
+            api_dst.getClient()
+            .events()
+            .patch(calendarId=existing["calendar"], eventId=existing["id"], body=changes)
+            .execute()
+        )
+        event_map.update(existing, changes)
+        print(f"Calendar event updated: {', '.join(changes)}")
+        return result
+
+    result = api_dst.publishPost(post={"event": event, "idCal": selected_calendar}, api=api_dst)
+    print("Calendar event created")
+    event_id = created_event_id(result)
+    if event_id:
+        event_map.add(source, selected_calendar, event_id, event)
+    else:
+        logging.info(f"No event id returned for {source}, it will not be updated later")
+    return result
+
+
 def _process_event_with_llm_and_calendar(
     args,
     model,
@@ -1342,15 +1519,25 @@ def _process_event_with_llm_and_calendar(
     calendar_result = None
     success = False
     should_process = True
+    resumed_events = _resumed_events(post_identifier)
 
     # Process until success or definitive failure
     while should_process and not success:
         # Extract event with LLM and validate it
-        event, vcal_json, elapsed_time, extraction_success, need_restart, need_another_ai = (
-            _extract_event_with_llm_retry(
-                args, model, content_text, reference_date_time, post_identifier, subject_for_print
+        if resumed_events:
+            # Only the first time: a retry asks the LLM again
+            event, vcal_json, elapsed_time, extraction_success, need_restart, need_another_ai = (
+                resumed_events, None, 0.0, True, False, False
             )
-        )
+            resumed_events = None
+        else:
+            event, vcal_json, elapsed_time, extraction_success, need_restart, need_another_ai = (
+                _extract_event_with_llm_retry(
+                    args, model, content_text, reference_date_time, post_identifier,
+                    subject_for_print
+                )
+            )
+            _journal_extracted(post_identifier, event, extraction_success)
 
         print(f"argssss: {args}")
         # Handle restart case first
@@ -1424,12 +1611,10 @@ def _process_event_with_llm_and_calendar(
                                     try:
 
                                         if ((isinstance(post_identifier, PosixPath) and not post_identifier.suffix) or (isinstance(post_identifier, str) and not post_identifier.endswith('.txt'))):
-                                            calendar_result = api_dst.publishPost(
-                                                post={"event": single_event, "idCal": selected_calendar},
-                                                api=api_dst,
+                                            calendar_result = _publish_or_update_event(
+                                                api_dst, selected_calendar, single_event, post_identifier
                                             )
                                             calendar_results.append(calendar_result)
-                                            print("Calendar event created")
                                             success = True
                                         else:
                                             print("Skipping calendar event creation")
@@ -1497,11 +1682,9 @@ def _process_event_with_llm_and_calendar(
                                     selected_calendar = select_calendar(api_dst)
                                     if selected_calendar:
                                         try:
-                                            calendar_result = api_dst.publishPost(
-                                                post={"event": event, "idCal": selected_calendar},
-                                                api=api_dst,
+                                            calendar_result = _publish_or_update_event(
+                                                api_dst, selected_calendar, event, post_identifier
                                             )
-                                            print("Calendar event created")
                                             success = True  # Indicate successful completion
                                         except googleapiclient.errors.HttpError as e:
                                             logging.error(f"Error creating calendar event: {e}")
@@ -1699,7 +1882,8 @@ def _delete_email(args, api_src, post_id, source_name, rules=None):
 
 def _is_post_too_old(args, time_difference):
     """Checks if an email is too old and confirms processing if interactive."""
-    if time_difference.days > 7:
+    max_days = config.MAX_POST_AGE_DAYS
+    if max_days and time_difference.days > max_days:
         if args.interactive:
             confirmation = input(
                 f"The post has {time_difference.days} days. Do you want to process it? (y/n): "
@@ -1713,45 +1897,141 @@ def _is_post_too_old(args, time_difference):
     return False
 
 
-def _process_common_flow(
-    args, model, items, metadata_extractor, content_extractor, item_cleaner=None
-):
+# Returned by a content extractor for an item processed in a previous run
+UNCHANGED = object()
+
+
+def _prepare_item(args, item, i, metadata_extractor, content_extractor):
+    """Flow steps before the LLM: metadata, age check, content and saving it.
+
+    Returns (post_id, post_title, post_date_time, content_text), or None
+    when the item is skipped. content_text is UNCHANGED when the item is
+    only to be cleaned.
     """
-    Common flow for processing items (emails, web pages).
+    # 1. Metadata
+    post_id, post_title, post_date = metadata_extractor(item, i)
 
-    metadata_extractor: func(item, index) -> (post_id, post_title, post_date)
-    content_extractor: func(item, index, post_date_time, post_title) -> content_text
-    item_cleaner: func(item, index, post_id) -> void
+    print(f"Processing Title: {post_title}", flush=True)
+
+    if _run_journal is not None and _run_journal.reached(post_id, DONE):
+        print("Already processed before the interruption, skipping.")
+        return None
+
+    # 2. Check Age
+    post_date_time, time_difference = _get_post_datetime_and_diff(post_date)
+    if _is_post_too_old(args, time_difference):
+        return None
+
+    # 3. Content
+    content_text = content_extractor(item, i, post_date_time, post_title)
+    if content_text is UNCHANGED:
+        return post_id, post_title, post_date_time, UNCHANGED
+    if not content_text:
+        return None
+
+    # 4. Save & Print (Common)
+    is_txt = False
+    if isinstance(post_id, Path):
+        is_txt = post_id.suffix.endswith("txt")
+    elif isinstance(post_id, str):
+        is_txt = post_id.endswith(".txt")
+
+    if not is_txt:
+        write_file(f"{post_id}.txt", content_text)
+    print_first_10_lines(content_text, "content")
+    return post_id, post_title, post_date_time, content_text
+
+
+# Progress of the items of the current run, inside run_journal
+_run_journal = None
+
+
+@contextmanager
+def run_journal(resume=False, journal=None):
     """
-    processed_any_event = False
-    for i, item in enumerate(items):
-        # 1. Metadata
-        post_id, post_title, post_date = metadata_extractor(item, i)
+    Records in a journal the stage reached by each item processed inside
+    the block, so that an interrupted run can be resumed (resume=True)
+    without calling the LLM again for the items already extracted, nor
+    publishing again the ones already published. The journal is removed
+    when the block completes.
+    """
+    global _run_journal
+    previous = _run_journal
+    _run_journal = journal or RunJournal(resume=resume)
+    try:
+        yield _run_journal
+        _run_journal.clear()
+    finally:
+        _run_journal = previous
 
-        print(f"Processing Title: {post_title}", flush=True)
 
-        # 2. Check Age
-        post_date_time, time_difference = _get_post_datetime_and_diff(post_date)
-        if _is_post_too_old(args, time_difference):
-            continue
+def _resumed_events(post_id):
+    """Events extracted for post_id before the run was interrupted, or None."""
+    if _run_journal is None or _run_journal.stage(post_id) != EXTRACTED:
+        return None
+    print("Using the events extracted before the interruption.")
+    return _run_journal.events(post_id)
+
+
+def _journal_extracted(post_id, event, success):
+    if _run_journal is not None and success and event:
+        _run_journal.record(post_id, EXTRACTED, event)
 
-        # 3. Content
-        content_text = content_extractor(item, i, post_date_time, post_title)
-        if not content_text:
-            continue
 
-        # 4. Save & Print (Common)
-        is_txt = False
-        if isinstance(post_id, Path):
-            is_txt = post_id.suffix.endswith("txt")
-        elif isinstance(post_id, str):
-            is_txt = post_id.endswith(".txt")
+# Candidate events are queued here, instead of published, inside deferred_review
+_review_queue = None
 
-        if not is_txt:
-            write_file(f"{post_id}.txt", content_text)
-        print_first_10_lines(content_text, "content")
 
-        # 5. Process with LLM
+@contextmanager
+def deferred_review(review_queue=None):
+    """
+    Extracts without questions inside the block: the events found are
+    queued for a later review session (review_cli) instead of published.
+    """
+    global _review_queue
+    previous = _review_queue
+    _review_queue = review_queue or ReviewQueue()
+    try:
+        yield _review_queue
+    finally:
+        _review_queue = previous
+
+
+def _extract_candidate(args, model, prepared, review_queue):
+    """Deferred flow step with the LLM: the events are queued for review."""
+    post_id, post_title, post_date_time, content_text = prepared
+    event = _resumed_events(post_id)
+    elapsed_time = 0.0
+    if not event:
+        event, vcal_json, elapsed_time, success, _, _ = _extract_event_with_llm_retry(
+            args, model, content_text, post_date_time, post_id, post_title
+        )
+        if not success or not event:
+            return None
+        _journal_extracted(post_id, event, success)
+    events = list(event) if isinstance(event, (list, tuple)) else [event]
+    for single_event in events:
+        if not single_event.get("summary"):
+            single_event["summary"] = post_title
+        _add_ai_metadata_to_event(single_event, model, elapsed_time)
+    review_queue.add(post_id, post_title, content_text, post_date_time, events, elapsed_time)
+    print(f"{len(events)} events queued for review: {post_title}")
+    return events
+
+
+def _extract_item(args, model, prepared):
+    """Flow step with the LLM: extraction, validation and publication."""
+    post_id, post_title, post_date_time, content_text = prepared
+    if content_text is UNCHANGED:
+        return UNCHANGED
+    journal = _run_journal
+    if journal is not None and journal.reached(post_id, PUBLISHED):
+        print("Events already published before the interruption.")
+        return journal.events(post_id)
+
+    if _review_queue is not None:
+        processed_event = _extract_candidate(args, model, prepared, _review_queue)
+    else:
         processed_event, calendar_result = _process_event_with_llm_and_calendar(
             args,
             model,
@@ -1760,116 +2040,815 @@ def _process_common_flow(
             post_id,
             post_title,
         )
+    if journal is not None and processed_event:
+        journal.record(post_id, PUBLISHED, processed_event)
+    return processed_event
 
-        # processed_event = True
 
-        if processed_event:
-            processed_any_event = True
-            # 6. Post-process
+def _process_common_flow(
+    args,
+    model,
+    items,
+    metadata_extractor,
+    content_extractor,
+    item_cleaner=None,
+    on_event=None,
+    deferred_cleanup=None,
+):
+    """
+    Common flow for processing items (emails, web pages).
+
+    metadata_extractor: func(item, index) -> (post_id, post_title, post_date)
+    content_extractor: func(item, index, post_date_time, post_title) -> content_text,
+        or UNCHANGED for items already processed, which are only cleaned
+    item_cleaner: func(item, index, post_id) -> void
+    on_event: func(item, index, post_id, event) -> void, called with the
+        processed event(s) of each item
+    deferred_cleanup: func(item, index, post_id) -> dict, what the review
+        needs to do the work of item_cleaner and on_event later
+
+    Without -i the items go through a staged pipeline: the content of the
+    next items is prepared (PIPELINE_CONTENT_WORKERS threads) while the LLM
+    extracts and publishes the events of the current one
+    (PIPELINE_EXTRACT_WORKERS threads). Cleaners and on_event run in this
+    thread, in the order of the items (unless PIPELINE_ORDERED is off).
+
+    Inside deferred_review nothing is asked: the events are extracted by
+    DEFER_EXTRACT_WORKERS threads and queued for review, and the items are
+    only cleaned when their events are accepted (see review_cli).
+    Inside run_journal, the items finished by an interrupted run are
+    skipped and the events already extracted are not asked again to the LLM.
+    """
+    if _review_queue is not None and args.interactive:
+        args = replace(args, interactive=False)
+    processed_any_event = False
+    timer = StageTimer()
+
+    def finish(item, i, post_id, processed_event):
+        # 6. Post-process
+        nonlocal processed_any_event
+        if processed_event is UNCHANGED:
+            # Its events were handled in a previous run
             if item_cleaner:
                 item_cleaner(item, i, post_id)
+        elif processed_event:
+            processed_any_event = True
+            start = time.monotonic()
+            if _review_queue is not None:
+                if deferred_cleanup:
+                    _review_queue.set_cleanup(post_id, deferred_cleanup(item, i, post_id))
+            else:
+                if on_event:
+                    on_event(item, i, post_id, processed_event)
+                if item_cleaner:
+                    item_cleaner(item, i, post_id)
+            timer.add("cleanup", time.monotonic() - start)
+        if _run_journal is not None:
+            _run_journal.record(post_id, DONE)
+
+    if args.interactive:
+        # Questions are asked one item at a time
+        for i, item in enumerate(items):
+            prepared = _prepare_item(args, item, i, metadata_extractor, content_extractor)
+            if prepared:
+                # 5. Process with LLM
+                finish(item, i, prepared[0], _extract_item(args, model, prepared))
+        return processed_any_event
+
+    def content(task):
+        i, item = task
+        prepared = _prepare_item(args, item, i, metadata_extractor, content_extractor)
+        return (i, item, prepared) if prepared else SKIP
+
+    def extract(task):
+        i, item, prepared = task
+        return i, item, prepared[0], _extract_item(args, model, prepared)
+
+    extract_workers = config.PIPELINE_EXTRACT_WORKERS
+    if _review_queue is not None:
+        extract_workers = max(extract_workers, config.DEFER_EXTRACT_WORKERS)
+    pipeline = Pipeline(
+        [
+            Stage("content", content, config.PIPELINE_CONTENT_WORKERS),
+            Stage("extract", extract, extract_workers),
+        ],
+        queue_size=config.PIPELINE_QUEUE_SIZE,
+        ordered=config.PIPELINE_ORDERED,
+        timer=timer,
+    )
+    for i, item, post_id, processed_event in pipeline.run(enumerate(items)):
+        finish(item, i, post_id, processed_event)
 
+    if timer.stages:
+        logging.info(f"Stage times: {timer.summary()}")
+        if args.verbose:
+            print(f"Stage times: {timer.summary()}")
     return processed_any_event
 
+def _process_txt_posts(args, model, posts, manifest, api_src=None):
+    """Extracts the events of text messages ([path, content] posts),
+    marking the files that produced events as processed in manifest."""
+
+    def metadata_extractor(post, i):
+        # Use getPostIdM if it exists, otherwise use getPostId
+        if hasattr(api_src, "getPostIdM"):
+            post_id = api_src.getPostIdM(post)
+        else:
+            post_id = post[0]
+        lines_txt = post[1].split('\n')
+        import re
+        date = ""
+        for line in reversed(lines_txt):
+            match = re.search(r"(?i)date:\s*([^\s\n]+)", line)
+            if match:
+                date = match.group(1)
+                break
+
+        if not date and len(lines_txt) > 1:
+            last_line = lines_txt[-1].strip() or lines_txt[-2].strip()
+            if last_line:
+                parts = last_line.split(': ')
+                if len(parts) > 1:
+                    date = "".join(parts[1:])
+
+        if not date and len(lines_txt) > 1:
+            date = lines_txt[1].split(' ')[-1]
+
+        if ' ' in date:
+            date = date.split(' ')[0]
+
+        logging.debug(f"Extracted date: {date}")
+        return post_id, lines_txt[1][len("Subject: "):], date
+
+    def content_extractor(post, i, post_date_time, post_title):
+        lines_txt = post[1].split('\n')
+        post_title = lines_txt[1][len("Subject: "):]
+        full_email_content = "".join(lines_txt[3:-1])
+        date_message = lines_txt[-1].split(' ')[-1]
+        return (
+            f"Subject: {post_title}\n"
+            f"Message: {full_email_content}\n"
+            f"Message date: {date_message}\n"
+        )
+
+    def item_cleaner(post, i, post_id):
+        manifest.mark_processed(post[0].name)
+
+    def deferred_cleanup(post, i, post_id):
+        return {"txt": {"dir": manifest.txt_dir, "name": post[0].name}}
+
+    return _process_common_flow(
+        args,
+        model,
+        posts,
+        metadata_extractor,
+        content_extractor,
+        item_cleaner,
+        deferred_cleanup=deferred_cleanup,
+    )
+
+
 def process_txt_cli(args, model, source_name=None, rules=None):
     """Processes txt files and creates calendar events."""
 
     #if not source_name:
     #    source_name = select_email_source(args, rules=rules)
 
-    api_src, posts = _get_msgs_from_folder(args, source_name, rules=rules)
+    manifest = TxtManifest(Path(config.MSG_TXT_DIR))
+    stats = {}
+    api_src, posts = _get_msgs_from_folder(
+        args, source_name, rules=rules, manifest=manifest, stats=stats
+    )
 
     if posts:
+        try:
+            return _process_txt_posts(args, model, posts, manifest, api_src)
+        finally:
+            manifest.save()
+            if args.verbose:
+                print(f"Text files: {stats['read']} read, {stats['skipped']} already processed")
+    return False  # Default return if something went wrong before the main logic
 
-        def metadata_extractor(post, i):
-            # Use getPostIdM if it exists, otherwise use getPostId
-            if hasattr(api_src, "getPostIdM"):
-                post_id = api_src.getPostIdM(post)
-            else:
-                post_id = post[0]
-            lines_txt = post[1].split('\n')
-            import re
-            date = ""
-            for line in reversed(lines_txt):
-                match = re.search(r"(?i)date:\s*([^\s\n]+)", line)
-                if match:
-                    date = match.group(1)
-                    break
-
-            if not date and len(lines_txt) > 1:
-                last_line = lines_txt[-1].strip() or lines_txt[-2].strip()
-                if last_line:
-                    parts = last_line.split(': ')
-                    if len(parts) > 1:
-                        date = "".join(parts[1:])
-
-            if not date and len(lines_txt) > 1:
-                date = lines_txt[1].split(' ')[-1]
-
-            if ' ' in date:
-                date = date.split(' ')[0]
-
-            logging.debug(f"Extracted date: {date}")
-            return post_id, lines_txt[1][len("Subject: "):], date
 
-        def content_extractor(post, i, post_date_time, post_title):
-            lines_txt = post[1].split('\n')
-            post_title = lines_txt[1][len("Subject: "):]
-            full_email_content = "".join(lines_txt[3:-1])
-            date_message = lines_txt[-1].split(' ')[-1]
-            return (
-                f"Subject: {post_title}\n"
-                f"Message: {full_email_content}\n"
-                f"Message date: {date_message}\n"
+def watch_txt_cli(args, model, stop=None, poll_interval=None):
+    """
+    Processes the text files dropped into MSG_TXT_DIR as they are written.
+
+    Completed files are detected with inotify (or polling, where it is not
+    available) and only those are read; the model and the calendar clients
+    are kept across files. Runs until interrupted (or stop is set).
+    """
+    target_dir = Path(config.MSG_TXT_DIR)
+    stop = stop or threading.Event()
+    manifest = TxtManifest(target_dir)
+
+    def on_files(paths):
+        if args.verbose:
+            print(f"New files: {', '.join(os.path.basename(path) for path in paths)}")
+        try:
+            _process_txt_posts(args, model, iter_txt_files(paths, manifest), manifest)
+        except Exception as e:
+            logging.error(f"Error processing {paths}: {e}")
+        finally:
+            if manifest.changed:
+                manifest.save()
+
+    print(f"Watching {target_dir} (Ctrl-C to stop)")
+    try:
+        with shared_api_sources():
+            watch_directory(str(target_dir), on_files, stop, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopping.")
+        stop.set()
+    return True
+
+
+def process_feed_cli(args, model, feeds=None):
+    """Processes the new entries of RSS, Atom and iCalendar feeds.
+
+    Only entries not seen in previous runs are processed; the feed cursors
+    are saved once they have been handled.
+    """
+    feeds = feeds or read_feed_list()
+    if not feeds:
+        print(f"No feeds configured in {config.FEEDS_FILE}")
+        return False
+
+    state = FeedState()
+    entries, validators = poll_feeds(feeds, state)
+    print(f"Polled {len(feeds)} feeds: {len(entries)} new entries.")
+    if not entries:
+        commit_feeds(state, validators, entries)
+        return False
+
+    def metadata_extractor(entry, i):
+        return entry.post_id, entry.title or entry.link, entry_datetime(entry)
+
+    def content_extractor(entry, i, post_date_time, post_title):
+        return (
+            f"Subject: {entry.title}\n"
+            f"URL: {entry.link}\n"
+            f"Message: {entry.text}\n"
+            f"Message date: {post_date_time}\n"
+        )
+
+    result = _process_common_flow(args, model, entries, metadata_extractor, content_extractor)
+    commit_feeds(state, validators, entries)
+    return result
+
+
+def _edit_candidate(args, candidate):
+    """Edits the summary and the dates of the events of a candidate.
+
+    Returns True when the user asks for a new LLM extraction instead.
+    """
+    for event in candidate["events"]:
+        _display_event_info(event, candidate["title"])
+        new_summary = input("Enter Summary (leave empty to keep it): ").strip()
+        if new_summary:
+            event["summary"] = new_summary
+        edited, retry_needed = _interactive_date_confirmation(args, event)
+        if retry_needed:
+            return True
+        event.update(edited)
+    return False
+
+
+def _retry_candidate(args, model, candidate):
+    """Extracts the events of a candidate again, with the usual fallback
+    options (retry, text snippet, manual input). Returns the new events,
+    or None."""
+    if model is None:
+        print("No LLM available to retry.")
+        return None
+    event, vcal_json, elapsed_time, success, _, _ = _extract_event_with_llm_retry(
+        args,
+        model,
+        candidate["content"],
+        reference_datetime(candidate),
+        candidate["source"],
+        candidate["title"],
+    )
+    if not success or not event:
+        return None
+    events = list(event) if isinstance(event, (list, tuple)) else [event]
+    for single_event in events:
+        _add_ai_metadata_to_event(single_event, model, elapsed_time)
+    return events
+
+
+def _review_candidate(args, model, review_queue, candidate):
+    """Asks what to do with a candidate until it is accepted or skipped,
+    or the review is stopped. Returns the last choice ('a', 's' or 'q')."""
+    while True:
+        for event in candidate["events"]:
+            _display_event_info(event, candidate["title"], candidate.get("elapsed"))
+        choice = input(REVIEW_PROMPT).lower().strip()
+        if choice in ("a", "s", "q"):
+            return choice
+        if choice == "e":
+            if not _edit_candidate(args, candidate):
+                review_queue.save()
+                continue
+            choice = "r"
+        if choice == "r":
+            events = _retry_candidate(args, model, candidate)
+            if events:
+                candidate["events"] = events
+                review_queue.save()
+            else:
+                print("No events extracted, keeping the previous ones.")
+        elif choice == "t":
+            _print_context_and_options(candidate["content"], "Press Enter to continue: ")
+        else:
+            print("Invalid choice. Please try again.")
+
+
+class _DeferredCleaner:
+    """Cleans the sources of the accepted candidates, as the flow without
+    review does once their events are published."""
+
+    def __init__(self):
+        self.manifests = {}
+        self.cleanup_queue = None
+        self.note_manager = None
+
+    def clean(self, candidate):
+        cleanup = candidate.get("cleanup") or {}
+        if "txt" in cleanup:
+            txt_dir = cleanup["txt"]["dir"]
+            if txt_dir not in self.manifests:
+                self.manifests[txt_dir] = TxtManifest(txt_dir)
+            self.manifests[txt_dir].mark_processed(cleanup["txt"]["name"])
+        if "email" in cleanup:
+            # Removed from the folder in the next run of the account
+            message = cleanup["email"]
+            self.cleanup_queue = self.cleanup_queue or CleanupQueue()
+            self.cleanup_queue.add(
+                message["account"], message["folder"], message["id"], message.get("uidvalidity")
             )
+        if "memo" in cleanup:
+            remember_events(cleanup["memo"]["hash"], cleanup["memo"]["url"], candidate["events"])
+        if cleanup.get("notes"):
+            self.note_manager = self.note_manager or _get_note_manager()
+            if self.note_manager:
+                for note_title in cleanup["notes"]:
+                    print(f"Deleting note: {note_title}")
+                    self.note_manager.delete_note(note_title)
+
+
+def _publish_accepted(args, review_queue):
+    """Publishes the accepted candidates, all of them in one calendar."""
+    accepted = review_queue.accepted()
+    if not accepted:
+        print("No events to publish.")
+        return False
+
+    # Text files are a recomputation: their events are not published
+    # (as in the flow without review)
+    to_publish = []
+    cleaner = _DeferredCleaner()
+    for candidate in accepted:
+        if candidate["source"].endswith(".txt"):
+            print(f"Skipping calendar event creation: {candidate['title']}")
+            cleaner.clean(candidate)
+            review_queue.remove(candidate)
+        else:
+            to_publish.append(candidate)
+    if not to_publish:
+        return False
+
+    count = sum(len(candidate["events"]) for candidate in to_publish)
+    api_dst = select_api_source(args, "gcalendar", title=f"{count} accepted events")
+    selected_calendar = select_calendar(api_dst, title=f"{count} accepted events")
+    if not selected_calendar:
+        print("No calendar selected, the accepted events are kept for the next review.")
+        return False
+
+    published = 0
+    for candidate in to_publish:
+        try:
+            for event in candidate["events"]:
+                _publish_or_update_event(api_dst, selected_calendar, event, candidate["source"])
+                published += 1
+        except googleapiclient.errors.HttpError as e:
+            # Kept as accepted: the next review publishes it (events already
+            # created are then matched, not duplicated)
+            logging.error(f"Error creating calendar event: {e}")
+            continue
+        cleaner.clean(candidate)
+        review_queue.remove(candidate)
+    print(f"{published} events published.")
+    return published > 0
 
-        def item_cleaner(post, i, post_id):
-            pass
 
-        return _process_common_flow(
-            args, model, posts, metadata_extractor, content_extractor, item_cleaner
+def review_cli(args, model=None, review_queue=None):
+    """
+    Reviews the candidate events extracted with add --defer.
+
+    Each candidate is shown with its events, to be accepted, edited,
+    extracted again by the LLM or skipped; the review can be stopped and
+    resumed later. The accepted events are then published together, asking
+    for the calendar once.
+    """
+    review_queue = review_queue or ReviewQueue()
+    pending = review_queue.pending()
+    if not pending and not review_queue.accepted():
+        print("No candidate events to review.")
+        return False
+
+    with shared_api_sources():
+        for n, candidate in enumerate(pending, start=1):
+            print(f"\n[{n}/{len(pending)}] {candidate['title']} ({candidate['source']})")
+            choice = _review_candidate(args, model, review_queue, candidate)
+            if choice == "q":
+                break
+            if choice == "a":
+                review_queue.accept(candidate)
+            else:
+                review_queue.remove(candidate)
+
+        return _publish_accepted(args, review_queue)
+
+
+def _flush_cleanup_queue(args, api_src, source_name, cleanup):
+    """Removes the queued processed messages of an account from its folder.
+
+    The queue is kept (and retried in the next run) when the removal fails.
+    """
+    pending = cleanup.pending(source_name)
+    ids = pending.get("ids")
+    if not ids:
+        return
+    if args.interactive:
+        confirmation = input(f"Remove the label from the {len(ids)} processed emails? (y/n): ")
+        confirmed = confirmation.lower() == "y"
+    else:
+        confirmed = bool(args.delete)
+    if not confirmed:
+        cleanup.done(source_name)
+        return
+
+    try:
+        removed = remove_messages(api_src, pending["folder"], ids, pending.get("uidvalidity"))
+    except Exception as e:
+        logging.warning(f"Could not remove the processed emails, will retry next run: {e}")
+        return
+    logging.info(f"Label removed from {removed} emails of {source_name}.")
+    cleanup.done(source_name)
+
+
+def _normalize_email_content(args, content):
+    """Normalizes an email body, reporting the bytes saved."""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    content = content or ""
+    normalized = normalize_email_body(content)
+    before = len(content.encode("utf-8"))
+    after = len(normalized.encode("utf-8"))
+    logging.info(f"Email body normalized: {before} -> {after} bytes ({before - after} saved)")
+    if args.verbose:
+        print(f"Email body: {before} -> {after} bytes ({before - after} saved)")
+    return normalized
+
+
+class _EmailBatch:
+    """New messages of an email account, ready for the extraction flow.
+
+    Keeps what is needed to finish the account once they are processed:
+    the sync cursor to save and the queue of messages to remove.
+
+    The bodies missing from the bulk fetch are read in the content worker
+    threads and the messages are deleted in the calling one; both share
+    the connection of the account, so they hold the batch lock.
+    """
+
+    def __init__(
+        self, args, source_name, rules, force_refresh=False, gate=None, sync_state=None, cleanup=None
+    ):
+        self.args = args
+        self.source_name = source_name
+        self.rules = rules
+        self.gate = gate
+        self.positions = []
+        self.new_cursor = None
+        self.lock = threading.Lock()
+        # Shared by the batches of a run: each save writes all the accounts
+        self.sync_state = sync_state or MailSyncState()
+        # Processed messages are removed from the folder together at the
+        # end; the ones queued by an interrupted run were already processed
+        self.cleanup = cleanup or CleanupQueue()
+
+        self.api_src, self.posts = _get_emails_from_folder(args, source_name, rules=rules)
+        if not self.posts:
+            return
+
+        cursor = {} if force_refresh else self.sync_state.get(source_name)
+        positions, self.new_cursor = mailbox_delta(self.api_src, self.posts, cursor)
+        if positions is None:
+            positions = list(range(len(self.posts)))
+
+        # Old messages are left out before their bodies are downloaded
+        recent = recent_positions(self.api_src, self.posts)
+        if recent is not None:
+            recent = set(recent)
+            old = len([n for n in positions if n not in recent])
+            positions = [n for n in positions if n in recent]
+            if old and (args.interactive or args.verbose):
+                print(
+                    f"{old} messages older than {config.MAX_POST_AGE_DAYS} days "
+                    "were not downloaded."
+                )
+
+        self.folder = self.api_src.getChannel()
+        self.message_ids, self.uidvalidity = folder_message_ids(self.api_src, self.posts)
+        pending = self.cleanup.pending(source_name)
+        if self.message_ids and (pending.get("folder"), pending.get("uidvalidity")) == (
+            self.folder,
+            self.uidvalidity,
+        ):
+            queued = set(pending["ids"])
+            positions = [n for n in positions if self.message_ids[n] not in queued]
+        self.positions = positions
+
+        if args.verbose and positions and len(positions) < len(self.posts):
+            print(f"{len(positions)} new messages of {len(self.posts)}.")
+
+        # All the bodies in a few requests instead of one per message
+        self.bodies = fetch_email_bodies(self.api_src, self.posts, positions) if positions else {}
+
+    def _wait(self):
+        if self.gate:
+            self.gate.wait_for(self.source_name)
+
+    def items(self):
+        return [self.posts[n] for n in self.positions]
+
+    def metadata_extractor(self, post, i):
+        # Use getPostIdM if it exists, otherwise use getPostId
+        if hasattr(self.api_src, "getPostIdM"):
+            post_id = self.api_src.getPostIdM(post)
+        else:
+            post_id = self.api_src.getPostId(post)
+        return post_id, self.api_src.getPostTitle(post), self.api_src.getPostDate(post)
+
+    def content_extractor(self, post, i, post_date_time, post_title):
+        full_email_content = self.bodies.get(self.positions[i])
+        if full_email_content is None:
+            self._wait()
+            with self.lock:
+                full_email_content = self.api_src.getPostBody(post)
+        full_email_content = _normalize_email_content(self.args, full_email_content)
+        date_message = str(post_date_time).split(" ")[0]
+        return (
+            f"Subject: {post_title}\n"
+            f"Message: {full_email_content}\n"
+            f"Message date: {date_message}\n"
         )
-    return False  # Default return if something went wrong before the main logic
+
+    def item_cleaner(self, post, i, post_id):
+        if self.message_ids:
+            self.cleanup.add(
+                self.source_name, self.folder, self.message_ids[self.positions[i]], self.uidvalidity
+            )
+            return
+        if "imap" in self.api_src.service.lower():
+            post_pos = self.positions[i] + 1
+        else:
+            post_pos = post_id
+        self._wait()
+        with self.lock:
+            _delete_email(self.args, self.api_src, post_pos, self.source_name, rules=self.rules)
+
+    def deferred_cleanup(self, post, i, post_id):
+        if not self.message_ids:
+            # Without message ids, the message is left in the folder
+            return None
+        return {
+            "email": {
+                "account": self.source_name,
+                "folder": self.folder,
+                "id": self.message_ids[self.positions[i]],
+                "uidvalidity": self.uidvalidity,
+            }
+        }
+
+    def finish(self):
+        """Saves the sync cursor and removes the processed messages.
+
+        The messages queued by previous runs are removed even when the
+        folder has no messages to process.
+        """
+        if self.api_src is None:
+            return
+        if self.posts and self.new_cursor:
+            self.sync_state.update(self.source_name, self.new_cursor)
+            self.sync_state.save()
+        with self.lock:
+            _flush_cleanup_queue(self.args, self.api_src, self.source_name, self.cleanup)
 
 
-def process_email_cli(args, model, source_name=None, rules=None):
-    """Processes emails and creates calendar events."""
+def process_email_cli(args, model, source_name=None, rules=None, force_refresh=False):
+    """Processes emails and creates calendar events.
+
+    Only the messages added since the last run of the account are
+    processed; with force_refresh, the whole folder is.
+    """
 
     if not source_name:
         source_name = select_email_source(args, rules=rules)
 
-    api_src, posts = _get_emails_from_folder(args, source_name, rules=rules)
+    batch = _EmailBatch(args, source_name, rules, force_refresh=force_refresh)
+    if not batch.posts:
+        batch.finish()
+        return False  # Default return if something went wrong before the main logic
+    if not batch.positions:
+        print("No new messages to process.")
+        batch.finish()
+        return False
+
+    result = _process_common_flow(
+        args,
+        model,
+        batch.items(),
+        batch.metadata_extractor,
+        batch.content_extractor,
+        batch.item_cleaner,
+        deferred_cleanup=batch.deferred_cleanup,
+    )
+    batch.finish()
+    return result
 
-    if posts:
 
-        def metadata_extractor(post, i):
-            # Use getPostIdM if it exists, otherwise use getPostId
-            if hasattr(api_src, "getPostIdM"):
-                post_id = api_src.getPostIdM(post)
-            else:
-                post_id = api_src.getPostId(post)
-            return post_id, api_src.getPostTitle(post), api_src.getPostDate(post)
+def process_all_email_cli(args, model, rules=None, force_refresh=False):
+    """
+    Processes the new messages of all the email accounts in one run.
 
-        def content_extractor(post, i, post_date_time, post_title):
-            full_email_content = api_src.getPostBody(post)
-            date_message = str(post_date_time).split(" ")[0]
-            return (
-                f"Subject: {post_title}\n"
-                f"Message: {full_email_content}\n"
-                f"Message date: {date_message}\n"
+    The accounts are read concurrently (EMAIL_SOURCE_WORKERS at a time);
+    their messages are then extracted in a single queue, publishing
+    through shared calendar clients. Requests to the same account are
+    spaced EMAIL_ACCOUNT_DELAY seconds.
+    """
+    rules = ensure_rules(rules)
+    source_names = _get_email_sources(rules)
+    if not source_names:
+        print("No email sources configured.")
+        return False
+
+    gate = _PolitenessGate(config.EMAIL_ACCOUNT_DELAY)
+    sync_state = MailSyncState()
+    cleanup = CleanupQueue()
+
+    def prepare(source_name):
+        try:
+            return _EmailBatch(
+                args,
+                source_name,
+                rules,
+                force_refresh=force_refresh,
+                gate=gate,
+                sync_state=sync_state,
+                cleanup=cleanup,
             )
+        except Exception as e:
+            logging.error(f"Error reading {source_name}: {e}")
+            return None
 
-        def item_cleaner(post, i, post_id):
-            if "imap" in api_src.service.lower():
-                post_pos = i + 1
-            else:
-                post_pos = post_id
-            _delete_email(args, api_src, post_pos, source_name, rules=rules)
+    workers = max(1, min(config.EMAIL_SOURCE_WORKERS, len(source_names)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batches = [batch for batch in executor.map(prepare, source_names) if batch]
 
-        return _process_common_flow(
-            args, model, posts, metadata_extractor, content_extractor, item_cleaner
+    queue = [(batch, i) for batch in batches for i in range(len(batch.positions))]
+    if args.verbose:
+        for batch in batches:
+            print(f"{batch.source_name}: {len(batch.positions)} messages")
+    if not queue:
+        print("No new messages to process.")
+        for batch in batches:
+            batch.finish()
+        return False
+
+    def post_of(item):
+        batch, i = item
+        return batch, batch.posts[batch.positions[i]], i
+
+    def metadata_extractor(item, _):
+        batch, post, i = post_of(item)
+        return batch.metadata_extractor(post, i)
+
+    def content_extractor(item, _, post_date_time, post_title):
+        batch, post, i = post_of(item)
+        return batch.content_extractor(post, i, post_date_time, post_title)
+
+    def item_cleaner(item, _, post_id):
+        batch, post, i = post_of(item)
+        batch.item_cleaner(post, i, post_id)
+
+    def deferred_cleanup(item, _, post_id):
+        batch, post, i = post_of(item)
+        return batch.deferred_cleanup(post, i, post_id)
+
+    with shared_api_sources():
+        result = _process_common_flow(
+            args,
+            model,
+            queue,
+            metadata_extractor,
+            content_extractor,
+            item_cleaner,
+            deferred_cleanup=deferred_cleanup,
         )
-    return False  # Default return if something went wrong before the main logic
+    for batch in batches:
+        batch.finish()
+    return result
+
+
+def _watch_email_source(args, model, source_name, rules, stop, lock, interval=None):
+    """Watches one email source, processing it when new messages arrive."""
+
+    def on_new_mail():
+        with lock:
+            if args.verbose:
+                print(f"Checking {source_name}")
+            try:
+                process_email_cli(args, model, source_name=source_name, rules=rules)
+            except Exception as e:
+                logging.error(f"Error processing {source_name}: {e}")
+
+    def read_source():
+        source_details = rules.more.get(source_name, {})
+        api_src = rules.readConfigSrc("", source_name, source_details)
+        if not api_src or not api_src.getClient():
+            raise ConnectionError(f"Could not connect to {source_name}")
+        return api_src
+
+    api_src = read_source()
+    if "imap" in api_src.service.lower():
+
+        def connect():
+            # A connection of its own, kept in IDLE
+            client = read_source().getClient()
+            typ, data = client.select(_agenda_folder(api_src))
+            if typ != "OK":
+                raise imaplib.IMAP4.error(f"Could not select folder: {data}")
+            return client
+
+        watch_imap(connect, on_new_mail, stop)
+    else:
+        sources = [api_src]
+
+        def check():
+            try:
+                client = sources[0].getClient()
+                return client.users().getProfile(userId="me").execute()["historyId"]
+            except Exception:
+                sources[0] = read_source()
+                raise
+
+        watch_gmail(check, on_new_mail, stop, interval=interval)
+
+
+def watch_email_cli(args, model, rules=None, source_names=None, interval=None, stop=None):
+    """
+    Processes the new messages of the email sources as they arrive.
+
+    IMAP sources are watched with IDLE and Gmail sources are polled every
+    interval seconds; each source runs in its own thread and messages are
+    processed one source at a time. Runs until interrupted (or stop is set).
+    """
+    rules = ensure_rules(rules)
+    source_names = source_names or _get_email_sources(rules)
+    if not source_names:
+        print("No email sources configured.")
+        return False
+
+    stop = stop or threading.Event()
+    lock = threading.Lock()
+
+    def watch(source_name):
+        while not stop.is_set():
+            try:
+                _watch_email_source(args, model, source_name, rules, stop, lock, interval)
+            except Exception as e:
+                logging.warning(f"Could not watch {source_name}: {e}")
+                stop.wait(config.WATCH_MAX_BACKOFF)
+
+    threads = [
+        threading.Thread(target=watch, args=(source_name,), name=source_name, daemon=True)
+        for source_name in source_names
+    ]
+    for thread in threads:
+        thread.start()
+    print(f"Watching {', '.join(source_names)} (Ctrl-C to stop)")
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\nStopping.")
+        stop.set()
+    return True
 
 
 def _get_pages_from_urls(args, urls):
@@ -1888,47 +2867,157 @@ def _get_pages_from_urls(args, urls):
     return page, posts
 
 
-def _get_links_from_notes():
-    """Extracts URLs from all notes in ~/notes."""
+class _PolitenessGate:
+    """Spaces out the requests made to the same host by several threads."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.next_request = {}
+
+    def wait(self, url):
+        self.wait_for(urlparse(url).netloc)
+
+    def wait_for(self, key):
+        """Waits for the turn of key (a host, an account)."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request.get(key, now))
+            self.next_request[key] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+
+def _fetch_pages(args, urls, workers, gate, force_refresh=False):
+    """
+    Fetches urls concurrently, returning (url, page, post) in input order.
+
+    Pages fetched recently (CRAWL_CACHE_TTL) are served from the web cache,
+    without a request; page is then None.
+    """
+
+    def fetch(url):
+        if not force_refresh:
+            post = get_cached_page(url)
+            if post is not None:
+                if args.verbose:
+                    print(f"From cache: {url}")
+                return url, None, post
+        gate.wait(url)
+        try:
+            page, posts = _get_pages_from_urls(args, [url])
+        except Exception as e:
+            logging.warning(f"Could not fetch {url}: {e}")
+            return url, None, None
+        post = posts[0] if posts else None
+        if post:
+            cache_page(url, post)
+        return url, page, post
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(fetch, urls))
+
+
+def _crawl_event_pages(
+    args, listing_urls, depth=1, max_pages=None, workers=None, delay=None, force_refresh=False
+):
+    """
+    Starts from listing pages (venue agendas) and fetches the event detail
+    pages they link to, following links up to depth levels.
+
+    Args:
+        args: Arguments object
+        listing_urls: URLs of the listing pages
+        depth: How many levels of links to follow
+        max_pages: Maximum number of detail pages to fetch
+        workers: Number of concurrent requests
+        delay: Seconds between two requests to the same host
+        force_refresh: Fetch the pages again instead of using the web cache
+
+    Returns:
+        list: (url, page, post, listing_url) for every fetched detail page
+        (page is None for pages served from the cache).
+    """
+    max_pages = max_pages or config.CRAWL_MAX_PAGES
+    workers = workers or config.CRAWL_WORKERS
+    gate = _PolitenessGate(config.CRAWL_DELAY if delay is None else delay)
+
+    seen = {canonicalize_url(url) for url in listing_urls}
+    level = [(url, page, post, url) for url, page, post in
+             _fetch_pages(args, listing_urls, workers, gate, force_refresh)]
+    results = []
+    for current_depth in range(1, depth + 1):
+        links = []
+        for url, _, post, listing_url in level:
+            for link in find_event_links(url, post):
+                canonical = canonicalize_url(link)
+                if canonical not in seen:
+                    seen.add(canonical)
+                    links.append((link, listing_url))
+        links = links[: max_pages - len(results)]
+        if not links:
+            break
+        print(f"Crawling {len(links)} links (level {current_depth})")
+        fetched = _fetch_pages(args, [link for link, _ in links], workers, gate, force_refresh)
+        level = [
+            (url, page, post, listing_url)
+            for (url, page, post), (_, listing_url) in zip(fetched, links)
+            if post
+        ]
+        results.extend(level)
+        if len(results) >= max_pages:
+            break
+
+    return results
+
+
+def _get_note_manager():
+    """Returns a NoteManager for ~/notes, or None if it is not available."""
     try:
         from note_app import NoteManager
+    except ImportError:
+        logging.warning("note_app not found. Cannot extract links from notes.")
+        return None
+
+    return NoteManager(storage_dir=os.path.expanduser("~/notes"))
+
 
+def _get_links_from_notes(manager=None):
+    """Extracts URLs from all notes in ~/notes.
+
+    Served from a persistent index: only notes modified since the last run
+    are read again.
+    """
+    try:
         notes_dir = os.path.expanduser("~/notes")
         if not os.path.exists(notes_dir):
             logging.warning(f"Notes directory {notes_dir} does not exist.")
             return {}
 
-        manager = NoteManager(storage_dir=notes_dir)
-        titles = manager.list_notes()
-        url_to_notes = {}
-        for title in titles:
-            note = manager.read_note(title)
-            if note:
-                # get_urls() returns explicitly added URLs
-                # get_links() returns URLs extracted from content
-                note_urls = set(note.get_urls()) | set(note.get_links())
-                for url in note_urls:
-                    if url not in url_to_notes:
-                        url_to_notes[url] = []
-                    url_to_notes[url].append(title)
-        return url_to_notes
-    except ImportError:
-        logging.warning("note_app not found. Cannot extract links from notes.")
-        return {}
+        manager = manager or _get_note_manager()
+        if not manager:
+            return {}
+        return NotesLinkIndex(notes_dir).refresh(manager)
     except Exception as e:
         logging.error(f"Error extracting links from notes: {e}")
         return {}
 
 
-def process_web_cli(args, model, urls=None, force_refresh=False):
-    """Processes web pages and creates calendar events."""
+def process_web_cli(args, model, urls=None, force_refresh=False, crawl=False, crawl_depth=1):
+    """Processes web pages and creates calendar events.
+
+    With crawl, the urls are listing pages: the event detail pages they
+    link to (up to crawl_depth levels) are processed instead.
+    """
 
     url_to_notes = {}
+    manager = None
     if not urls:
         urls_input = input("Enter URLs separated by spaces (leave empty to use ~/notes): ").split()
         if not urls_input:
             print("No URLs entered. Extracting links from ~/notes...")
-            url_to_notes = _get_links_from_notes()
+            manager = _get_note_manager()
+            url_to_notes = _get_links_from_notes(manager)
             if not url_to_notes:
                 print("No links found in ~/notes.")
                 return False
@@ -1939,64 +3028,153 @@ def process_web_cli(args, model, urls=None, force_refresh=False):
         else:
             urls = urls_input
 
-    api_src, posts = _get_pages_from_urls(args, urls)
+    # Fetch each page once, remembering every URL it was listed as
+    urls, url_origins = dedup_urls(urls)
+    duplicates = sum(len(origins) - 1 for origins in url_origins.values())
+    if duplicates:
+        print(f"Skipping {duplicates} duplicated links.")
+
+    page_apis = None
+    # Listing page of each crawled page
+    listing_of = {}
+    listing_origins = url_origins
+    if crawl:
+        crawled = _crawl_event_pages(args, urls, depth=crawl_depth, force_refresh=force_refresh)
+        if not crawled:
+            print(f"No event links found in {urls}")
+            return False
+        print(f"Found {len(crawled)} event pages.")
+        listing_of = {url: listing_url for url, _, _, listing_url in crawled}
+        url_origins = {url: [url] for url, _, _, _ in crawled}
+        urls = [url for url, _, _, _ in crawled]
+        page_apis = [page for _, page, _, _ in crawled]
+        posts = [post for _, _, post, _ in crawled]
+        api_src = next((page for page in page_apis if page), None)
+    else:
+        api_src, posts = _get_pages_from_urls(args, urls)
 
     if posts:
-        # Instantiate manager if we might need to delete notes
-        manager = None
-        if url_to_notes:
-            try:
-                from note_app import NoteManager
-
-                notes_dir = os.path.expanduser("~/notes")
-                manager = NoteManager(storage_dir=notes_dir)
-            except ImportError:
-                pass
+        # Pages byte-identical to ones whose events were extracted before
+        # are only cleaned: they are neither parsed nor sent to the LLM
+        content_hashes = [html_content_hash(post) for post in posts]
+        unchanged = set()
+        if not force_refresh:
+            for n, content_hash in enumerate(content_hashes):
+                memo = get_memo(content_hash)
+                if memo and memo.get("events"):
+                    unchanged.add(n)
+
+        # Position in posts of the i-th processed item
+        order = list(range(len(posts)))
+        reduced = {}
+        items = posts
+        pending = [n for n in range(len(posts)) if n not in unchanged]
+        if config.REDUCE_WORKERS > 1 and len(pending) > 1:
+            # Pages are parsed in other processes and processed as they are ready
+            order = []
+
+            def reduced_in_completion_order():
+                for n in sorted(unchanged):
+                    order.append(n)
+                    yield posts[n]
+                pages = [(urls[n], posts[n]) for n in pending]
+                for k, text in reduce_pages_in_pool(pages, force_refresh=force_refresh):
+                    n = pending[k]
+                    reduced[n] = text
+                    order.append(n)
+                    yield posts[n]
+
+            items = reduced_in_completion_order()
 
         def metadata_extractor(post, i):
-            title = api_src.getPostTitle(post)
+            i = order[i]
+            page_api = page_apis[i] if page_apis else api_src
+            # Pages served from the web cache have no page object
+            title = page_api.getPostTitle(post) if page_api else html_title(post)
             if not title:
                 title = urls[i]
 
-            # Generate a safe, readable filename from the URL
-            from .utils_web import extract_domain_and_path_from_url
-            import re
+            # Unique per page: the journal, the review queue and the
+            # event map are keyed on it
+            return page_item_id(urls[i]), title, datetime.datetime.now()
+
+        def notes_of(i):
+            note_titles = []
+            for url in url_origins.get(urls[i], [urls[i]]):
+                note_titles.extend(url_to_notes.get(url, []))
+            return list(dict.fromkeys(note_titles))
 
-            processed_url = extract_domain_and_path_from_url(urls[i])
-            # Replace unsafe characters with underscores
-            safe_id = re.sub(r"[^a-zA-Z0-9.-]", "_", processed_url)
+        def listing_notes(listing_urls):
+            note_titles = []
+            for listing_url in listing_urls:
+                for url in listing_origins.get(listing_url, [listing_url]):
+                    note_titles.extend(url_to_notes.get(url, []))
+            return list(dict.fromkeys(note_titles))
 
-            # Truncate to a safe length (e.g., 150 chars) to avoid "File name
-            # too long" errors
-            if len(safe_id) > 150:
-                safe_id = safe_id[:150]
+        # Listings with a cleaned page: their notes are cleaned once, when
+        # all their pages went through the flow
+        cleaned_listings = []
 
-            return safe_id, title, datetime.datetime.now()
+        def delete_notes(note_titles):
+            for note_title in note_titles:
+                print(f"Deleting note: {note_title}")
+                manager.delete_note(note_title)
+
+        def item_cleaner(post, i, post_id):
+            i = order[i]
+            listing_url = listing_of.get(urls[i])
+            if listing_url and listing_url not in cleaned_listings:
+                cleaned_listings.append(listing_url)
+            if manager:
+                delete_notes(notes_of(i))
 
         def content_extractor(post, i, post_date_time, post_title):
-            web_content_reduced = reduce_html(urls[i], post, force_refresh=force_refresh)
+            n = order[i]
+            if n in unchanged:
+                print(f"Unchanged: {urls[n]} was already processed, skipping.")
+                return UNCHANGED
+
+            if n in reduced:
+                web_content_reduced = reduced[n]
+            else:
+                web_content_reduced = reduce_html(urls[n], post, force_refresh=force_refresh)
             if not web_content_reduced:
-                print(f"Could not process {urls[i]}, skipping.")
+                print(f"Could not process {urls[n]}, skipping.")
                 return None
 
             date_message = str(post_date_time).split(" ")[0]
             return (
-                f"Url: {urls[i]}\n"
+                f"Url: {urls[n]}\n"
                 f"Subject: {post_title}\n"
                 f"Message: {web_content_reduced}\n"
                 f"Message date: {date_message}\n"
             )
 
-        def item_cleaner(post, i, post_id):
-            url = urls[i]
-            if url in url_to_notes and manager:
-                for note_title in url_to_notes[url]:
-                    print(f"Deleting note: {note_title}")
-                    manager.delete_note(note_title)
+        def on_event(post, i, post_id, event):
+            n = order[i]
+            remember_events(content_hashes[n], urls[n], event)
+
+        def deferred_cleanup(post, i, post_id):
+            n = order[i]
+            cleanup = {"memo": {"hash": content_hashes[n], "url": urls[n]}}
+            if manager:
+                cleanup["notes"] = notes_of(n)
+                # The notes of a listing go with its first queued page
+                listing_url = listing_of.get(urls[n])
+                if listing_url and listing_url not in cleaned_listings:
+                    cleaned_listings.append(listing_url)
+                    cleanup["notes"] = list(
+                        dict.fromkeys(cleanup["notes"] + listing_notes([listing_url]))
+                    )
+            return cleanup
 
-        return _process_common_flow(
-            args, model, posts, metadata_extractor, content_extractor, item_cleaner
+        result = _process_common_flow(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner,
+            on_event=on_event, deferred_cleanup=deferred_cleanup,
         )
+        if manager and cleaned_listings and _review_queue is None:
+            delete_notes(listing_notes(cleaned_listings))
+        return result
 
     return False  # Default return if something went wrong before the main logic
 
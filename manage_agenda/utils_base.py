@@ -4,7 +4,9 @@ Base utility functions for manage-agenda.
 
 import logging
 import os
+import re
 import sys
+import unicodedata
 from pathlib import Path
 
 from manage_agenda.config import config
@@ -134,6 +136,23 @@ def format_time(seconds):
     return f"{int(h)}h {int(m)}m {s:.2f}s"
 
 
+def format_size(num_bytes):
+    """Formats a number of bytes into a human-readable string."""
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+
+
+def normalize_text(text):
+    """Lowercases text and removes accents, punctuation and extra spaces."""
+    text = unicodedata.normalize("NFKD", str(text or "")).casefold()
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
 #     """selects an option form an iterable element, based on some identifier
 #
 #     we can make an initial selection of elements that contain 'selector'
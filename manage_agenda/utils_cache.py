@@ -0,0 +1,225 @@
+"""
+Disk cache for web content used by manage-agenda.
+
+Entries are stored in hashed, sharded subdirectories
+(``<cache_dir>/ab/cd/abcd...``), compressed with zstd when available (gzip
+otherwise) and written atomically. The total size is kept under a byte budget
+by evicting the least recently used entries.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+from manage_agenda.config import config
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+TMP_PREFIX = ".tmp-"
+
+
+def atomic_write(path, data):
+    """Writes bytes to path using a temporary file and a rename.
+
+    Readers see either the old or the new content, never a partial file,
+    even if several runs write the same entry concurrently.
+
+    Args:
+        path (str): Destination file.
+        data (bytes): Content to write.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=TMP_PREFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def compress(data, method="auto"):
+    """Compresses bytes with the selected method.
+
+    Args:
+        data (bytes): Content to compress.
+        method (str): "auto", "zstd", "gzip" or "none". "auto" uses zstd if
+            the zstandard module is installed and gzip otherwise.
+
+    Returns:
+        bytes: The compressed content.
+    """
+    method = (method or "none").lower()
+    if method == "auto":
+        method = "zstd" if zstandard is not None else "gzip"
+    if method == "zstd":
+        if zstandard is None:
+            logging.warning("zstandard not installed, falling back to gzip")
+            return gzip.compress(data)
+        return zstandard.ZstdCompressor().compress(data)
+    if method == "gzip":
+        return gzip.compress(data)
+    return data
+
+
+def decompress(data):
+    """Decompresses bytes written by compress(), detecting the format."""
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise OSError("Cache entry is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+class WebCache:
+    """Bounded, compressed, sharded key/value cache on disk."""
+
+    def __init__(self, cache_dir=None, max_bytes=None, compression=None):
+        self.cache_dir = str(cache_dir or config.CACHE_DIR)
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.compression = compression or config.CACHE_COMPRESSION
+        # Running estimate of the cache size, so that writes do not need to
+        # walk the whole tree unless the budget may have been exceeded
+        self._size_estimate = None
+        self.lock = threading.Lock()
+
+    def path_for(self, key):
+        """Returns the sharded path of the entry for key."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest[2:4], digest)
+
+    def contains(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def get(self, key):
+        """Returns the cached text for key, or None if missing or unreadable."""
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Could not read cache entry for {key}: {e}")
+            return None
+
+        try:
+            text = decompress(data).decode("utf-8")
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            logging.warning(f"Corrupt cache entry for {key}, discarding: {e}")
+            self.delete(key)
+            return None
+
+        # The modification time is the LRU clock (atime is often disabled)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return text
+
+    def set(self, key, text):
+        """Stores text under key and evicts old entries if over budget."""
+        data = compress(text.encode("utf-8"), self.compression)
+        try:
+            atomic_write(self.path_for(key), data)
+        except OSError as e:
+            logging.error(f"Could not write cache entry for {key}: {e}")
+            return False
+        if self.max_bytes:
+            with self.lock:
+                if self._size_estimate is None:
+                    self._size_estimate = sum(size for _, size, _ in self.entries())
+                else:
+                    self._size_estimate += len(data)
+                if self._size_estimate > self.max_bytes:
+                    self.prune()
+        return True
+
+    def delete(self, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path_for(key))
+
+    def entries(self):
+        """Returns a list of (path, size, mtime) for every cache entry."""
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for shard in os.scandir(self.cache_dir):
+            if not (shard.is_dir() and len(shard.name) == 2):
+                continue
+            for subshard in os.scandir(shard.path):
+                if not subshard.is_dir():
+                    continue
+                for entry in os.scandir(subshard.path):
+                    if entry.name.startswith(TMP_PREFIX) or not entry.is_file():
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Removed by a concurrent run
+                    result.append((entry.path, st.st_size, st.st_mtime))
+        return result
+
+    def stats(self):
+        """Returns a dictionary describing the cache contents."""
+        entries = self.entries()
+        return {
+            "directory": self.cache_dir,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "compression": self.compression,
+            "zstd_available": zstandard is not None,
+        }
+
+    def prune(self, max_bytes=None):
+        """Evicts least recently used entries until the cache fits the budget.
+
+        Args:
+            max_bytes (int, optional): Budget to enforce. Defaults to the
+                cache budget (a cache without budget is never pruned); an
+                explicit 0 removes every entry.
+
+        Returns:
+            tuple: (number of removed entries, freed bytes)
+        """
+        if max_bytes is None and not self.max_bytes:
+            return 0, 0
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed, freed = 0, 0
+        if total <= budget:
+            self._size_estimate = total
+            return removed, freed
+
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not evict cache entry {path}: {e}")
+                continue
+            total -= size
+            removed += 1
+            freed += size
+
+        self._size_estimate = total
+        if removed:
+            logging.info(f"Cache pruned: {removed} entries, {freed} bytes freed")
+        return removed, freed
@@ -0,0 +1,181 @@
+"""
+Helpers for extracting events from long documents.
+
+A long text (a festival programme, an agenda with dozens of sessions) is
+split into overlapping chunks on structural boundaries, each chunk is sent
+to the LLM on its own and the events found are merged, dropping the
+duplicates produced by the overlaps.
+"""
+
+from manage_agenda.config import config
+from manage_agenda.utils_base import normalize_text
+from manage_agenda.utils_web import PROTECTED_MATCHER
+
+# Lines kept at the top/bottom of every chunk (see the content extractors)
+HEADER_PREFIXES = ("Url:", "URL:", "Subject:")
+BODY_PREFIX = "Message:"
+DATE_PREFIX = "Message date:"
+
+# A chunk may end early, within this last fraction of its size, to start
+# the next one at a date or time line (usually the heading of a session)
+BOUNDARY_WINDOW = 0.25
+
+
+def _split_sections(content_text):
+    """Splits a content text into (header, body, trailer)."""
+    lines = content_text.splitlines()
+    header, trailer = [], []
+    while lines and lines[0].startswith(HEADER_PREFIXES):
+        header.append(lines.pop(0))
+    if lines and lines[0].startswith(BODY_PREFIX):
+        header.append(BODY_PREFIX)
+        lines[0] = lines[0][len(BODY_PREFIX):].lstrip()
+    while lines and (not lines[-1].strip() or lines[-1].startswith(DATE_PREFIX)):
+        line = lines.pop()
+        if line.strip():
+            trailer.insert(0, line)
+    return "\n".join(header), lines, "\n".join(trailer)
+
+
+def _blocks(lines, max_chars):
+    """Groups lines into paragraphs, splitting the ones longer than max_chars."""
+    blocks, current = [], []
+    for line in lines + [""]:
+        if line.strip():
+            current.append(line)
+            continue
+        if current:
+            blocks.append(current)
+            current = []
+
+    result = []
+    for block in blocks:
+        if len("\n".join(block)) <= max_chars:
+            result.append("\n".join(block))
+            continue
+        for line in block:
+            while len(line) > max_chars:
+                cut = line.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                result.append(line[:cut])
+                line = line[cut:].lstrip()
+            if line:
+                result.append(line)
+    return result
+
+
+def _starts_section(block):
+    first_line = block.split("\n", 1)[0][:200]
+    return bool(PROTECTED_MATCHER.scan(first_line) & {"date", "time"})
+
+
+def split_into_chunks(content_text, max_chars=None, overlap=None):
+    """
+    Splits a content text into overlapping chunks for separate extraction.
+
+    The text is cut between paragraphs (or lines), preferably before a line
+    with a date or time. Each chunk starts with the last overlap characters
+    of the previous one, and keeps the Url/Subject header and the Message
+    date trailer so that relative dates can still be resolved.
+
+    Args:
+        content_text: Text built by a content extractor
+        max_chars: Maximum size of the body of a chunk (config.CHUNK_MAX_CHARS)
+        overlap: Characters repeated between chunks (config.CHUNK_OVERLAP)
+
+    Returns:
+        list: The chunks (a single one when the text is short enough)
+    """
+    max_chars = max_chars or config.CHUNK_MAX_CHARS
+    overlap = config.CHUNK_OVERLAP if overlap is None else overlap
+    if len(content_text) <= max_chars:
+        return [content_text]
+
+    header, lines, trailer = _split_sections(content_text)
+    blocks = _blocks(lines, max(max_chars - overlap, 1))
+
+    bodies, current, size = [], [], 0
+    for block in blocks:
+        if current and size + len(block) + 1 > max_chars:
+            # Prefer starting the next chunk at a dated heading, as long as
+            # the blocks moved to it still fit with the overlap
+            window = min(max_chars * BOUNDARY_WINDOW, max_chars - overlap - len(block) - 1)
+            cut = len(current)
+            kept = 0
+            for j in range(len(current) - 1, 0, -1):
+                kept += len(current[j]) + 1
+                if kept > window:
+                    break
+                if _starts_section(current[j]):
+                    cut = j
+                    break
+            bodies.append(current[:cut])
+
+            # Repeat the end of the chunk at the beginning of the next one
+            tail, tail_size = [], 0
+            for previous in reversed(current[:cut]):
+                if tail_size + len(previous) > overlap:
+                    break
+                tail.insert(0, previous)
+                tail_size += len(previous) + 1
+            current = tail + current[cut:]
+            size = sum(len(b) + 1 for b in current)
+        current.append(block)
+        size += len(block) + 1
+    if current:
+        bodies.append(current)
+
+    chunks = []
+    for body in bodies:
+        parts = [header, "\n\n".join(body), trailer]
+        chunks.append("\n".join(part for part in parts if part))
+    return chunks
+
+
+def _start(event):
+    start = event.get("start") or ""
+    if isinstance(start, dict):
+        start = start.get("dateTime") or start.get("date") or ""
+    # Ignore seconds and timezone notation differences
+    return str(start)[:16]
+
+
+def _fill_missing(event, other):
+    for key, value in other.items():
+        if isinstance(value, dict) and isinstance(event.get(key), dict):
+            _fill_missing(event[key], value)
+        elif value and not event.get(key):
+            event[key] = value
+
+
+def merge_events(event_lists):
+    """
+    Merges the events extracted from several chunks, in order.
+
+    Events with the same normalized summary and start time are the same
+    event, unless both have a venue and the venues differ. Empty fields of
+    an event are filled from its duplicates.
+
+    Args:
+        event_lists: Iterable of lists of event dictionaries
+
+    Returns:
+        list: The unique events
+    """
+    merged = []
+    by_key = {}
+    for events in event_lists:
+        for event in events or []:
+            if not isinstance(event, dict):
+                continue
+            key = (normalize_text(event.get("summary")), _start(event))
+            location = normalize_text(event.get("location"))
+            for candidate in by_key.get(key, []):
+                other_location = normalize_text(candidate.get("location"))
+                if not location or not other_location or location == other_location:
+                    _fill_missing(candidate, event)
+                    break
+            else:
+                by_key.setdefault(key, []).append(event)
+                merged.append(event)
+    return merged
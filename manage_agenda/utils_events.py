@@ -0,0 +1,113 @@
+"""
+Mapping from sources (web pages, messages, feed entries) to the calendar
+events created from them.
+
+When a source is processed again (its page changed, or the same message is
+seen twice) the events extracted are matched against the ones already in
+the calendar, so they can be patched with the changed fields instead of
+being inserted again.
+"""
+
+import datetime
+import json
+import logging
+import threading
+
+from manage_agenda.config import config
+from manage_agenda.utils_base import normalize_text
+from manage_agenda.utils_cache import atomic_write
+
+# Fields compared and patched; the description is not, as it holds the
+# (partial) source text and the processing metadata
+TRACKED_FIELDS = ("summary", "location", "start", "end")
+
+
+def _snapshot(event):
+    return {field: event[field] for field in TRACKED_FIELDS if event.get(field)}
+
+
+def event_changes(old, new):
+    """Returns the tracked fields of new that differ from old.
+
+    Empty values in new (a partial extraction from a changed fragment) are
+    not considered changes.
+    """
+    changes = {}
+    for field in TRACKED_FIELDS:
+        value = new.get(field)
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if v}
+            if not value.get("dateTime") and not value.get("date"):
+                continue
+            merged = {**(old.get(field) or {}), **value}
+            if merged != (old.get(field) or {}):
+                changes[field] = merged
+        elif value and value != old.get(field):
+            changes[field] = value
+    return changes
+
+
+def created_event_id(result):
+    """Returns the id of the event created by publishPost, if available."""
+    if isinstance(result, dict):
+        return result.get("id")
+    return None
+
+
+class EventMap:
+    """Persistent source -> calendar events mapping, safe to update from
+    several threads."""
+
+    def __init__(self, path=None):
+        self.path = str(path or config.EVENT_MAP_FILE)
+        self.lock = threading.Lock()
+        self.sources = {}
+        try:
+            with open(self.path) as f:
+                self.sources = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read event map {self.path}: {e}")
+
+    def save(self):
+        try:
+            atomic_write(self.path, json.dumps(self.sources, indent=1).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write event map {self.path}: {e}")
+
+    def events_for(self, source):
+        return self.sources.get(str(source), [])
+
+    def find(self, source, event):
+        """Returns the mapped event that event is a new version of, if any.
+
+        Events match by normalized summary. An extraction without summary
+        matches the only event of a source that produced a single one.
+        """
+        mapped = self.events_for(source)
+        summary = normalize_text(event.get("summary"))
+        if not summary:
+            return mapped[0] if len(mapped) == 1 else None
+        for entry in mapped:
+            if normalize_text(entry["event"].get("summary")) == summary:
+                return entry
+        return None
+
+    def add(self, source, calendar, event_id, event):
+        with self.lock:
+            self.sources.setdefault(str(source), []).append(
+                {
+                    "id": event_id,
+                    "calendar": calendar,
+                    "event": _snapshot(event),
+                    "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+                }
+            )
+            self.save()
+
+    def update(self, entry, changes):
+        with self.lock:
+            entry["event"].update(changes)
+            entry["updated"] = datetime.datetime.now().isoformat(timespec="seconds")
+            self.save()
@@ -0,0 +1,270 @@
+"""
+Feed sources (RSS, Atom and iCalendar) for manage-agenda.
+
+Each feed keeps a cursor (ETag, Last-Modified and the GUIDs already seen) so
+that polling a feed that did not change costs a single conditional request,
+and only entries that were not seen before are processed.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import re
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from manage_agenda.config import config
+from manage_agenda.utils_cache import atomic_write
+
+FEED_TIMEOUT = 30
+FEED_USER_AGENT = "manage-agenda feed reader"
+# GUIDs remembered per feed (feeds only show their latest entries)
+SEEN_MAX = 1000
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+ICAL_DATE_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})(Z)?)?$")
+
+
+@dataclass
+class FeedEntry:
+    """A new entry of a feed, ready to be processed."""
+
+    feed_url: str
+    guid: str
+    title: str
+    link: str
+    published: object  # str or datetime.datetime
+    text: str
+
+    @property
+    def post_id(self):
+        """Safe identifier used for the saved text of the entry."""
+        host = re.sub(r"[^a-zA-Z0-9.-]", "_", urlparse(self.feed_url).netloc)
+        digest = hashlib.sha1(self.guid.encode("utf-8")).hexdigest()[:12]
+        return f"feed_{host}_{digest}"
+
+
+def read_feed_list(path=None):
+    """Returns the feed URLs listed, one per line, in the feeds file."""
+    path = path or config.FEEDS_FILE
+    try:
+        with open(path) as f:
+            lines = [line.strip() for line in f]
+    except FileNotFoundError:
+        return []
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+class FeedState:
+    """Persistent per-feed cursors."""
+
+    def __init__(self, path=None):
+        self.path = str(path or config.FEEDS_STATE_FILE)
+        self.feeds = {}
+        try:
+            with open(self.path) as f:
+                self.feeds = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read feed state {self.path}: {e}")
+
+    def get(self, url):
+        return self.feeds.get(url, {})
+
+    def is_seen(self, url, guid):
+        return guid in self.get(url).get("seen", [])
+
+    def update(self, url, etag=None, last_modified=None, guids=()):
+        """Advances the cursor of a feed.
+
+        Args:
+            url: The feed URL
+            etag: ETag of the last response, if any
+            last_modified: Last-Modified of the last response, if any
+            guids: GUIDs of the entries that have been processed
+        """
+        feed = self.feeds.setdefault(url, {})
+        if etag:
+            feed["etag"] = etag
+        if last_modified:
+            feed["last_modified"] = last_modified
+        seen = feed.get("seen", [])
+        new = [guid for guid in guids if guid not in seen]
+        if new:
+            feed["last_guid"] = new[0]
+        feed["seen"] = (new + seen)[:SEEN_MAX]
+        feed["checked"] = datetime.datetime.now().isoformat(timespec="seconds")
+
+    def save(self):
+        try:
+            atomic_write(self.path, json.dumps(self.feeds, indent=1).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write feed state {self.path}: {e}")
+
+
+def fetch_feed(url, etag=None, last_modified=None, timeout=FEED_TIMEOUT):
+    """Downloads a feed with a conditional request.
+
+    Returns:
+        tuple: (body, etag, last_modified). body is None when the feed did
+        not change (HTTP 304).
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": FEED_USER_AGENT})
+    if etag:
+        request.add_header("If-None-Match", etag)
+    if last_modified:
+        request.add_header("If-Modified-Since", last_modified)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            return body, response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag, last_modified
+        raise
+
+
+def _html_to_text(html):
+    if not html:
+        return ""
+    return BeautifulSoup(html, "html.parser").get_text(separator="\n", strip=True)
+
+
+def _child_text(element, *names):
+    for name in names:
+        child = element.find(name)
+        if child is not None and (child.text or "").strip():
+            return child.text.strip()
+    return ""
+
+
+def _parse_rss(url, root):
+    entries = []
+    for item in root.iter("item"):
+        title = _child_text(item, "title")
+        link = _child_text(item, "link")
+        guid = _child_text(item, "guid") or link or title
+        published = _child_text(item, "pubDate")
+        body = _html_to_text(_child_text(item, f"{CONTENT_NS}encoded", "description"))
+        entries.append(FeedEntry(url, guid, title, link, published, body))
+    return entries
+
+
+def _parse_atom(url, root):
+    entries = []
+    for entry in root.iter(f"{ATOM_NS}entry"):
+        title = _child_text(entry, f"{ATOM_NS}title")
+        link = ""
+        for element in entry.findall(f"{ATOM_NS}link"):
+            if element.get("rel", "alternate") == "alternate":
+                link = element.get("href", "")
+                break
+        guid = _child_text(entry, f"{ATOM_NS}id") or link or title
+        published = _child_text(entry, f"{ATOM_NS}published", f"{ATOM_NS}updated")
+        body = _html_to_text(_child_text(entry, f"{ATOM_NS}content", f"{ATOM_NS}summary"))
+        entries.append(FeedEntry(url, guid, title, link, published, body))
+    return entries
+
+
+def _ical_datetime(value):
+    match = ICAL_DATE_RE.match(value.strip())
+    if not match:
+        return None
+    parts = [int(p) for p in match.groups()[:6] if p]
+    return datetime.datetime(*parts, tzinfo=datetime.timezone.utc if match.group(7) else None)
+
+
+def _parse_ical(url, text):
+    # Long lines are folded: continuation lines start with a space or tab
+    text = re.sub(r"\r?\n[ \t]", "", text)
+    entries = []
+    for block in re.findall(r"BEGIN:VEVENT\r?\n(.*?)END:VEVENT", text, re.DOTALL):
+        fields = {}
+        for line in block.splitlines():
+            name, sep, value = line.partition(":")
+            if sep:
+                fields.setdefault(name.split(";")[0].upper(), value.strip())
+        title = fields.get("SUMMARY", "")
+        link = fields.get("URL", "")
+        guid = fields.get("UID") or f"{title}@{fields.get('DTSTART', '')}"
+        published = _ical_datetime(fields.get("LAST-MODIFIED") or fields.get("DTSTAMP") or "")
+        entries.append(
+            FeedEntry(url, guid, title, link, published, f"BEGIN:VEVENT\n{block.strip()}\nEND:VEVENT")
+        )
+    return entries
+
+
+def parse_feed(url, body):
+    """Parses an RSS, Atom or iCalendar document into FeedEntry objects."""
+    if isinstance(body, bytes):
+        if b"BEGIN:VCALENDAR" in body[:1024]:
+            return _parse_ical(url, body.decode("utf-8", errors="replace"))
+    elif "BEGIN:VCALENDAR" in body[:1024]:
+        return _parse_ical(url, body)
+
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        logging.warning(f"Could not parse feed {url}: {e}")
+        return []
+    if root.tag == f"{ATOM_NS}feed":
+        return _parse_atom(url, root)
+    return _parse_rss(url, root)
+
+
+def poll_feeds(urls, state, workers=None):
+    """Polls feeds and returns their entries that were not seen before.
+
+    Feeds are fetched concurrently with conditional requests; unchanged
+    feeds are not downloaded again. The cursors in state are not advanced:
+    call commit_feeds() once the entries have been processed.
+
+    Returns:
+        tuple: (list of new FeedEntry, dict of url to (etag, last_modified))
+    """
+
+    def poll(url):
+        cursor = state.get(url)
+        try:
+            body, etag, last_modified = fetch_feed(
+                url, cursor.get("etag"), cursor.get("last_modified")
+            )
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not fetch feed {url}: {e}")
+            return url, [], None
+        if body is None:
+            logging.info(f"Feed not modified: {url}")
+            return url, [], (etag, last_modified)
+        entries = [e for e in parse_feed(url, body) if not state.is_seen(url, e.guid)]
+        return url, entries, (etag, last_modified)
+
+    new_entries = []
+    validators = {}
+    with ThreadPoolExecutor(max_workers=workers or config.CRAWL_WORKERS) as executor:
+        for url, entries, validator in executor.map(poll, urls):
+            new_entries.extend(entries)
+            if validator:
+                validators[url] = validator
+    return new_entries, validators
+
+
+def commit_feeds(state, validators, entries):
+    """Advances the cursors of the polled feeds and saves them."""
+    for url, (etag, last_modified) in validators.items():
+        guids = [entry.guid for entry in entries if entry.feed_url == url]
+        state.update(url, etag=etag, last_modified=last_modified, guids=guids)
+    state.save()
+
+
+def entry_datetime(entry):
+    """Returns the publication date of an entry, or now if unknown."""
+    return entry.published or datetime.datetime.now()
@@ -0,0 +1,103 @@
+"""
+Journal of the items of a batch run, to resume it after a crash.
+
+Each step reached by an item (events extracted by the LLM, events
+published, item finished) is appended as a JSON line and flushed to disk
+before the run goes on. A run interrupted halfway (a network drop,
+Ctrl-C) can then be resumed: finished items are skipped, published ones
+are only cleaned, and extracted ones are published from the journal
+without calling the LLM again.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from manage_agenda.config import config
+
+EXTRACTED = "extracted"
+PUBLISHED = "published"
+DONE = "done"
+
+# Order of the stages: an item is at the last one recorded
+_STAGES = (EXTRACTED, PUBLISHED, DONE)
+
+
+class RunJournal:
+    """
+    Append-only log of the stage reached by each item of a run.
+
+    Without resume, the journal of a previous run is replaced when the
+    first item is recorded.
+    """
+
+    def __init__(self, path=None, resume=False):
+        self.path = str(path or config.RUN_JOURNAL_FILE)
+        self.lock = threading.Lock()
+        self.items = {}
+        self.append = resume
+        if resume:
+            self.load()
+
+    def load(self):
+        """Replays the journal left by an interrupted run."""
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.warning(f"Could not read run journal {self.path}: {e}")
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut by the crash
+                continue
+            self.items[entry["item"]] = entry
+        logging.info(f"Resuming run: {len(self.items)} items in the journal")
+
+    def clear(self):
+        """Removes the journal (the run completed)."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not remove run journal {self.path}: {e}")
+
+    def stage(self, item):
+        entry = self.items.get(str(item))
+        return entry["stage"] if entry else None
+
+    def reached(self, item, stage):
+        """True if the item got to stage (or a later one)."""
+        current = self.stage(item)
+        return current is not None and _STAGES.index(current) >= _STAGES.index(stage)
+
+    def events(self, item):
+        """The events recorded for the item, or None."""
+        entry = self.items.get(str(item))
+        return entry.get("events") if entry else None
+
+    def record(self, item, stage, events=None):
+        """Appends the stage reached by item, on disk before returning."""
+        entry = {"item": str(item), "stage": stage}
+        if events is None:
+            events = self.events(item)
+        if events is not None:
+            entry["events"] = events
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            self.items[entry["item"]] = json.loads(line)
+            mode = "a" if self.append else "w"
+            self.append = True
+            try:
+                with open(self.path, mode) as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logging.error(f"Could not write run journal {self.path}: {e}")
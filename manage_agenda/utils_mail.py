@@ -0,0 +1,702 @@
+"""
+Bulk retrieval and incremental sync of the messages of a mail folder.
+
+Reading the bodies one by one (getPostBody) costs a round trip per message.
+Here the whole folder is hydrated at once: Gmail messages are requested in
+batches of EMAIL_BATCH_SIZE (one HTTP request per batch) and IMAP messages
+with a single UID FETCH over the set of UIDs of the folder.
+
+Each account keeps a sync cursor (Gmail historyId, IMAP UIDVALIDITY and
+UIDNEXT) so that only the messages added since the last run are processed,
+even when the label could not be removed from the processed ones.
+
+Messages older than MAX_POST_AGE_DAYS are left out with a query to the
+server, so that they are never downloaded.
+
+Bodies are normalized before extraction (HTML, quoted replies, signatures
+and footers removed) to keep the prompts short.
+
+Processed messages are queued (and the queue persisted) and removed from
+the folder at the end of the run in a single bulk operation.
+"""
+
+import base64
+import datetime
+import email
+import email.policy
+import json
+import logging
+import re
+
+import googleapiclient.errors
+from bs4 import BeautifulSoup
+
+from manage_agenda.config import config
+from manage_agenda.utils_cache import atomic_write
+from manage_agenda.utils_web import KeywordMatcher
+
+UID_RE = re.compile(rb"UID (\d+)")
+
+HTML_RE = re.compile(r"<(?:html|body|div|p|br|table|span|a)\b", re.IGNORECASE)
+HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+INVISIBLE_RE = re.compile("[\u200b\u200c\u200d\u200e\u2060\ufeff\u00ad\u034f]")
+DATA_URI_RE = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=]+")
+BASE64_LINE_RE = re.compile(r"^[A-Za-z0-9+/]{60,}={0,2}$")
+REPLY_HEADER_RE = re.compile(
+    r"^(?:On|El)\s(?:.|\n(?!\n)){0,300}?(?:wrote|escribió):[ \t]*$"
+    r"|^-{2,}\s*(?:Original Message|Mensaje original)\s*-{2,}[ \t]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+SIGNATURE_SEPARATORS = ("-- ", "--")
+
+UNSUBSCRIBE_MATCHER = KeywordMatcher(
+    [
+        "unsubscribe",
+        "darse de baja",
+        "darte de baja",
+        "dar de baja",
+        "cancelar la suscripción",
+        "cancelar suscripción",
+        "dejar de recibir",
+        "manage your preferences",
+        "gestionar tus preferencias",
+        "view this email in your browser",
+        "ver en el navegador",
+        "ver este correo en",
+    ]
+)
+FOOTER_MATCHER = KeywordMatcher(
+    [
+        "this e-mail and any attachments",
+        "this email and any attachments",
+        "this message is confidential",
+        "intended solely for",
+        "intended only for",
+        "aviso legal",
+        "aviso de confidencialidad",
+        "este mensaje y sus archivos adjuntos",
+        "este correo electrónico y, en su caso",
+        "información confidencial",
+        "protección de datos",
+        "reglamento general de protección de datos",
+        "please consider the environment",
+        "antes de imprimir",
+    ]
+)
+
+# Longer blocks are not boilerplate: only their matching lines are dropped
+BOILERPLATE_MAX_CHARS = 600
+# Shorter replies ("FYI", "Mira esto") keep the quoted message, their content
+MIN_REPLY_CHARS = 200
+SIGNATURE_MAX_LINES = 15
+
+
+def _html_text(html):
+    return BeautifulSoup(html, "html.parser").get_text("\n", strip=True)
+
+
+def html_to_text(html):
+    """Converts an HTML body to text, without images, hidden preheaders and
+    unsubscribe blocks."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "head", "noscript", "img"]):
+        tag.decompose()
+    for tag in soup.find_all(style=HIDDEN_STYLE_RE):
+        tag.decompose()
+    for link in soup.find_all("a"):
+        if link.decomposed or not UNSUBSCRIBE_MATCHER.search(
+            f"{link.get_text(' ')} {link.get('href', '')}"
+        ):
+            continue
+        block = link.find_parent(["p", "li", "td", "div"])
+        if block is not None and len(block.get_text()) <= BOILERPLATE_MAX_CHARS:
+            block.decompose()
+        else:
+            link.decompose()
+    return soup.get_text("\n", strip=True)
+
+
+def _strip_quoted(text):
+    match = REPLY_HEADER_RE.search(text)
+    reply = text[: match.start()] if match else text
+    reply = "\n".join(line for line in reply.splitlines() if not line.startswith(">"))
+    if len(reply.strip()) >= MIN_REPLY_CHARS or reply.strip() == text.strip():
+        return reply
+    # The message is in the quoted history
+    return "\n".join(re.sub(r"^(?:>[ \t]?)+", "", line) for line in text.splitlines())
+
+
+def _strip_signature(lines):
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i] in SIGNATURE_SEPARATORS:
+            if len(lines) - i <= SIGNATURE_MAX_LINES:
+                return lines[:i]
+            break
+    return lines
+
+
+def _is_boilerplate(text):
+    return UNSUBSCRIBE_MATCHER.search(text) or FOOTER_MATCHER.search(text)
+
+
+def _drop_boilerplate(lines):
+    paragraphs, current = [], []
+    for line in lines + [""]:
+        if line:
+            current.append(line)
+        elif current:
+            paragraphs.append(current)
+            current = []
+
+    kept = []
+    for paragraph in paragraphs:
+        if len("\n".join(paragraph)) <= BOILERPLATE_MAX_CHARS:
+            if not _is_boilerplate("\n".join(paragraph)):
+                kept.append(paragraph)
+            continue
+        paragraph = [
+            line
+            for line in paragraph
+            if len(line) > BOILERPLATE_MAX_CHARS or not _is_boilerplate(line)
+        ]
+        if paragraph:
+            kept.append(paragraph)
+    return "\n\n".join("\n".join(paragraph) for paragraph in kept)
+
+
+def normalize_email_body(body):
+    """
+    Reduces an email body to the text worth sending to the LLM.
+
+    HTML is converted to text; quoted reply history, the signature,
+    inline base64 data, unsubscribe and legal footer blocks are removed,
+    and whitespace is collapsed. Forwarded messages are kept.
+
+    Args:
+        body: Body of the message (text or HTML, str or bytes)
+
+    Returns:
+        str: The normalized text
+    """
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    text = body or ""
+    if HTML_RE.search(text):
+        text = html_to_text(text)
+    text = INVISIBLE_RE.sub("", text).replace("\u00a0", " ").replace("\r", "")
+    text = DATA_URI_RE.sub("", text)
+    text = _strip_quoted(text)
+
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if not BASE64_LINE_RE.match(line)]
+    lines = _strip_signature(lines)
+    return _drop_boilerplate(lines)
+
+
+def _gmail_parts(payload):
+    yield payload
+    for part in payload.get("parts") or []:
+        yield from _gmail_parts(part)
+
+
+def gmail_message_text(message):
+    """Returns the text of a Gmail API message (format=full).
+
+    The text/plain part is preferred; the text of the text/html part is
+    used otherwise.
+    """
+    texts = {}
+    for part in _gmail_parts(message.get("payload") or {}):
+        mime_type = part.get("mimeType", "")
+        data = (part.get("body") or {}).get("data")
+        if data and mime_type in ("text/plain", "text/html") and mime_type not in texts:
+            raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+            texts[mime_type] = raw.decode("utf-8", errors="replace")
+    if "text/plain" in texts:
+        return texts["text/plain"]
+    if "text/html" in texts:
+        return _html_text(texts["text/html"])
+    return message.get("snippet", "")
+
+
+def imap_message_text(raw):
+    """Returns the text of a raw RFC 822 message, preferring text/plain."""
+    message = email.message_from_bytes(raw, policy=email.policy.default)
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is None:
+        return ""
+    try:
+        text = body.get_content()
+    except (LookupError, UnicodeError):
+        text = (body.get_payload(decode=True) or b"").decode("utf-8", errors="replace")
+    if body.get_content_type() == "text/html":
+        text = _html_text(text)
+    return text
+
+
+def gmail_batch_get(client, message_ids, batch_size=None):
+    """
+    Gets Gmail messages (format=full) using batch requests.
+
+    Args:
+        client: Gmail API service
+        message_ids: Ids of the messages
+        batch_size: Messages per batch request (config.EMAIL_BATCH_SIZE)
+
+    Returns:
+        dict: Message id -> message; messages that failed are missing
+    """
+    batch_size = max(1, min(batch_size or config.EMAIL_BATCH_SIZE, 100))
+    message_ids = list(dict.fromkeys(message_ids))
+    messages = {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            logging.warning(f"Could not get message {request_id}: {exception}")
+        else:
+            messages[request_id] = response
+
+    for start in range(0, len(message_ids), batch_size):
+        batch = client.new_batch_http_request(callback=callback)
+        for message_id in message_ids[start : start + batch_size]:
+            request = client.users().messages().get(userId="me", id=message_id, format="full")
+            batch.add(request, request_id=message_id)
+        batch.execute()
+    return messages
+
+
+def uid_set(uids):
+    """Returns the compact IMAP sequence set for uids (e.g. "3:5,9")."""
+    ranges = []
+    for uid in sorted({int(uid) for uid in uids}):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+
+
+def imap_uid_fetch(client, uids):
+    """
+    Gets the raw messages with the given UIDs with a single UID FETCH.
+
+    BODY.PEEK is used so that the messages are not marked as seen.
+
+    Returns:
+        dict: UID (int) -> raw message bytes
+    """
+    if not uids:
+        return {}
+    typ, data = client.uid("FETCH", uid_set(uids), "(UID BODY.PEEK[])")
+    if typ != "OK":
+        raise OSError(f"UID FETCH failed: {typ} {data}")
+
+    messages = {}
+    pending = None
+    for item in data or []:
+        if isinstance(item, tuple):
+            meta, raw = item
+            match = UID_RE.search(meta)
+            if match:
+                messages[int(match.group(1))] = raw
+                pending = None
+            else:
+                pending = raw
+        elif isinstance(item, bytes) and pending is not None:
+            # Some servers send the UID after the message literal
+            match = UID_RE.search(item)
+            if match:
+                messages[int(match.group(1))] = pending
+            pending = None
+    return messages
+
+
+def _imap_folder(client, folder):
+    """Selects folder, returning its UIDVALIDITY and the UIDs of its messages."""
+    client.select(folder)
+    _, validity = client.response("UIDVALIDITY")
+    typ, data = client.uid("SEARCH", None, "ALL")
+    if typ != "OK":
+        raise OSError(f"UID SEARCH failed: {typ} {data}")
+    uidvalidity = int(validity[0]) if validity and validity[0] else None
+    return uidvalidity, [int(uid) for uid in (data[0] or b"").split()]
+
+
+def _imap_bodies(client, folder, count, positions):
+    _, uids = _imap_folder(client, folder)
+    if len(uids) != count:
+        # Positions would not match the listed messages
+        logging.warning(f"Folder {folder} has {len(uids)} messages, {count} were listed")
+        return {}
+    raw = imap_uid_fetch(client, [uids[i] for i in positions])
+    return {i: imap_message_text(raw[uids[i]]) for i in positions if uids[i] in raw}
+
+
+def _gmail_id(api_src, post):
+    return post.get("id") if isinstance(post, dict) else api_src.getPostId(post)
+
+
+def _gmail_bodies(api_src, posts, positions, batch_size):
+    ids = {i: _gmail_id(api_src, posts[i]) for i in positions}
+    messages = gmail_batch_get(api_src.getClient(), [i for i in ids.values() if i], batch_size)
+    return {i: gmail_message_text(messages[mid]) for i, mid in ids.items() if mid in messages}
+
+
+def fetch_email_bodies(api_src, posts, positions=None, batch_size=None):
+    """
+    Gets the text of the posts of a mail folder in bulk.
+
+    Args:
+        api_src: Gmail or IMAP source, with the folder selected as channel
+        posts: Messages listed in the folder
+        positions: Positions in posts of the messages to get (default: all)
+        batch_size: Messages per Gmail batch request
+
+    Returns:
+        dict: Position in posts -> text. Messages that could not be
+        retrieved are missing (their bodies can be read one by one).
+    """
+    if not posts:
+        return {}
+    positions = range(len(posts)) if positions is None else positions
+    try:
+        if "imap" in api_src.service.lower():
+            return _imap_bodies(api_src.getClient(), api_src.getChannel(), len(posts), positions)
+        return _gmail_bodies(api_src, posts, positions, batch_size)
+    except Exception as e:
+        logging.warning(f"Could not retrieve the messages in bulk: {e}")
+        return {}
+
+
+class MailSyncState:
+    """Persistent per-account mailbox cursors."""
+
+    def __init__(self, path=None):
+        self.path = str(path or config.MAIL_SYNC_FILE)
+        self.accounts = {}
+        try:
+            with open(self.path) as f:
+                self.accounts = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read mail sync state {self.path}: {e}")
+
+    def get(self, account):
+        return self.accounts.get(str(account), {})
+
+    def update(self, account, cursor):
+        self.accounts[str(account)] = {
+            **cursor,
+            "synced": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def save(self):
+        try:
+            atomic_write(self.path, json.dumps(self.accounts, indent=1).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write mail sync state {self.path}: {e}")
+
+
+def gmail_added_since(client, history_id, label_id):
+    """
+    Gets the ids of the messages added to a label since history_id.
+
+    Returns:
+        tuple: (set of message ids, current history id of the mailbox)
+
+    Raises:
+        googleapiclient.errors.HttpError: 404 when history_id is too old
+    """
+    added = set()
+    current = None
+    page_token = None
+    while True:
+        response = (
+            client.users()
+            .history()
+            .list(
+                userId="me",
+                startHistoryId=history_id,
+                labelId=label_id,
+                historyTypes=["messageAdded", "labelAdded"],
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        current = current or response.get("historyId")
+        for record in response.get("history", []):
+            for item in record.get("messagesAdded", []):
+                if label_id in item.get("message", {}).get("labelIds", []):
+                    added.add(item["message"]["id"])
+            for item in record.get("labelsAdded", []):
+                if label_id in item.get("labelIds", []):
+                    added.add(item["message"]["id"])
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return added, current
+
+
+def _imap_delta(api_src, posts, cursor):
+    uidvalidity, uids = _imap_folder(api_src.getClient(), api_src.getChannel())
+    uidnext = max(uids, default=0) + 1
+    if cursor.get("uidvalidity") == uidvalidity:
+        # UIDs never go back, even if the last messages were removed
+        uidnext = max(uidnext, cursor.get("uidnext", 0))
+    new_cursor = {"uidvalidity": uidvalidity, "uidnext": uidnext}
+
+    if len(uids) != len(posts):
+        logging.warning("The folder changed while it was read, processing all of it")
+        return None, None
+    if not cursor or cursor.get("uidvalidity") != uidvalidity:
+        logging.info(f"Full resync of {api_src.getChannel()} (UIDVALIDITY {uidvalidity})")
+        return None, new_cursor
+    return [i for i, uid in enumerate(uids) if uid >= cursor["uidnext"]], new_cursor
+
+
+def _gmail_delta(api_src, posts, cursor):
+    client = api_src.getClient()
+    if not cursor.get("history_id"):
+        profile = client.users().getProfile(userId="me").execute()
+        return None, {"history_id": profile["historyId"]}
+
+    labels = api_src.getLabels(api_src.getChannel())
+    label_id = labels[0]["id"]
+    try:
+        added, history_id = gmail_added_since(client, cursor["history_id"], label_id)
+    except googleapiclient.errors.HttpError as e:
+        if getattr(e.resp, "status", None) != 404:
+            raise
+        # The history is kept for about a week: full resync, starting the
+        # cursor again from now
+        logging.info(f"Gmail history {cursor['history_id']} expired, full resync")
+        profile = client.users().getProfile(userId="me").execute()
+        return None, {"history_id": profile["historyId"]}
+    ids = [_gmail_id(api_src, post) for post in posts]
+    if added - set(ids):
+        # Messages that arrived after the folder was listed: keep the
+        # cursor so that they are seen in the next run
+        return [i for i, mid in enumerate(ids) if mid in added], cursor
+    return [i for i, mid in enumerate(ids) if mid in added], {"history_id": history_id}
+
+
+def mailbox_delta(api_src, posts, cursor):
+    """
+    Finds the messages added to a mail folder since the last sync.
+
+    Args:
+        api_src: Gmail or IMAP source, with the folder selected as channel
+        posts: Messages listed in the folder
+        cursor: Cursor saved after the last run (empty for a full resync)
+
+    Returns:
+        tuple: (positions, new_cursor). positions are the positions in
+        posts of the new messages, or None when the whole folder has to be
+        processed (first run, expired history, changed UIDVALIDITY, errors).
+        new_cursor is to be saved once the messages are processed; None
+        when it could not be determined.
+    """
+    try:
+        if "imap" in api_src.service.lower():
+            return _imap_delta(api_src, posts, cursor)
+        return _gmail_delta(api_src, posts, cursor)
+    except Exception as e:
+        logging.warning(f"Could not sync the mailbox incrementally, full resync: {e}")
+        return None, None
+
+
+# IMAP dates use English month names, whatever the locale
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def imap_date(day):
+    """Returns day in the format of IMAP SEARCH (e.g. "7-Oct-2025")."""
+    return f"{day.day}-{MONTHS[day.month - 1]}-{day.year}"
+
+
+def gmail_recent_ids(client, label_id, days):
+    """Gets the ids of the messages of a label received in the last days."""
+    ids = set()
+    page_token = None
+    while True:
+        response = (
+            client.users()
+            .messages()
+            .list(
+                userId="me",
+                labelIds=[label_id],
+                q=f"newer_than:{days}d",
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        ids.update(message["id"] for message in response.get("messages", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return ids
+
+
+def _imap_recent(api_src, posts, days):
+    client = api_src.getClient()
+    _, uids = _imap_folder(client, api_src.getChannel())
+    if len(uids) != len(posts):
+        return None
+    since = datetime.date.today() - datetime.timedelta(days=days)
+    typ, data = client.uid("SEARCH", None, "SINCE", imap_date(since))
+    if typ != "OK":
+        raise OSError(f"UID SEARCH failed: {typ} {data}")
+    recent = {int(uid) for uid in (data[0] or b"").split()}
+    return [i for i, uid in enumerate(uids) if uid in recent]
+
+
+def _gmail_recent(api_src, posts, days):
+    label_id = api_src.getLabels(api_src.getChannel())[0]["id"]
+    recent = gmail_recent_ids(api_src.getClient(), label_id, days)
+    return [i for i, post in enumerate(posts) if _gmail_id(api_src, post) in recent]
+
+
+def recent_positions(api_src, posts, days=None):
+    """
+    Finds the messages of a mail folder received in the last days, asking
+    the server (Gmail newer_than, IMAP SEARCH SINCE) instead of reading
+    the date of each message.
+
+    The window is one day wider than days: IMAP dates have no time and the
+    age of each message is checked again when it is processed.
+
+    Args:
+        api_src: Gmail or IMAP source, with the folder selected as channel
+        posts: Messages listed in the folder
+        days: Maximum age (config.MAX_POST_AGE_DAYS, 0: no limit)
+
+    Returns:
+        list: Positions in posts of the recent messages, or None when all
+        of them have to be considered (no limit, errors)
+    """
+    days = config.MAX_POST_AGE_DAYS if days is None else days
+    if not posts or days <= 0:
+        return None
+    try:
+        if "imap" in api_src.service.lower():
+            return _imap_recent(api_src, posts, days + 1)
+        return _gmail_recent(api_src, posts, days + 1)
+    except Exception as e:
+        logging.warning(f"Could not filter the messages by date on the server: {e}")
+        return None
+
+
+def folder_message_ids(api_src, posts):
+    """
+    Gets stable ids for the posts of a mail folder, for bulk operations.
+
+    Returns:
+        tuple: (ids, uidvalidity). ids are Gmail message ids or IMAP UIDs,
+        in the order of posts (None when they cannot be matched to the
+        posts); uidvalidity is None for Gmail.
+    """
+    try:
+        if "imap" in api_src.service.lower():
+            uidvalidity, uids = _imap_folder(api_src.getClient(), api_src.getChannel())
+            if len(uids) != len(posts):
+                return None, None
+            return uids, uidvalidity
+        ids = [_gmail_id(api_src, post) for post in posts]
+        return (ids if all(ids) else None), None
+    except Exception as e:
+        logging.warning(f"Could not get the ids of the messages: {e}")
+        return None, None
+
+
+class CleanupQueue:
+    """Persistent per-account queue of processed messages to remove from
+    the agenda folder."""
+
+    def __init__(self, path=None):
+        self.path = str(path or config.CLEANUP_QUEUE_FILE)
+        self.accounts = {}
+        try:
+            with open(self.path) as f:
+                self.accounts = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read cleanup queue {self.path}: {e}")
+
+    def pending(self, account):
+        return self.accounts.get(str(account), {})
+
+    def add(self, account, folder, message_id, uidvalidity=None):
+        """Queues a message, saving the queue so that it survives interruptions."""
+        entry = self.pending(account)
+        if entry.get("folder") != folder or entry.get("uidvalidity") != uidvalidity:
+            if entry.get("ids"):
+                # UIDs of a recreated folder, or of another folder, are stale
+                logging.warning(f"Dropping {len(entry['ids'])} stale queued messages of {account}")
+            entry = {"folder": folder, "uidvalidity": uidvalidity, "ids": []}
+            self.accounts[str(account)] = entry
+        if message_id not in entry["ids"]:
+            entry["ids"].append(message_id)
+        self.save()
+
+    def done(self, account):
+        if self.accounts.pop(str(account), None) is not None:
+            self.save()
+
+    def save(self):
+        try:
+            atomic_write(self.path, json.dumps(self.accounts, indent=1).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write cleanup queue {self.path}: {e}")
+
+
+# Gmail batchModify accepts up to 1000 ids per call
+GMAIL_MODIFY_MAX = 1000
+
+
+def remove_messages(api_src, folder, ids, uidvalidity=None):
+    """
+    Removes messages from the agenda folder in bulk.
+
+    Gmail: the label is removed with batchModify. IMAP: with UIDPLUS the
+    messages are flagged as deleted with one UID STORE and expunged by UID;
+    otherwise they are moved to IMAP_TRASH_FOLDER when the server supports
+    MOVE. A plain EXPUNGE would also remove the other messages flagged as
+    deleted in the folder, so without either extension they are only
+    flagged, for the mail client to expunge them.
+
+    Returns:
+        int: Number of messages removed
+
+    Raises:
+        Exception: Network or server errors (the queue is then kept)
+    """
+    if not ids:
+        return 0
+    client = api_src.getClient()
+    if "imap" in api_src.service.lower():
+        current_validity, _ = _imap_folder(client, folder)
+        if uidvalidity is not None and current_validity != uidvalidity:
+            logging.warning(f"Folder {folder} was recreated, its queued messages are stale")
+            return 0
+        capabilities = getattr(client, "capabilities", ())
+        if "MOVE" in capabilities and "UIDPLUS" not in capabilities:
+            typ, data = client.uid("MOVE", uid_set(ids), config.IMAP_TRASH_FOLDER)
+            if typ != "OK":
+                raise OSError(f"UID MOVE failed: {typ} {data}")
+            return len(ids)
+        typ, data = client.uid("STORE", uid_set(ids), "+FLAGS.SILENT", "(\\Deleted)")
+        if typ != "OK":
+            raise OSError(f"UID STORE failed: {typ} {data}")
+        if "UIDPLUS" in capabilities:
+            client.uid("EXPUNGE", uid_set(ids))
+        else:
+            logging.warning(
+                f"The server supports neither UIDPLUS nor MOVE: {len(ids)} messages "
+                f"of {folder} are flagged as deleted but not expunged"
+            )
+    else:
+        label_id = api_src.getLabels(folder)[0]["id"]
+        for start in range(0, len(ids), GMAIL_MODIFY_MAX):
+            body = {"ids": ids[start : start + GMAIL_MODIFY_MAX], "removeLabelIds": [label_id]}
+            client.users().messages().batchModify(userId="me", body=body).execute()
+    return len(ids)
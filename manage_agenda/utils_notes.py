@@ -0,0 +1,115 @@
+"""
+Persistent index of the links found in notes.
+
+Reading every note on each run is slow when there are thousands of them.
+The index remembers, for each note, the file it was read from (path, mtime
+and size) and the URLs it contained, so only new or modified notes are read
+again.
+"""
+
+import json
+import logging
+import os
+
+from manage_agenda.config import config
+from manage_agenda.utils_cache import atomic_write
+
+INDEX_VERSION = 1
+
+
+class NotesLinkIndex:
+    """URL index of a notes directory, refreshed incrementally."""
+
+    def __init__(self, notes_dir, index_file=None):
+        self.notes_dir = notes_dir
+        self.index_file = str(index_file or config.NOTES_INDEX_FILE)
+        self.notes = {}
+        self.load()
+
+    def load(self):
+        """Loads the index from disk, starting empty if missing or stale."""
+        try:
+            with open(self.index_file) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read notes index {self.index_file}: {e}")
+            return
+        if data.get("version") != INDEX_VERSION or data.get("notes_dir") != self.notes_dir:
+            logging.info("Notes index is for another version or directory, rebuilding")
+            return
+        self.notes = data.get("notes", {})
+
+    def save(self):
+        data = {"version": INDEX_VERSION, "notes_dir": self.notes_dir, "notes": self.notes}
+        try:
+            atomic_write(self.index_file, json.dumps(data).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write notes index {self.index_file}: {e}")
+
+    def _note_files(self):
+        """Maps relative paths, with and without extension, to note files."""
+        files = {}
+        for root, dirs, names in os.walk(self.notes_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in names:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.notes_dir)
+                files[relative] = path
+                files.setdefault(os.path.splitext(relative)[0], path)
+        return files
+
+    def refresh(self, manager):
+        """Updates the index with the notes currently known to manager.
+
+        Notes whose file did not change since the last run are not read.
+        Notes that can not be matched to a file are always read.
+
+        Args:
+            manager: A note_app NoteManager for the notes directory.
+
+        Returns:
+            dict: Mapping of URL to the list of note titles containing it.
+        """
+        files = self._note_files()
+        notes = {}
+        read = 0
+        for title in manager.list_notes():
+            path = files.get(title)
+            stamp = None
+            if path:
+                try:
+                    st = os.stat(path)
+                    stamp = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    path = None
+
+            entry = self.notes.get(title)
+            if stamp and entry and entry.get("path") == path and entry.get("stamp") == stamp:
+                notes[title] = entry
+                continue
+
+            note = manager.read_note(title)
+            read += 1
+            if not note:
+                continue
+            # get_urls() returns explicitly added URLs
+            # get_links() returns URLs extracted from content
+            urls = list(dict.fromkeys(list(note.get_urls()) + list(note.get_links())))
+            notes[title] = {"path": path, "stamp": stamp, "urls": urls}
+
+        logging.info(f"Notes index: {len(notes)} notes, {read} read")
+        if read or notes.keys() != self.notes.keys():
+            self.notes = notes
+            self.save()
+        return self.url_to_notes()
+
+    def url_to_notes(self):
+        url_to_notes = {}
+        for title, entry in self.notes.items():
+            for url in entry["urls"]:
+                url_to_notes.setdefault(url, []).append(title)
+        return url_to_notes
@@ -0,0 +1,175 @@
+"""
+Staged execution of the processing flow.
+
+Items go through a chain of stages connected by bounded queues. Each stage
+has its own threads, so reading and reducing the next item overlaps with
+the LLM extraction of the current one, and a slow stage makes the previous
+ones wait (backpressure) instead of piling items up in memory.
+
+The items are fed and the results consumed in the calling thread, which
+can then run the steps that must not be concurrent (cleaning up sources,
+updating state files) as a last stage of its own.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+# Returned by a stage to drop the item
+SKIP = object()
+
+# Seconds between checks of the stop flag while waiting on a queue
+_POLL = 0.1
+
+
+@dataclass
+class Stage:
+    """A step of the pipeline: func(item) -> result (or SKIP)."""
+
+    name: str
+    func: Callable
+    workers: int = 1
+
+
+class StageTimer:
+    """Items and time spent per stage, safe to update from several threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, name, seconds):
+        with self.lock:
+            count, total, longest = self.stages.get(name, (0, 0.0, 0.0))
+            self.stages[name] = (count + 1, total + seconds, max(longest, seconds))
+
+    def summary(self):
+        return "; ".join(
+            f"{name}: {count} items, {total:.2f}s (max {longest:.2f}s)"
+            for name, (count, total, longest) in self.stages.items()
+        )
+
+
+class Pipeline:
+    """
+    Runs items through stages, each one in its own pool of threads.
+
+    Args:
+        stages: List of Stage, in order
+        queue_size: Items waiting before each stage (backpressure)
+        ordered: Yield the results in the order of the input items,
+            instead of as they are ready
+        timer: StageTimer collecting the time of each stage
+    """
+
+    def __init__(self, stages, queue_size=4, ordered=True, timer=None):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.ordered = ordered
+        self.timer = timer or StageTimer()
+        self.stop = threading.Event()
+        self.error = None
+
+    def _get(self, source):
+        while not self.stop.is_set():
+            try:
+                return source.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, target, task):
+        while not self.stop.is_set():
+            try:
+                target.put(task, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _work(self, stage, source, target):
+        while True:
+            task = self._get(source)
+            if task is None:
+                return
+            seq, value = task
+            if value is not SKIP:
+                start = time.monotonic()
+                try:
+                    value = stage.func(value)
+                except Exception as e:
+                    logging.error(f"Stage {stage.name} failed: {e}")
+                    self.error = self.error or e
+                    self.stop.set()
+                    return
+                self.timer.add(stage.name, time.monotonic() - start)
+            if not self._put(target, (seq, value)):
+                return
+
+    def _start(self):
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        # Unbounded: the items in flight are limited when feeding
+        queues.append(queue.Queue())
+        threads = []
+        for n, stage in enumerate(self.stages):
+            for w in range(max(1, stage.workers)):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[n], queues[n + 1]),
+                    name=f"{stage.name}-{w}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+        return queues[0], queues[-1], threads
+
+    def run(self, items):
+        """Yields the results of the last stage for items (an iterable)."""
+        inputs, outputs, threads = self._start()
+        in_flight = self.queue_size * (len(self.stages) + 1) + sum(
+            max(1, stage.workers) for stage in self.stages
+        )
+        items = iter(items)
+        exhausted = False
+        fed = pending = next_seq = 0
+        done = {}
+        try:
+            while True:
+                # The items are read only when there is room for them
+                while not exhausted and pending < in_flight and not inputs.full():
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    inputs.put((fed, item))
+                    fed += 1
+                    pending += 1
+                if exhausted and not pending:
+                    break
+                try:
+                    seq, result = outputs.get(timeout=_POLL)
+                except queue.Empty:
+                    seq = None
+                if seq is None:
+                    if self.error:
+                        raise self.error
+                    continue
+                pending -= 1
+                if not self.ordered:
+                    if result is not SKIP:
+                        yield result
+                    continue
+                done[seq] = result
+                while next_seq in done:
+                    result = done.pop(next_seq)
+                    next_seq += 1
+                    if result is not SKIP:
+                        yield result
+        finally:
+            self.stop.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,122 @@
+"""
+Candidate events waiting for review.
+
+With deferred review, the extraction runs without questions and the
+events found for each item are kept here, together with the text they
+were extracted from. A later review session walks them (accept, edit,
+retry, skip) and publishes the accepted ones together.
+
+The sources are not cleaned (notes deleted, files marked as processed,
+emails queued for removal) until their events are accepted: each
+candidate keeps what is needed to do it then.
+"""
+
+import datetime
+import json
+import logging
+import threading
+
+from manage_agenda.config import config
+from manage_agenda.utils_cache import atomic_write
+
+PENDING = "pending"
+ACCEPTED = "accepted"
+
+
+class ReviewQueue:
+    """Persistent list of candidate events, safe to update from several threads."""
+
+    def __init__(self, path=None):
+        self.path = str(path or config.REVIEW_QUEUE_FILE)
+        self.lock = threading.Lock()
+        self.candidates = []
+        self.next_id = 1
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.candidates = data.get("candidates", [])
+            self.next_id = data.get("next_id", len(self.candidates) + 1)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read review queue {self.path}: {e}")
+
+    def add(self, source, title, content, reference, events, elapsed=0.0):
+        """Queues the events extracted from an item, saving the queue.
+
+        An item extracted again (it was not cleaned, as its candidate is
+        still pending) replaces its previous candidate.
+        """
+        if isinstance(reference, datetime.datetime):
+            reference = reference.isoformat()
+        with self.lock:
+            candidate = self._find(source)
+            if candidate is None:
+                candidate = {"id": self.next_id, "source": str(source), "cleanup": None}
+                self.next_id += 1
+                self.candidates.append(candidate)
+            candidate.update(
+                {
+                    "title": title,
+                    "content": content,
+                    "reference": reference,
+                    "events": list(events),
+                    "elapsed": elapsed,
+                    "status": PENDING,
+                }
+            )
+            self._save()
+        return candidate
+
+    def _find(self, source):
+        for candidate in self.candidates:
+            if candidate["source"] == str(source) and candidate.get("status") == PENDING:
+                return candidate
+        return None
+
+    def set_cleanup(self, source, cleanup):
+        """Keeps with the pending candidate of source how to clean it."""
+        with self.lock:
+            candidate = self._find(source)
+            if candidate is not None:
+                candidate["cleanup"] = cleanup
+                self._save()
+
+    def pending(self):
+        return [c for c in self.candidates if c.get("status") == PENDING]
+
+    def accepted(self):
+        return [c for c in self.candidates if c.get("status") == ACCEPTED]
+
+    def accept(self, candidate):
+        with self.lock:
+            candidate["status"] = ACCEPTED
+            self._save()
+
+    def remove(self, candidate):
+        """Drops a candidate (skipped, or already published)."""
+        with self.lock:
+            self.candidates = [c for c in self.candidates if c["id"] != candidate["id"]]
+            self._save()
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        data = {"next_id": self.next_id, "candidates": self.candidates}
+        try:
+            atomic_write(self.path, json.dumps(data, indent=1).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write review queue {self.path}: {e}")
+
+
+def reference_datetime(candidate):
+    """The date relative dates of the candidate's text refer to."""
+    reference = candidate.get("reference")
+    if not reference:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(reference)
+    except (TypeError, ValueError):
+        return None
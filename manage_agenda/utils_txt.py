@@ -0,0 +1,157 @@
+"""
+Streaming ingestion of the text messages saved in MSG_TXT_DIR.
+
+The folder can hold thousands of messages. Instead of reading all of them
+before processing starts, the files are yielded one at a time, oldest
+first. A manifest remembers, for each file, its size, mtime, content hash
+and status, so the files already processed are skipped without being
+opened; copies of a processed file (same hash) are skipped too.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from manage_agenda.config import config
+from manage_agenda.utils_cache import atomic_write
+
+MANIFEST_VERSION = 1
+
+PENDING = "pending"
+PROCESSED = "processed"
+
+
+class TxtManifest:
+    """Status of the text files of a directory, kept between runs."""
+
+    def __init__(self, txt_dir, manifest_file=None):
+        self.txt_dir = str(txt_dir)
+        self.manifest_file = str(manifest_file or config.TXT_MANIFEST_FILE)
+        self.files = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Loads the manifest from disk, starting empty if missing or stale."""
+        try:
+            with open(self.manifest_file) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read text manifest {self.manifest_file}: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("txt_dir") != self.txt_dir:
+            logging.info("Text manifest is for another version or directory, rebuilding")
+            return
+        self.files = data.get("files", {})
+
+    def save(self):
+        data = {"version": MANIFEST_VERSION, "txt_dir": self.txt_dir, "files": self.files}
+        try:
+            atomic_write(self.manifest_file, json.dumps(data).encode("utf-8"))
+        except OSError as e:
+            logging.error(f"Could not write text manifest {self.manifest_file}: {e}")
+
+    def is_processed(self, name, stat):
+        """True if the file did not change since it was processed."""
+        entry = self.files.get(name)
+        return (
+            entry is not None
+            and entry.get("status") == PROCESSED
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime") == stat.st_mtime
+        )
+
+    def processed_hashes(self):
+        return {e["hash"] for e in self.files.values() if e.get("status") == PROCESSED}
+
+    def record(self, name, stat, digest, status=PENDING):
+        self.changed = True
+        self.files[name] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": digest,
+            "status": status,
+        }
+
+    def mark_processed(self, name):
+        """Marks a file as processed, saving the manifest."""
+        if name in self.files:
+            self.files[name]["status"] = PROCESSED
+            self.save()
+
+
+def _txt_files(txt_dir):
+    """Returns (path, stat) of the *.txt files of txt_dir, oldest first."""
+    files = []
+    try:
+        with os.scandir(txt_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt") and entry.is_file():
+                    files.append((entry.path, entry.stat()))
+    except FileNotFoundError:
+        logging.warning(f"Text directory {txt_dir} does not exist")
+    files.sort(key=lambda item: (item[1].st_mtime, item[0]))
+    return files
+
+
+def _iter_new(files, manifest, stats):
+    stats = {} if stats is None else stats
+    stats.setdefault("read", 0)
+    stats.setdefault("skipped", 0)
+    processed = manifest.processed_hashes()
+    for path, stat in files:
+        name = os.path.basename(path)
+        if manifest.is_processed(name, stat):
+            stats["skipped"] += 1
+            continue
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logging.warning(f"Could not read {path}: {e}")
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in processed:
+            # Same content as a processed file (a copy, or only touched)
+            manifest.record(name, stat, digest, PROCESSED)
+            stats["skipped"] += 1
+            continue
+        manifest.record(name, stat, digest)
+        stats["read"] += 1
+        yield [Path(path), data.decode("utf-8", errors="replace")]
+
+
+def iter_txt_messages(txt_dir, manifest, stats=None):
+    """
+    Yields the text files of txt_dir not processed yet, oldest first.
+
+    Only the directory entries are listed up front; each file is read when
+    its turn comes. Files processed in previous runs (same size and mtime,
+    or same content as a processed file) are skipped.
+
+    Args:
+        txt_dir: Directory with the messages
+        manifest: TxtManifest of txt_dir
+        stats: Optional dict, counting the files read and skipped
+
+    Yields:
+        list: [Path, content] of each file
+    """
+    return _iter_new(_txt_files(txt_dir), manifest, stats)
+
+
+def iter_txt_files(paths, manifest, stats=None):
+    """Like iter_txt_messages, for the given files (missing ones are ignored)."""
+
+    def files():
+        for path in paths:
+            try:
+                yield path, os.stat(path)
+            except FileNotFoundError:
+                continue
+
+    return _iter_new(files(), manifest, stats)
@@ -0,0 +1,293 @@
+"""
+Watch mode: processing the new messages of the email sources as they arrive.
+
+IMAP sources keep a connection in IDLE on the agenda folder and are
+processed when the server announces new messages. Gmail sources are polled,
+comparing the historyId of the mailbox. Lost connections are retried with
+exponential backoff; after reconnecting the source is processed once, to
+catch up with the messages that arrived meanwhile.
+
+Directories (MSG_TXT_DIR) are watched with inotify where available, which
+reports the files once they are closed after writing or moved into the
+directory; elsewhere they are polled, taking a file as complete when its
+size and mtime did not change between two polls.
+"""
+
+import ctypes
+import ctypes.util
+import imaplib
+import itertools
+import logging
+import os
+import select
+import struct
+import time
+
+from manage_agenda.config import config
+
+# Seconds to wait for the server to answer IDLE and DONE
+RESPONSE_TIMEOUT = 30
+
+_tags = itertools.count(1)
+
+
+class _LineReader:
+    """Reads response lines from the socket of an IMAP connection."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+
+    def readline(self, deadline):
+        """Returns the next line, or None if there is none before deadline."""
+        while b"\n" not in self.buffer:
+            # TLS sockets may hold decrypted data that select does not see
+            pending = getattr(self.sock, "pending", None)
+            if not (pending and pending()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                ready, _, _ = select.select([self.sock], [], [], remaining)
+                if not ready:
+                    return None
+            data = self.sock.recv(4096)
+            if not data:
+                raise imaplib.IMAP4.abort("Connection closed by the server")
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line + b"\n"
+
+
+def _is_new_mail(line):
+    return line.startswith(b"*") and line.rstrip().upper().endswith(b"EXISTS")
+
+
+def imap_idle(client, timeout=None):
+    """
+    Waits in IDLE (RFC 2177) for new messages in the selected mailbox.
+
+    Args:
+        client: Connected imaplib client with the mailbox selected
+        timeout: Seconds to wait (config.WATCH_IDLE_TIMEOUT). Servers drop
+            idle connections after 30 minutes, so keep it below that.
+
+    Returns:
+        bool: True when the server announced new messages, False on timeout
+
+    Raises:
+        imaplib.IMAP4.error: The server rejected IDLE or closed the connection
+        OSError: Network errors
+    """
+    timeout = timeout or config.WATCH_IDLE_TIMEOUT
+    tag = f"W{next(_tags)}".encode()
+    reader = _LineReader(client.sock)
+
+    client.send(tag + b" IDLE\r\n")
+    line = reader.readline(time.monotonic() + RESPONSE_TIMEOUT)
+    if line is None or not line.startswith(b"+"):
+        raise imaplib.IMAP4.error(f"IDLE not accepted: {line!r}")
+
+    new_mail = False
+    deadline = time.monotonic() + timeout
+    while not new_mail:
+        line = reader.readline(deadline)
+        if line is None:
+            break
+        if line.startswith(b"* BYE"):
+            raise imaplib.IMAP4.abort(line.decode(errors="replace").strip())
+        new_mail = _is_new_mail(line)
+
+    client.send(b"DONE\r\n")
+    deadline = time.monotonic() + RESPONSE_TIMEOUT
+    while True:
+        line = reader.readline(deadline)
+        if line is None:
+            raise imaplib.IMAP4.abort("No answer to DONE")
+        if line.startswith(tag + b" "):
+            if not line[len(tag) + 1 :].upper().startswith(b"OK"):
+                raise imaplib.IMAP4.error(line.decode(errors="replace").strip())
+            return new_mail
+        new_mail = new_mail or _is_new_mail(line)
+
+
+def _close(client):
+    try:
+        client.logout()
+    except Exception:
+        pass
+
+
+def watch_imap(connect, on_new_mail, stop, idle_timeout=None, backoff=1.0, max_backoff=None):
+    """
+    Calls on_new_mail whenever an IMAP folder gets new messages.
+
+    Args:
+        connect: Function returning a connected imaplib client with the
+            folder selected
+        on_new_mail: Function processing the folder
+        stop: threading.Event ending the watch
+        idle_timeout: Seconds of each IDLE before it is renewed
+        backoff: Seconds before the first reconnection attempt
+        max_backoff: Maximum seconds between attempts (config.WATCH_MAX_BACKOFF)
+    """
+    max_backoff = max_backoff or config.WATCH_MAX_BACKOFF
+    delay = backoff
+    while not stop.is_set():
+        client = None
+        try:
+            client = connect()
+            delay = backoff
+            # Messages that arrived while disconnected
+            on_new_mail()
+            while not stop.is_set():
+                if imap_idle(client, idle_timeout):
+                    on_new_mail()
+        except (OSError, imaplib.IMAP4.error) as e:
+            logging.warning(f"IMAP watch interrupted: {e}. Reconnecting in {delay:.0f}s")
+            stop.wait(delay)
+            delay = min(delay * 2, max_backoff)
+        finally:
+            if client is not None:
+                _close(client)
+
+
+def watch_gmail(check, on_new_mail, stop, interval=None, max_backoff=None):
+    """
+    Calls on_new_mail whenever a Gmail mailbox changes.
+
+    Args:
+        check: Function returning the current historyId of the mailbox
+        on_new_mail: Function processing the folder
+        stop: threading.Event ending the watch
+        interval: Seconds between polls (config.WATCH_POLL_INTERVAL)
+        max_backoff: Maximum seconds between attempts after errors
+    """
+    interval = interval or config.WATCH_POLL_INTERVAL
+    max_backoff = max(max_backoff or config.WATCH_MAX_BACKOFF, interval)
+    last = None
+    delay = interval
+    while not stop.is_set():
+        try:
+            current = check()
+            delay = interval
+            if current != last:
+                last = current
+                on_new_mail()
+        except Exception as e:
+            delay = min(delay * 2, max_backoff)
+            logging.warning(f"Gmail watch error: {e}. Retrying in {delay:.0f}s")
+        stop.wait(delay)
+
+
+# inotify(7): file closed after writing, file moved into the directory
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# struct inotify_event: wd, mask, cookie, len (followed by the name)
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal inotify binding (Linux), through the C library."""
+
+    def __init__(self, directory, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Could not watch {directory}: {os.strerror(errno)}")
+
+    def read(self, timeout):
+        """Returns the names of the files with events, waiting up to timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            _, _, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _snapshot(directory, suffix):
+    """Returns path -> (size, mtime) of the files of directory."""
+    files = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime)
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def watch_directory(directory, on_files, stop, suffix=".txt", poll_interval=None, use_inotify=True):
+    """
+    Calls on_files with the files completely written to a directory.
+
+    The files already there are passed in the first call, to catch up.
+
+    Args:
+        directory: Directory to watch
+        on_files: Function taking the list of paths, oldest first
+        stop: threading.Event ending the watch
+        suffix: Only files with this suffix are reported
+        poll_interval: Seconds between polls, without inotify
+            (config.WATCH_POLL_INTERVAL)
+        use_inotify: False to poll even where inotify is available
+    """
+    poll_interval = poll_interval or config.WATCH_POLL_INTERVAL
+    inotify = None
+    if use_inotify:
+        try:
+            inotify = Inotify(directory)
+        except (OSError, AttributeError, TypeError) as e:
+            logging.info(f"Polling {directory} every {poll_interval}s (no inotify: {e})")
+
+    try:
+        previous = _snapshot(directory, suffix)
+        reported = dict(previous)
+        if previous:
+            on_files(sorted(previous, key=lambda path: previous[path][1]))
+        while not stop.is_set():
+            if inotify:
+                # Wakes up every second to check stop
+                names = inotify.read(min(poll_interval, 1.0))
+                paths = sorted({os.path.join(directory, n) for n in names if n.endswith(suffix)})
+            else:
+                stop.wait(poll_interval)
+                current = _snapshot(directory, suffix)
+                # Not being written: unchanged since the previous poll
+                paths = [
+                    path
+                    for path, state in current.items()
+                    if previous.get(path) == state and reported.get(path) != state
+                ]
+                paths.sort(key=lambda path: current[path][1])
+                reported.update((path, current[path]) for path in paths)
+                previous = current
+            if paths and not stop.is_set():
+                on_files(paths)
+    finally:
+        if inotify:
+            inotify.close()
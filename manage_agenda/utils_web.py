@@ -1,11 +1,39 @@
+import functools
+import hashlib
+import json
 import logging
+import multiprocessing
 import os
 import re
-from urllib.parse import urlparse
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
 
 from bs4 import BeautifulSoup
 
-CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "manage_agenda")
+from manage_agenda.config import config
+from manage_agenda.utils_cache import WebCache
+
+CACHE_DIR = config.CACHE_DIR
+
+# One cache per process, so that its size is scanned only on the first write
+_web_cache = None
+_web_cache_lock = threading.Lock()
+
+
+def get_web_cache():
+    """Returns the web cache rooted at the current CACHE_DIR.
+
+    The same instance is returned until CACHE_DIR changes.
+    """
+    global _web_cache
+    with _web_cache_lock:
+        if _web_cache is None or _web_cache.cache_dir != str(CACHE_DIR):
+            _web_cache = WebCache(CACHE_DIR)
+        return _web_cache
 
 
 def extract_domain_and_path_from_url(url):
@@ -45,6 +73,336 @@ def extract_domain_and_path_from_url(url):
         return f"{domain}{final_path}"
 
 
+# Query parameters that do not change the page (tracking, AMP switches)
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref_src", "ref_url", "amp", "outputtype"
+}
+TRACKING_PREFIXES = ("utm_",)
+MOBILE_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url):
+    """
+    Returns a canonical form of the URL, used to detect copies of the same
+    page: scheme, host case, www/mobile/AMP variants, default ports, trailing
+    slashes, tracking parameters, parameter order and fragments are ignored.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    port = parts.port
+    if port and str(port) not in DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    path = re.sub(r"/amp/?$", "/", path)
+    path = re.sub(r"\.amp(\.html?)?$", r"\1", path)
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def page_item_id(url):
+    """
+    Returns the id of the item of a web page, safe as a filename: its
+    directory (as in extract_domain_and_path_from_url), readable, followed
+    by a hash of the canonical URL, as pages of the same directory share it.
+    """
+    canonical = canonicalize_url(url)
+    safe_id = re.sub(r"[^a-zA-Z0-9.-]", "_", extract_domain_and_path_from_url(canonical))
+    # Bounded to avoid "File name too long" errors
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+    return f"{safe_id[:150]}_{digest}"
+
+
+def dedup_urls(urls):
+    """
+    Collapses the URLs that point to the same page.
+
+    Returns:
+        tuple: (unique_urls, origins) where unique_urls keeps one original
+        URL per page (https preferred), in order of first appearance, and
+        origins maps each of them to all the original URLs it stands for.
+    """
+    groups = {}
+    for url in urls:
+        groups.setdefault(canonicalize_url(url), []).append(url)
+
+    unique_urls = []
+    origins = {}
+    for originals in groups.values():
+        chosen = next((u for u in originals if u.lower().startswith("https:")), originals[0])
+        unique_urls.append(chosen)
+        origins[chosen] = list(dict.fromkeys(originals))
+    return unique_urls, origins
+
+
+# Path fragments of links that usually lead to event detail pages
+EVENT_LINK_KEYWORDS = [
+    "event", "evento", "agenda", "concert", "concierto", "program", "actividad",
+    "activity", "show", "espectaculo", "exposicion", "exhibition", "festival",
+    "ticket", "entradas", "sesion", "session"
+]
+ASSET_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".pdf", ".css", ".js",
+    ".zip", ".mp3", ".mp4", ".ics"
+)
+
+
+def _jsonld_event_urls(data):
+    """Yields the urls of Event (and list item) objects in JSON-LD data."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _jsonld_event_urls(item)
+    elif isinstance(data, dict):
+        types = data.get("@type", "")
+        types = types if isinstance(types, list) else [types]
+        is_event = any(isinstance(t, str) and t.endswith(("Event", "ListItem")) for t in types)
+        url = data.get("url")
+        if is_event and isinstance(url, str):
+            yield url
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from _jsonld_event_urls(value)
+
+
+def find_event_links(base_url, html, max_links=None):
+    """
+    Finds the links of a listing page (a venue agenda, for instance) that
+    probably lead to event detail pages: the urls of JSON-LD events and the
+    same-site links below the listing path or with event-like paths.
+
+    Args:
+        base_url: URL of the listing page
+        html: Content of the listing page
+        max_links: Maximum number of links to return
+
+    Returns:
+        list: Absolute URLs, without duplicates, in document order.
+    """
+    if not html:
+        return []
+    soup = BeautifulSoup(shrink_html(html), "html.parser")
+    candidates = []
+
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        candidates.extend(urljoin(base_url, url) for url in _jsonld_event_urls(data))
+
+    base = urlparse(base_url)
+    base_host = canonicalize_url(base_url).split("/")[2]
+    listing_path = base.path.rstrip("/").lower()
+    for anchor in soup.find_all("a", href=True):
+        href = urljoin(base_url, anchor["href"].strip())
+        parsed = urlparse(href)
+        if parsed.scheme not in ("http", "https"):
+            continue
+        if canonicalize_url(href).split("/")[2] != base_host:
+            continue
+        path = parsed.path.lower()
+        if path.endswith(ASSET_EXTENSIONS) or path.rstrip("/") == listing_path:
+            continue
+        is_child = bool(listing_path) and path.startswith(listing_path + "/")
+        if is_child or any(k in path for k in EVENT_LINK_KEYWORDS):
+            candidates.append(href)
+
+    links, _ = dedup_urls(candidates)
+    listing = canonicalize_url(base_url)
+    links = [link for link in links if canonicalize_url(link) != listing]
+    return links[:max_links] if max_links else links
+
+
+# Inline blocks that are dropped from large pages before parsing
+BLOCK_TAGS = ("script", "style", "svg")
+TAG_START_RE = re.compile(r"<([a-zA-Z][\w:-]*)")
+LD_JSON_RE = re.compile(r"<script[^>]*application/ld\+json[^>]*>.*?</script\s*>", re.I | re.S)
+# Size of the JSON-LD kept from the part of a page beyond PAGE_MAX_BYTES
+LD_JSON_MAX_BYTES = 256 * 1024
+_CLOSE_RES = {name: re.compile(rf"</{name}\s*>", re.I) for name in BLOCK_TAGS}
+
+
+def _keep_block(name, block, max_block_bytes):
+    """Decides whether an inline script/style/svg block is kept."""
+    if name != "script":
+        return False
+    open_tag = block[: block.find(">") + 1].lower()
+    if "application/ld+json" in open_tag:
+        return True
+    return "src=" not in open_tag and len(block) <= max_block_bytes
+
+
+def shrink_html(html, max_bytes=None, max_nodes=None, max_block_bytes=None):
+    """
+    Bounds the size of a page before it is parsed.
+
+    In a single pass over the document, inline <style> and <svg> blocks and
+    external or oversized <script> blocks are dropped (JSON-LD and small
+    inline data scripts, used by extract_relevant_script_content, are kept).
+    The output is cut after max_bytes characters or max_nodes tags; JSON-LD
+    found after the cut is still appended.
+
+    Args:
+        html: The page content
+        max_bytes: Maximum length of the result (config.PAGE_MAX_BYTES)
+        max_nodes: Maximum number of tags (config.PAGE_MAX_NODES)
+        max_block_bytes: Maximum length of a kept inline script
+            (config.SCRIPT_MAX_BYTES)
+
+    Returns:
+        str: The reduced page (html itself if nothing was dropped).
+    """
+    max_bytes = config.PAGE_MAX_BYTES if max_bytes is None else max_bytes
+    max_nodes = config.PAGE_MAX_NODES if max_nodes is None else max_nodes
+    max_block_bytes = config.SCRIPT_MAX_BYTES if max_block_bytes is None else max_block_bytes
+
+    out = []
+    size = 0
+    nodes = 0
+    pos = 0
+    dropped = 0
+    cut = None
+    while True:
+        match = TAG_START_RE.search(html, pos)
+        end = match.start() if match else len(html)
+        if max_bytes and size + end - pos > max_bytes:
+            cut = pos + max_bytes - size
+            out.append(html[pos:cut])
+            break
+        out.append(html[pos:end])
+        size += end - pos
+        if not match:
+            break
+        nodes += 1
+        if max_nodes and nodes > max_nodes:
+            cut = end
+            break
+
+        name = match.group(1).lower()
+        if name in BLOCK_TAGS:
+            close = _CLOSE_RES[name].search(html, match.end())
+            block_end = close.end() if close else len(html)
+            block = html[end:block_end]
+            pos = block_end
+            if not _keep_block(name, block, max_block_bytes):
+                dropped += len(block)
+                continue
+            if max_bytes and size + len(block) > max_bytes:
+                cut = end
+                break
+            out.append(block)
+            size += len(block)
+        else:
+            out.append(match.group(0))
+            size += match.end() - end
+            pos = match.end()
+
+    if cut is not None:
+        logging.info(f"Page truncated at {cut} of {len(html)} characters ({nodes} tags)")
+        extra = 0
+        for ld_json in LD_JSON_RE.finditer(html, cut):
+            extra += len(ld_json.group(0))
+            if extra > LD_JSON_MAX_BYTES:
+                break
+            out.append(ld_json.group(0))
+    elif not dropped:
+        return html
+    if dropped:
+        logging.debug(f"Dropped {dropped} characters of inline scripts, styles and svg")
+    return "".join(out)
+
+
+def _trie_regex(words):
+    """Builds a regular expression matching any of words, sharing prefixes.
+
+    Python's regex engine tries the alternatives of a group one by one; a
+    prefix tree lets it discard most keywords after the first character.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Precompiled matcher for keywords and patterns, combined in a single
+    regular expression so that a text is lowercased and scanned once
+    whatever the number of keywords. Results for short texts are cached, as
+    the same fragments are checked again for every ancestor tag.
+
+    Args:
+        keywords: Plain strings, matched as case-insensitive substrings
+            (category "keyword")
+        pattern: Extra regular expression, applied to the lowercased text;
+            its named groups are reported as categories
+        cache_size: Number of texts whose results are remembered
+    """
+
+    # Longer texts (whole pages, scripts) are not worth keeping in memory
+    MAX_CACHED_LENGTH = 2000
+
+    def __init__(self, keywords=(), pattern=None, cache_size=4096):
+        alternatives = []
+        if keywords:
+            alternatives.append(f"(?P<keyword>{_trie_regex({k.lower() for k in keywords})})")
+        if pattern:
+            alternatives.append(pattern)
+        self.regex = re.compile("|".join(alternatives))
+        self._cached_scan = functools.lru_cache(maxsize=cache_size)(self._scan)
+        self._cached_search = functools.lru_cache(maxsize=cache_size)(self._search)
+
+    def _scan(self, text):
+        return frozenset(match.lastgroup for match in self.regex.finditer(text.lower()))
+
+    def _search(self, text):
+        return self.regex.search(text.lower()) is not None
+
+    def scan(self, text):
+        """Returns the set of categories found anywhere in text."""
+        if len(text) > self.MAX_CACHED_LENGTH:
+            return self._scan(text)
+        return self._cached_scan(text)
+
+    def search(self, text):
+        """Returns True if text contains any keyword or pattern."""
+        if len(text) > self.MAX_CACHED_LENGTH:
+            return self._search(text)
+        return self._cached_search(text)
+
+
+SCRIPT_KEYWORDS = ["event", "schedule", "calendar", "date", "venue", "location", "price"]
+SCRIPT_MATCHER = KeywordMatcher(SCRIPT_KEYWORDS, cache_size=0)
+
+
 def extract_relevant_script_content(soup):
     """
     Extracts content from script tags that might contain event information,
@@ -63,89 +421,411 @@ def extract_relevant_script_content(soup):
             # Heuristic: If it looks like a large JSON object or contains event keywords,
             # it might be an initial state or data dump.
             # We look for "window.__" or "EVENT_DATA" or similar common patterns.
-            keywords = ["event", "schedule", "calendar", "date", "venue", "location", "price"]
-            if (len(content) > 100 and 
-                any(k.lower() in content.lower() for k in keywords) and
-                ("{" in content or "[" in content)):
+            if (len(content) > 100 and
+                ("{" in content or "[" in content) and
+                SCRIPT_MATCHER.search(content)):
                 # We don't want to include huge minified libraries, so we check for some structure
                 # and limit the size if it doesn't look like pure data
-                if len(content) < 10000: # Arbitrary limit for sanity
+                if len(content) < config.SCRIPT_MAX_BYTES: # Arbitrary limit for sanity
                     script_content.append(f"Possible Data Object:\n{content}")
 
     return "\n\n".join(script_content)
 
 
-def is_error_content(soup):
+ERROR_TITLES = [
+    "404 not found", "403 forbidden", "500 internal server error",
+    "502 bad gateway", "503 service unavailable", "access denied",
+    "page not found", "error", "security check", "checking your browser"
+]
+
+# Markers of bot-protection interstitials, which never contain the page
+CHALLENGE_SIGNATURES = [
+    "checking your browser", "cf-browser-verification", "cf_chl_opt",
+    "verify you are human", "ddos protection by", "just a moment..."
+]
+
+ERROR_TITLE_MATCHER = KeywordMatcher(ERROR_TITLES, cache_size=256)
+CHALLENGE_MATCHER = KeywordMatcher(CHALLENGE_SIGNATURES, cache_size=0)
+ERROR_HEADINGS = [
+    "404", "500", "502", "503", "not found", "access denied",
+    "forbidden", "error occurred", "security check"
+]
+ERROR_HEADING_MATCHER = KeywordMatcher(ERROR_HEADINGS, cache_size=256)
+
+# Only the beginning of the document is searched for the title and markers
+TRIAGE_HEAD_BYTES = 65536
+
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+INVISIBLE_RE = re.compile(
+    r"<(script|style|svg|noscript)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL
+)
+TAG_RE = re.compile(r"<[^>]*>")
+# Documents that are not text (PDF files, images) downloaded as pages
+BINARY_RE = re.compile(r"\A\s*%PDF-|\x00")
+
+
+@dataclass
+class Triage:
+    """Result of the cheap checks done on a page before parsing it."""
+
+    reason: Optional[str] = None
+    title: str = ""
+    text_length: int = 0
+
+    @property
+    def ok(self):
+        return self.reason is None
+
+
+def triage_page(post):
+    """
+    Decides, using only the raw content, whether a page is worth parsing.
+    Binary documents, pages without visible text, error titles and
+    challenge pages are rejected.
+
+    Args:
+        post: The downloaded content (str or bytes)
+
+    Returns:
+        Triage: reason is None when the page should be processed.
+    """
+    if isinstance(post, bytes):
+        post = post.decode("utf-8", errors="replace")
+    if not post or not post.strip():
+        return Triage(reason="Empty content")
+
+    head = post[:TRIAGE_HEAD_BYTES]
+    if BINARY_RE.search(head):
+        return Triage(reason="Not a text document")
+
+    title = ""
+    match = TITLE_RE.search(head)
+    if match:
+        title = TAG_RE.sub("", match.group(1)).strip()
+    if ERROR_TITLE_MATCHER.search(title):
+        return Triage(reason=f"Error title '{title}'", title=title)
+
+    if CHALLENGE_MATCHER.search(head):
+        return Triage(reason="Challenge page", title=title)
+
+    text_length = len(" ".join(TAG_RE.sub(" ", INVISIBLE_RE.sub(" ", post)).split()))
+    if text_length == 0:
+        return Triage(reason="No visible text", title=title)
+
+    return Triage(title=title, text_length=text_length)
+
+
+def is_error_content(soup, text_length=None):
     """
     Checks if the BeautifulSoup object contains common error indicators.
+
+    Args:
+        soup: The parsed page
+        text_length: Length of the page text, if already known (it is only
+            computed when a suspicious heading is found)
     """
     # Check title
     title_tag = soup.find("title")
     if title_tag:
-        title_text = title_tag.get_text().lower()
-        error_titles = [
-            "404 not found", "403 forbidden", "500 internal server error",
-            "502 bad gateway", "503 service unavailable", "access denied",
-            "page not found", "error", "security check", "checking your browser"
-        ]
-        if any(err in title_text for err in error_titles):
+        if ERROR_TITLE_MATCHER.search(title_tag.get_text()):
             return True
 
     # Check common error heading patterns
     for heading in soup.find_all(["h1", "h2"]):
-        h_text = heading.get_text().lower()
-        error_indicators = [
-            "404", "500", "502", "503", "not found", "access denied", 
-            "forbidden", "error occurred", "security check"
-        ]
-        if any(err in h_text for err in error_indicators):
+        if ERROR_HEADING_MATCHER.search(heading.get_text()):
             # Double check if it's just a small page with this heading
-            if len(soup.get_text()) < 1000:
+            if text_length is None:
+                text_length = len(soup.get_text())
+            if text_length < 1000:
                 return True
 
     return False
 
 
+PROTECTED_KEYWORDS = [
+    "Lugar", "Hora", "Fecha", "Cuándo", "Dónde", "Precio", "Entrada",
+    "Place", "Time", "Date", "When", "Where", "Price", "Location", "Address",
+    "Dirección", "Ubicación"
+]
+
+# Keywords, times and dates (Spanish and numeric) in a single pass
+PROTECTED_MATCHER = KeywordMatcher(
+    PROTECTED_KEYWORDS,
+    pattern=r"\d{1,2}(?:(?P<time>:\d{2})|(?P<date>\s+de\s+[a-z]+|/\d{1,2}))",
+)
+
+# Per-domain template learning: a fragment is boilerplate when it appears in
+# at least TEMPLATE_THRESHOLD of the (at least TEMPLATE_MIN_PAGES) distinct
+# pages seen for the domain. When the pages or fragments kept reach their
+# limit, the template is aged: counts and pages are halved together
+TEMPLATE_MIN_PAGES = 3
+TEMPLATE_THRESHOLD = 0.6
+TEMPLATE_MAX_FRAGMENTS = 5000
+TEMPLATE_MAX_PAGES = 500
+TEMPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "button"}
+
+
+def is_protected_fragment(text):
+    """
+    Checks if a text fragment may carry event data (dates, times, places)
+    and must therefore never be removed as repeated content.
+    """
+    return PROTECTED_MATCHER.search(text)
+
+
+def _fragment_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class DomainTemplate:
+    """
+    Learns the fragments (navigation, footers, cookie banners...) that recur
+    across the pages of a site, counting in how many distinct pages the hash
+    of each fragment has been seen.
+    """
+
+    def __init__(self, domain, pages=None, counts=None, total_pages=0):
+        self.domain = domain
+        self.pages = pages or []
+        self.counts = counts or {}
+        self.total_pages = total_pages
+
+    @staticmethod
+    def cache_key(domain):
+        return f"template:{domain}"
+
+    @classmethod
+    def load(cls, cache, domain):
+        data = cache.get(cls.cache_key(domain))
+        if data:
+            try:
+                data = json.loads(data)
+                return cls(
+                    domain,
+                    pages=data.get("pages", []),
+                    counts=data.get("counts", {}),
+                    total_pages=data.get("total_pages", 0),
+                )
+            except (ValueError, AttributeError) as e:
+                logging.warning(f"Invalid template for {domain}, starting again: {e}")
+        return cls(domain)
+
+    def save(self, cache):
+        data = {"pages": self.pages, "counts": self.counts, "total_pages": self.total_pages}
+        cache.set(self.cache_key(self.domain), json.dumps(data))
+
+    def learn(self, page_url, fragments):
+        """
+        Counts the fragments of a page. Each page is counted only once, so
+        reprocessing the same URL does not inflate the counts.
+
+        Returns:
+            bool: True if the page was new for this template.
+        """
+        page_hash = _fragment_hash(page_url)
+        if page_hash in self.pages:
+            return False
+
+        new_fragments = {_fragment_hash(text) for text in fragments if text}
+        if len(self.pages) >= TEMPLATE_MAX_PAGES:
+            self._age()
+        while self.counts and len(self.counts.keys() | new_fragments) > TEMPLATE_MAX_FRAGMENTS:
+            self._age()
+
+        self.pages.append(page_hash)
+        self.total_pages += 1
+        for fragment_hash in new_fragments:
+            self.counts[fragment_hash] = self.counts.get(fragment_hash, 0) + 1
+        return True
+
+    def _age(self):
+        """
+        Halves the counts and the pages together, so that the ratios are
+        kept while the fragments seen once are forgotten and the recent
+        pages (and new fragments) weigh more.
+        """
+        self.counts = {h: count // 2 for h, count in self.counts.items() if count >= 2}
+        self.total_pages //= 2
+        self.pages = self.pages[len(self.pages) // 2 :]
+
+    def is_boilerplate(self, text):
+        if self.total_pages < TEMPLATE_MIN_PAGES:
+            return False
+        count = self.counts.get(_fragment_hash(text), 0)
+        return count / self.total_pages >= TEMPLATE_THRESHOLD
+
+
+def strip_template_boilerplate(soup, template):
+    """
+    Removes from soup the fragments that the domain template has learned as
+    boilerplate. This works even the first time a page is seen.
+
+    Returns:
+        int: The number of removed tags.
+    """
+    removed = 0
+    for tag in soup.find_all(True):
+        if not tag.parent: # Already decomposed
+            continue
+        if tag.name in ("html", "body", "head"):
+            continue
+
+        tag_text = tag.get_text(strip=True)
+        if not tag_text or not template.is_boilerplate(tag_text):
+            continue
+
+        if is_protected_fragment(tag_text):
+            continue
+
+        # Short texts could be a venue or an artist name repeated in every page
+        is_link = (tag.name == 'a' or tag.find('a'))
+        if is_link or tag.name in TEMPLATE_TAGS or len(tag_text) > 80:
+            tag.decompose()
+            removed += 1
+    return removed
+
+
+MEMO_PREFIX = "memo:"
+PAGE_PREFIX = "page:"
+
+
+def get_cached_page(url, max_age=None):
+    """
+    Returns the content of url stored by cache_page, if it is not older
+    than max_age seconds (config.CRAWL_CACHE_TTL), or None.
+    """
+    max_age = config.CRAWL_CACHE_TTL if max_age is None else max_age
+    if not max_age:
+        return None
+    data = get_web_cache().get(PAGE_PREFIX + canonicalize_url(url))
+    if not data:
+        return None
+    try:
+        entry = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict) or time.time() - entry.get("fetched", 0) > max_age:
+        return None
+    return entry.get("html")
+
+
+def cache_page(url, html):
+    """Stores the downloaded content of url, to be reused by get_cached_page."""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    entry = {"fetched": time.time(), "html": html}
+    get_web_cache().set(PAGE_PREFIX + canonicalize_url(url), json.dumps(entry))
+
+
+def html_title(post):
+    """Returns the text of the <title> of a page, or an empty string."""
+    if isinstance(post, bytes):
+        post = post.decode("utf-8", errors="replace")
+    match = TITLE_RE.search(post[:TRIAGE_HEAD_BYTES])
+    return TAG_RE.sub("", match.group(1)).strip() if match else ""
+
+
+def html_content_hash(post):
+    """Returns the SHA-256 hex digest of the downloaded content."""
+    if isinstance(post, str):
+        post = post.encode("utf-8", errors="surrogatepass")
+    elif not isinstance(post, bytes):
+        post = str(post).encode("utf-8")
+    return hashlib.sha256(post).hexdigest()
+
+
+def get_memo(content_hash):
+    """
+    Returns what is known about content with this hash: a dictionary with
+    the url, the reduced text and, once processed, the extracted events.
+    """
+    data = get_web_cache().get(MEMO_PREFIX + content_hash)
+    if not data:
+        return None
+    try:
+        memo = json.loads(data)
+    except ValueError:
+        return None
+    return memo if isinstance(memo, dict) else None
+
+
+def _update_memo(content_hash, **fields):
+    memo = get_memo(content_hash) or {}
+    memo.update(fields)
+    get_web_cache().set(MEMO_PREFIX + content_hash, json.dumps(memo))
+
+
+def remember_events(content_hash, url, events):
+    """Stores the events extracted from the content with this hash."""
+    if not isinstance(events, (list, tuple)):
+        events = [events]
+    _update_memo(content_hash, url=url, events=list(events))
+
+
 def reduce_html(url, post, force_refresh=False):
     """
     Reduces the HTML content of a URL by comparing it with a cached version.
-    Returns the new or unique content of the page.
+    Returns the new or unique content of the page. Content byte-identical to
+    some already reduced returns the memoized text without parsing.
 
     Args:
         url: The URL being processed
         post: The HTML content to process
-        force_refresh: If True, bypass cache comparison and return full content
+        force_refresh: If True, bypass cache comparison and memoized results
+            and return full content
     """
     if not post or not post.strip():
         logging.warning(f"Empty content received for {url}")
         return None
 
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+    # Byte-identical content has already been reduced: no shrinking,
+    # triage nor parsing
+    content_hash = html_content_hash(post)
+    if not force_refresh:
+        memo = get_memo(content_hash)
+        if memo and memo.get("reduced"):
+            logging.info("Identical content already processed. Using memoized text")
+            return memo["reduced"]
+
+    # Bound the size of huge pages before anything else works on them
+    original_length = len(post)
+    post = shrink_html(post)
+    logging.debug(f"Post: {original_length} characters, {len(post)} after shrinking")
+
+    # Reject useless pages before any parsing
+    triage = triage_page(post)
+    if not triage.ok:
+        logging.warning(f"Skipping {url}: {triage.reason}")
+        return None
 
-    # Generate a safe filename from the processed URL
-    processed_url = extract_domain_and_path_from_url(url)
-    safe_filename = re.sub(r"[^a-zA-Z0-9.-]", "_", processed_url)
-    cached_file_path = os.path.join(CACHE_DIR, safe_filename)
+    cache = get_web_cache()
+    cache_key = extract_domain_and_path_from_url(url)
+    old_html = None if force_refresh else cache.get(cache_key)
 
     new_html = post
-    logging.debug(f"Post: {post}")
 
     soup = BeautifulSoup(new_html, "html.parser")
 
     # Detect error pages
-    if is_error_content(soup):
+    if is_error_content(soup, text_length=triage.text_length):
         logging.warning(f"Error page detected for {url}")
         return None
     
     # Extract relevant script content before they are decomposed
     extra_script_data = extract_relevant_script_content(soup)
 
+    # Learn the site template from this page
+    domain = urlparse(url).netloc
+    template = DomainTemplate.load(cache, domain)
+    page_url = url.split("#")[0].split("?")[0]
+    fragments = [tag.get_text(strip=True) for tag in soup.find_all(True)]
+    if template.learn(page_url, fragments):
+        template.save(cache)
+
     if force_refresh:
         logging.info("Force refresh enabled. Returning full content after cleaning...")
         # Save the new HTML to the cache
-        with open(cached_file_path, "w", encoding="utf-8") as f:
-            f.write(new_html)
+        cache.set(cache_key, new_html)
 
         # Return the full content after basic cleaning
         for script in soup.find_all("script"):
@@ -153,11 +833,8 @@ def reduce_html(url, post, force_refresh=False):
         for meta in soup.find_all("meta"):
             meta.decompose()
         result = soup.get_text(separator="\n", strip=True)
-    elif os.path.exists(cached_file_path):
+    elif old_html is not None:
         logging.info("URL found in cache. Comparing...")
-        with open(cached_file_path, encoding="utf-8") as f:
-            old_html = f.read()
-
         soup1 = BeautifulSoup(old_html, "html.parser")
         soup2 = soup # use the already parsed soup
 
@@ -169,12 +846,6 @@ def reduce_html(url, post, force_refresh=False):
         # Decompose tags in the new version if their text content is in the old version
         # We are more selective to avoid removing important data (dates, times, locations)
         # that might appear in other pages (e.g. in footers or sidebar links)
-        protected_keywords = [
-            "Lugar", "Hora", "Fecha", "Cuándo", "Dónde", "Precio", "Entrada",
-            "Place", "Time", "Date", "When", "Where", "Price", "Location", "Address",
-            "Dirección", "Ubicación"
-        ]
-        
         for tag in soup2.find_all(True):
             if not tag.parent: # Already decomposed
                 continue
@@ -183,14 +854,7 @@ def reduce_html(url, post, force_refresh=False):
             if not tag_text or tag_text not in fragments1:
                 continue
 
-            # Check if tag contains protected keywords
-            if any(k.lower() in tag_text.lower() for k in protected_keywords):
-                continue
-
-            # Check for date and time patterns
-            if (re.search(r"\d{1,2}:\d{2}", tag_text) or # Time
-                re.search(r"\d{1,2}\s+de\s+[a-z]+", tag_text, re.IGNORECASE) or # Spanish date
-                re.search(r"\d{1,2}/\d{1,2}", tag_text)): # Numeric date
+            if is_protected_fragment(tag_text):
                 continue
 
             # Only decompose if it's likely boilerplate (e.g. contains links or is very long)
@@ -199,6 +863,9 @@ def reduce_html(url, post, force_refresh=False):
             if is_link or len(tag_text) > 200:
                 tag.decompose()
 
+        removed = strip_template_boilerplate(soup2, template)
+        logging.debug(f"Template fragments removed: {removed}")
+
         # Clean up scripts and meta tags
         for script in soup2.find_all("script"):
             script.decompose()
@@ -208,16 +875,17 @@ def reduce_html(url, post, force_refresh=False):
         # result = soup2.prettify()
         result = soup2.get_text(separator="\n", strip=True)
         # Update cache with the new version
-        with open(cached_file_path, "w", encoding="utf-8") as f:
-            f.write(new_html)
+        cache.set(cache_key, new_html)
 
     else:
         logging.info("URL not found in cache. Downloading and storing it...")
         # Save the new HTML to the cache
-        with open(cached_file_path, "w", encoding="utf-8") as f:
-            f.write(new_html)
+        cache.set(cache_key, new_html)
 
-        # For the first time, we can return the full text after basic cleaning
+        # For the first time, we can return the full text after basic
+        # cleaning and removing the boilerplate already known for the site
+        removed = strip_template_boilerplate(soup, template)
+        logging.debug(f"Template fragments removed: {removed}")
         for script in soup.find_all("script"):
             script.decompose()
         for meta in soup.find_all("meta"):
@@ -227,4 +895,55 @@ def reduce_html(url, post, force_refresh=False):
     if extra_script_data:
         result = f"{result}\n\n--- Extra Data Found in Scripts ---\n{extra_script_data}"
 
+    _update_memo(content_hash, url=url, reduced=result)
+
     return result
+
+
+def _reduce_page_task(task):
+    """Process-pool worker reducing one page.
+
+    Args:
+        task: Picklable tuple (index, url, html bytes, force_refresh,
+            cache directory)
+
+    Returns:
+        tuple: (index, reduced text or None)
+    """
+    global CACHE_DIR
+    index, url, html, force_refresh, cache_dir = task
+    CACHE_DIR = cache_dir
+    try:
+        return index, reduce_html(
+            url, html.decode("utf-8", errors="replace"), force_refresh=force_refresh
+        )
+    except Exception as e:
+        logging.error(f"Could not reduce {url}: {e}")
+        return index, None
+
+
+def reduce_pages_in_pool(pages, force_refresh=False, workers=None):
+    """
+    Runs reduce_html (and the script extraction it does) for several pages
+    in a pool of processes, so that parsing uses every core instead of the
+    thread waiting for the network and the LLM.
+
+    Args:
+        pages: List of (url, html) tuples
+        force_refresh: Passed to reduce_html
+        workers: Number of processes (config.REDUCE_WORKERS)
+
+    Yields:
+        tuple: (index of the page in pages, reduced text or None), in
+        completion order.
+    """
+    workers = workers or config.REDUCE_WORKERS
+    tasks = [
+        (i, url, html if isinstance(html, bytes) else html.encode("utf-8"), force_refresh, str(CACHE_DIR))
+        for i, (url, html) in enumerate(pages)
+    ]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(_reduce_page_task, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the keyword heuristics used by reduce_html on a large page.
+
+Compares the previous per-keyword scans (lowercasing the text for every
+keyword, plus three regular expressions) with the shared KeywordMatcher.
+
+Run with: python tests/benchmark_utils_web.py
+"""
+
+import re
+import sys
+import timeit
+
+sys.path.append(".")
+
+from bs4 import BeautifulSoup
+
+from manage_agenda.utils_web import PROTECTED_KEYWORDS, PROTECTED_MATCHER, is_protected_fragment
+
+
+def legacy_is_protected_fragment(text):
+    if any(k.lower() in text.lower() for k in PROTECTED_KEYWORDS):
+        return True
+    return bool(
+        re.search(r"\d{1,2}:\d{2}", text)
+        or re.search(r"\d{1,2}\s+de\s+[a-z]+", text, re.IGNORECASE)
+        or re.search(r"\d{1,2}/\d{1,2}", text)
+    )
+
+
+def build_page(events=2000):
+    menu = "".join(f'<li><a href="/s{i}">Sección {i}</a></li>' for i in range(30))
+    items = "".join(
+        f"<article><h2>Concierto {i}</h2><p>Una descripción larga del evento número {i} "
+        f"con artistas invitados y mucho texto de relleno.</p>"
+        f"<span>{i % 28 + 1} de mayo</span></article>"
+        for i in range(events)
+    )
+    return f"<html><body><nav><ul>{menu}</ul></nav><main>{items}</main></body></html>"
+
+
+def main():
+    soup = BeautifulSoup(build_page(), "html.parser")
+    fragments = [tag.get_text(strip=True) for tag in soup.find_all(True)]
+    print(f"{len(fragments)} fragments, {sum(map(len, fragments))} characters")
+
+    assert [legacy_is_protected_fragment(f) for f in fragments] == [
+        is_protected_fragment(f) for f in fragments
+    ]
+
+    def matcher_cold():
+        PROTECTED_MATCHER._cached_search.cache_clear()
+        return [is_protected_fragment(f) for f in fragments]
+
+    runs = (
+        ("legacy", lambda: [legacy_is_protected_fragment(f) for f in fragments]),
+        ("matcher (cold cache)", matcher_cold),
+        ("matcher (warm cache)", lambda: [is_protected_fragment(f) for f in fragments]),
+    )
+    for name, func in runs:
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print(f"{name:>20}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -163,6 +163,107 @@ class TestCliCommands(unittest.TestCase):
         # Verify source_name was passed
         call_args = self.mock_process_email_cli.call_args
         self.assertEqual(call_args[1].get("source_name"), "gmail1")
+        self.assertFalse(call_args[1].get("force_refresh"))
+
+    def test_add_interactive_email_force_refresh(self):
+        """Test that --force-refresh asks for a full resync of the folder."""
+        self.mock_select_from_list.return_value = (0, "gmail1")
+
+        result = self.runner.invoke(self.cli.cli, ["add", "-i", "--force-refresh"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue(self.mock_process_email_cli.call_args[1].get("force_refresh"))
+
+    @patch("manage_agenda.cli.process_all_email_cli")
+    def test_add_all_sources(self, mock_process_all_email_cli):
+        """Test that --all-sources processes every email account in one run."""
+        result = self.runner.invoke(self.cli.cli, ["add", "--all-sources", "-s", self.llm_name])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_process_all_email_cli.assert_called_once()
+        self.mock_process_email_cli.assert_not_called()
+        self.assertFalse(mock_process_all_email_cli.call_args[1]["force_refresh"])
+
+    @patch("manage_agenda.cli.deferred_review")
+    @patch("manage_agenda.cli.process_all_email_cli")
+    def test_add_defer(self, mock_process_all_email_cli, mock_deferred_review):
+        """Test that --defer queues the extracted events for review."""
+        result = self.runner.invoke(
+            self.cli.cli, ["add", "--all-sources", "--defer", "-s", self.llm_name]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_deferred_review.assert_called_once()
+        mock_process_all_email_cli.assert_called_once()
+        self.assertIn("waiting for review", result.output)
+
+    @patch("manage_agenda.cli.process_txt_cli")
+    @patch("manage_agenda.cli.process_web_cli")
+    def test_add_crawl_urls(self, mock_process_web_cli, mock_process_txt_cli):
+        """Test that listing URLs are crawled without -i."""
+        result = self.runner.invoke(
+            self.cli.cli, ["add", "--crawl", "--crawl-depth", "2", "https://venue.example/agenda"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_process_txt_cli.assert_not_called()
+        kwargs = mock_process_web_cli.call_args[1]
+        self.assertEqual(kwargs["urls"], ["https://venue.example/agenda"])
+        self.assertTrue(kwargs["crawl"])
+        self.assertEqual(kwargs["crawl_depth"], 2)
+
+    @patch("manage_agenda.cli.process_txt_cli")
+    def test_add_crawl_without_urls(self, mock_process_txt_cli):
+        """Test that --crawl without URLs nor -i is an error."""
+        result = self.runner.invoke(self.cli.cli, ["add", "--crawl"])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("--crawl needs the URLs", result.output)
+        mock_process_txt_cli.assert_not_called()
+
+    @patch("manage_agenda.cli.run_journal")
+    @patch("manage_agenda.cli.process_all_email_cli")
+    def test_add_resume(self, mock_process_all_email_cli, mock_run_journal):
+        """Test that --resume continues the journal of the interrupted run."""
+        result = self.runner.invoke(
+            self.cli.cli, ["add", "--all-sources", "--resume", "-s", self.llm_name]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_run_journal.assert_called_once_with(resume=True)
+        mock_process_all_email_cli.assert_called_once()
+
+    @patch("manage_agenda.cli.review_cli")
+    def test_review_command(self, mock_review_cli):
+        """Test review command, interactive with the LLM given."""
+        result = self.runner.invoke(self.cli.cli, ["review", "-s", "mistral"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_review_cli.assert_called_once()
+        self.assertTrue(mock_review_cli.call_args[0][0].interactive)
+        self.assertEqual(self.mock_select_llm.call_args[0][0].source, "mistral")
+
+    @patch("manage_agenda.cli.watch_email_cli")
+    def test_watch_command(self, mock_watch_email_cli):
+        """Test watch command with the accounts given as arguments."""
+        result = self.runner.invoke(self.cli.cli, ["watch", "--interval", "30", "imap1"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_watch_email_cli.assert_called_once()
+        args = mock_watch_email_cli.call_args[0][0]
+        self.assertFalse(args.interactive)
+        self.assertEqual(mock_watch_email_cli.call_args[1]["source_names"], ["imap1"])
+        self.assertEqual(mock_watch_email_cli.call_args[1]["interval"], 30)
+
+    @patch("manage_agenda.cli.watch_email_cli")
+    @patch("manage_agenda.cli.watch_txt_cli")
+    def test_watch_txt_command(self, mock_watch_txt_cli, mock_watch_email_cli):
+        """Test watch command on the text messages directory."""
+        result = self.runner.invoke(self.cli.cli, ["watch", "--txt"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_watch_txt_cli.assert_called_once()
+        mock_watch_email_cli.assert_not_called()
 
     @patch("manage_agenda.cli.authorize")
     def test_auth_client_not_connected(self, mock_authorize):
@@ -244,6 +345,35 @@ class TestCliCommands(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
         mock_move.assert_called_once()
 
+    @patch("manage_agenda.cli.WebCache")
+    def test_cache_stats_command(self, mock_web_cache):
+        """Test cache stats command."""
+        mock_web_cache.return_value.stats.return_value = {
+            "directory": "/tmp/cache",
+            "entries": 3,
+            "bytes": 2048,
+            "max_bytes": 0,
+            "compression": "gzip",
+            "zstd_available": False,
+        }
+
+        result = self.runner.invoke(self.cli.cli, ["cache", "stats"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Entries: 3", result.output)
+        self.assertIn("2.0 KB (budget: unlimited)", result.output)
+
+    @patch("manage_agenda.cli.WebCache")
+    def test_cache_prune_command(self, mock_web_cache):
+        """Test cache prune command."""
+        mock_web_cache.return_value.prune.return_value = (2, 100)
+
+        result = self.runner.invoke(self.cli.cli, ["cache", "prune", "--all"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_web_cache.return_value.prune.assert_called_once_with(max_bytes=0)
+        self.assertIn("Removed 2 entries", result.output)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
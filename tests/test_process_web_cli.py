@@ -1,3 +1,5 @@
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call
 from collections import namedtuple
@@ -6,7 +8,7 @@ from collections import namedtuple
 # Note: We might need to import them inside the test method if they are not
 # exposed in __init__.py or if we want to patch them during import (though
 # patch usually handles that).
-from manage_agenda.utils import process_web_cli, _get_pages_from_urls, Args
+from manage_agenda.utils import process_web_cli, _crawl_event_pages, _get_pages_from_urls, Args
 
 class TestProcessWebCli(unittest.TestCase):
     def setUp(self):
@@ -20,6 +22,15 @@ class TestProcessWebCli(unittest.TestCase):
         )
         self.model = MagicMock()
 
+        # Keep memoized results out of the user's cache
+        self.temp_cache = tempfile.mkdtemp()
+        self.cache_dir_patcher = patch("manage_agenda.utils_web.CACHE_DIR", self.temp_cache)
+        self.cache_dir_patcher.start()
+
+    def tearDown(self):
+        self.cache_dir_patcher.stop()
+        shutil.rmtree(self.temp_cache)
+
     @patch("manage_agenda.utils.moduleHtml.moduleHtml")
     def test_get_pages_from_urls(self, mock_module_html):
         # Setup mock
@@ -121,7 +132,9 @@ class TestProcessWebCli(unittest.TestCase):
         mock_get_pages.return_value = (mock_page, ["post_obj"])
         
         # Intercept _process_common_flow to trigger item_cleaner
-        def side_effect(args, model, items, metadata_extractor, content_extractor, item_cleaner=None):
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner=None, **kwargs
+        ):
             if item_cleaner:
                 item_cleaner("post_obj", 0, "post_id")
             return True
@@ -134,5 +147,418 @@ class TestProcessWebCli(unittest.TestCase):
         # Verify
         mock_manager.delete_note.assert_called_with("note_title")
 
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils._get_links_from_notes")
+    @patch("note_app.NoteManager")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_process_web_cli_dedups_urls(
+        self,
+        mock_process_flow,
+        mock_note_manager_class,
+        mock_get_links,
+        mock_get_pages
+    ):
+        mock_get_links.return_value = {
+            "https://example.com/event": ["note_a"],
+            "http://www.example.com/event/?utm_source=feed": ["note_b"],
+            "https://example.com/event#tickets": ["note_a", "note_c"],
+        }
+        mock_manager = MagicMock()
+        mock_note_manager_class.return_value = mock_manager
+        mock_get_pages.return_value = (MagicMock(), ["post_obj"])
+
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner=None, **kwargs
+        ):
+            item_cleaner("post_obj", 0, "post_id")
+            return True
+        mock_process_flow.side_effect = side_effect
+
+        with patch("builtins.input", return_value=""):
+            process_web_cli(self.args, self.model)
+
+        # Only one fetch for the three variants
+        mock_get_pages.assert_called_once_with(self.args, ["https://example.com/event"])
+        # Every originating note is deleted, once
+        deleted = [c.args[0] for c in mock_manager.delete_note.call_args_list]
+        self.assertEqual(deleted, ["note_a", "note_b", "note_c"])
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils.reduce_html")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_process_web_cli_skips_unchanged_content(
+        self,
+        mock_process_event,
+        mock_print_lines,
+        mock_write_file,
+        mock_reduce_html,
+        mock_get_pages
+    ):
+        mock_page = MagicMock()
+        mock_page.getPostTitle.return_value = "Test Title"
+        mock_get_pages.return_value = (mock_page, ["<html>same</html>"])
+        mock_reduce_html.return_value = "reduced content"
+        mock_process_event.return_value = ({"summary": "Concert"}, "Calendar Event Created")
+
+        # First run extracts and remembers the events
+        self.assertTrue(process_web_cli(self.args, self.model, urls=["http://example.com/a"]))
+        self.assertEqual(mock_process_event.call_count, 1)
+
+        # Second run with identical content skips the extraction
+        self.assertFalse(process_web_cli(self.args, self.model, urls=["http://example.com/a"]))
+        self.assertEqual(mock_process_event.call_count, 1)
+
+        # Unless a refresh is forced
+        process_web_cli(
+            self.args, self.model, urls=["http://example.com/a"], force_refresh=True
+        )
+        self.assertEqual(mock_process_event.call_count, 2)
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils.reduce_pages_in_pool")
+    @patch("manage_agenda.utils.reduce_html")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_process_web_cli_reduces_in_pool(
+        self,
+        mock_process_event,
+        mock_print_lines,
+        mock_write_file,
+        mock_reduce_html,
+        mock_pool,
+        mock_get_pages
+    ):
+        urls = ["http://example.com/a", "http://example.com/b"]
+        mock_page = MagicMock()
+        mock_page.getPostTitle.side_effect = lambda post: f"Title {post[-1]}"
+        mock_get_pages.return_value = (mock_page, ["<p>a", "<p>b"])
+        # Second page finishes first
+        mock_pool.return_value = iter([(1, "reduced b"), (0, "reduced a")])
+        mock_process_event.return_value = ({"summary": "Concert"}, "Calendar Event Created")
+
+        with patch("manage_agenda.utils.config.REDUCE_WORKERS", 2):
+            self.assertTrue(process_web_cli(self.args, self.model, urls=urls))
+
+        mock_reduce_html.assert_not_called()
+        contents = [c.args[2] for c in mock_process_event.call_args_list]
+        self.assertIn("http://example.com/b", contents[0])
+        self.assertIn("Subject: Title b", contents[0])
+        self.assertIn("reduced b", contents[0])
+        self.assertIn("reduced a", contents[1])
+
+    @patch("manage_agenda.utils._get_links_from_notes")
+    @patch("manage_agenda.utils._get_note_manager")
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils.reduce_pages_in_pool")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_unchanged_pages_cleaned_in_calling_thread(
+        self,
+        mock_process_event,
+        mock_print_lines,
+        mock_write_file,
+        mock_pool,
+        mock_get_pages,
+        mock_get_manager,
+        mock_get_links,
+    ):
+        import threading
+
+        from manage_agenda.utils_web import html_content_hash, remember_events
+
+        urls = ["http://example.com/a", "http://example.com/b", "http://example.com/c"]
+        mock_get_links.return_value = {url: [f"note {url[-1]}"] for url in urls}
+        deleted = []
+        mock_get_manager.return_value.delete_note.side_effect = lambda title: deleted.append(
+            (title, threading.current_thread().name)
+        )
+        mock_page = MagicMock()
+        mock_page.getPostTitle.side_effect = lambda post: f"Title {post[-1]}"
+        mock_get_pages.return_value = (mock_page, ["<p>a", "<p>b", "<p>c"])
+        remember_events(html_content_hash("<p>a"), urls[0], [{"summary": "Old"}])
+        mock_pool.return_value = iter([(1, "reduced c"), (0, "reduced b")])
+        mock_process_event.return_value = ({"summary": "Concert"}, "Calendar Event Created")
+
+        with patch("manage_agenda.utils.config.REDUCE_WORKERS", 2), patch(
+            "builtins.input", return_value=""
+        ):
+            self.assertTrue(process_web_cli(self.args, self.model))
+
+        # The unchanged page is not parsed nor extracted again
+        pages = mock_pool.call_args[0][0]
+        self.assertEqual([url for url, _ in pages], urls[1:])
+        self.assertEqual(mock_process_event.call_count, 2)
+        # Its note is deleted with the others, by the calling thread
+        main = threading.current_thread().name
+        self.assertEqual(
+            sorted(deleted), [("note a", main), ("note b", main), ("note c", main)]
+        )
+
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils.reduce_html")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_pages_of_the_same_directory_in_a_journaled_run(
+        self,
+        mock_process_event,
+        mock_print_lines,
+        mock_write_file,
+        mock_reduce_html,
+        mock_get_pages
+    ):
+        import os
+
+        from manage_agenda.utils import run_journal
+        from manage_agenda.utils_journal import RunJournal
+        from manage_agenda.utils_web import get_memo, html_content_hash
+
+        urls = ["https://venue.com/agenda/concierto-a", "https://venue.com/agenda/concierto-b"]
+        mock_page = MagicMock()
+        mock_page.getPostTitle.side_effect = lambda post: f"Concierto {post[-1]}"
+        mock_get_pages.return_value = (mock_page, ["<p>a", "<p>b"])
+        mock_reduce_html.side_effect = lambda url, post, force_refresh=False: f"Text of {url}"
+        mock_process_event.side_effect = lambda args, model, content, *rest: (
+            {"summary": content.split("\n")[1]}, "Calendar Event Created"
+        )
+
+        journal = RunJournal(os.path.join(self.temp_cache, "run_journal.jsonl"))
+        with patch("manage_agenda.utils.config.REDUCE_WORKERS", 1), run_journal(journal=journal):
+            self.assertTrue(process_web_cli(self.args, self.model, urls=urls))
+
+        # Both pages reach the LLM, each one with its own events remembered
+        self.assertEqual(mock_process_event.call_count, 2)
+        ids = {c.args[4] for c in mock_process_event.call_args_list}
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(
+            get_memo(html_content_hash("<p>b"))["events"], [{"summary": "Subject: Concierto b"}]
+        )
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils.reduce_html")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._extract_event_with_llm_retry")
+    def test_pages_of_the_same_directory_queued_for_review(
+        self,
+        mock_extract,
+        mock_print_lines,
+        mock_write_file,
+        mock_reduce_html,
+        mock_get_pages
+    ):
+        import os
+
+        from manage_agenda.utils import deferred_review
+        from manage_agenda.utils_review import ReviewQueue
+        from manage_agenda.utils_web import html_content_hash
+
+        urls = ["https://venue.com/agenda/concierto-a", "https://venue.com/agenda/concierto-b"]
+        mock_page = MagicMock()
+        mock_page.getPostTitle.side_effect = lambda post: f"Concierto {post[-1]}"
+        mock_get_pages.return_value = (mock_page, ["<p>a", "<p>b"])
+        mock_reduce_html.side_effect = lambda url, post, force_refresh=False: f"Text of {url}"
+        mock_extract.side_effect = lambda args, model, content, date, post_id, title: (
+            [{"summary": title}], None, 1.0, True, False, False
+        )
+
+        queue = ReviewQueue(os.path.join(self.temp_cache, "review_queue.json"))
+        with patch("manage_agenda.utils.config.REDUCE_WORKERS", 1), deferred_review(queue):
+            self.assertTrue(process_web_cli(self.args, self.model, urls=urls))
+
+        # One candidate per page, each one with its own cleanup
+        candidates = sorted(queue.pending(), key=lambda c: c["title"])
+        self.assertEqual([c["title"] for c in candidates], ["Concierto a", "Concierto b"])
+        self.assertNotEqual(candidates[0]["source"], candidates[1]["source"])
+        self.assertEqual(
+            [c["cleanup"]["memo"]["hash"] for c in candidates],
+            [html_content_hash("<p>a"), html_content_hash("<p>b")],
+        )
+
+
+class TestCrawlEventPages(unittest.TestCase):
+    def setUp(self):
+        self.args = Args(interactive=False, verbose=False)
+
+        # Crawled pages are kept in a temporary web cache
+        self.temp_cache = tempfile.mkdtemp()
+        self.cache_dir_patcher = patch("manage_agenda.utils_web.CACHE_DIR", self.temp_cache)
+        self.cache_dir_patcher.start()
+
+    def tearDown(self):
+        self.cache_dir_patcher.stop()
+        shutil.rmtree(self.temp_cache)
+
+    @staticmethod
+    def _fetch(pages):
+        def fetch(args, urls):
+            page = MagicMock()
+            post = pages.get(urls[0])
+            return page, [post] if post else None
+        return fetch
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    def test_crawl_follows_event_links(self, mock_get_pages):
+        listing = "https://venue.example/agenda"
+        mock_get_pages.side_effect = self._fetch({
+            listing: '<a href="/agenda/a">A</a><a href="/agenda/b">B</a><a href="/about">C</a>',
+            "https://venue.example/agenda/a": "<p>Event A</p>",
+            "https://venue.example/agenda/b": "<p>Event B</p>",
+        })
+
+        results = _crawl_event_pages(self.args, [listing], delay=0)
+
+        self.assertEqual(
+            [(url, post, origin) for url, _, post, origin in results],
+            [
+                ("https://venue.example/agenda/a", "<p>Event A</p>", listing),
+                ("https://venue.example/agenda/b", "<p>Event B</p>", listing),
+            ],
+        )
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    def test_crawl_uses_web_cache(self, mock_get_pages):
+        listing = "https://venue.example/agenda"
+        mock_get_pages.side_effect = self._fetch({
+            listing: '<a href="/agenda/a">A</a>',
+            "https://venue.example/agenda/a": "<title>Event A</title><p>Event A</p>",
+        })
+        _crawl_event_pages(self.args, [listing], delay=0)
+        self.assertEqual(mock_get_pages.call_count, 2)
+
+        mock_get_pages.reset_mock()
+        results = _crawl_event_pages(self.args, [listing], delay=0)
+        # Served from the cache, without page objects
+        mock_get_pages.assert_not_called()
+        self.assertEqual(
+            [(url, page, post) for url, page, post, _ in results],
+            [("https://venue.example/agenda/a", None, "<title>Event A</title><p>Event A</p>")],
+        )
+
+        _crawl_event_pages(self.args, [listing], delay=0, force_refresh=True)
+        self.assertEqual(mock_get_pages.call_count, 2)
+
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    def test_crawl_respects_max_pages_and_depth(self, mock_get_pages):
+        listing = "https://venue.example/agenda"
+        mock_get_pages.side_effect = self._fetch({
+            listing: '<a href="/agenda/a">A</a><a href="/agenda/b">B</a>',
+            "https://venue.example/agenda/a": '<a href="/agenda/a/more">More</a>',
+            "https://venue.example/agenda/b": "<p>Event B</p>",
+            "https://venue.example/agenda/a/more": "<p>More</p>",
+        })
+
+        self.assertEqual(len(_crawl_event_pages(self.args, [listing], max_pages=1, delay=0)), 1)
+        self.assertEqual(len(_crawl_event_pages(self.args, [listing], delay=0)), 2)
+        self.assertEqual(len(_crawl_event_pages(self.args, [listing], depth=2, delay=0)), 3)
+
+    @patch("manage_agenda.utils._crawl_event_pages")
+    @patch("manage_agenda.utils._get_pages_from_urls")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_process_web_cli_crawl(self, mock_process_flow, mock_get_pages, mock_crawl):
+        page = MagicMock()
+        page.getPostTitle.return_value = "Event A"
+        mock_crawl.return_value = [
+            ("https://venue.example/agenda/a", page, "<p>A</p>", "https://venue.example/agenda"),
+        ]
+        mock_process_flow.return_value = True
+
+        result = process_web_cli(
+            self.args, MagicMock(), urls=["https://venue.example/agenda"], crawl=True
+        )
+
+        self.assertTrue(result)
+        mock_get_pages.assert_not_called()
+        mock_crawl.assert_called_once_with(
+            self.args, ["https://venue.example/agenda"], depth=1, force_refresh=False
+        )
+        items = mock_process_flow.call_args[0][2]
+        self.assertEqual(items, ["<p>A</p>"])
+
+    @patch("manage_agenda.utils._get_links_from_notes")
+    @patch("manage_agenda.utils._get_note_manager")
+    @patch("manage_agenda.utils._crawl_event_pages")
+    @patch("manage_agenda.utils.reduce_html")
+    @patch("manage_agenda.utils.write_file")
+    @patch("manage_agenda.utils.print_first_10_lines")
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_crawled_pages_and_listing_note(
+        self,
+        mock_process_event,
+        mock_print_lines,
+        mock_write_file,
+        mock_reduce_html,
+        mock_crawl,
+        mock_get_manager,
+        mock_get_links,
+    ):
+        listing = "https://venue.example/agenda"
+        mock_get_links.return_value = {listing: ["listing note"]}
+        mock_crawl.return_value = [
+            ("https://venue.example/agenda/a", None, "<title>A</title><p>A", listing),
+            ("https://venue.example/agenda/b", None, "<title>B</title><p>B", listing),
+        ]
+        steps = []
+        mock_get_manager.return_value.delete_note.side_effect = lambda title: steps.append(title)
+        mock_reduce_html.side_effect = lambda url, post, force_refresh=False: f"Text of {url}"
+
+        def process_event(args, model, content, *rest):
+            steps.append(content.split("\n")[0])
+            return {"summary": "Concert"}, "Calendar Event Created"
+
+        mock_process_event.side_effect = process_event
+
+        with patch("manage_agenda.utils.config.REDUCE_WORKERS", 1), patch(
+            "builtins.input", return_value=""
+        ):
+            self.assertTrue(process_web_cli(self.args, MagicMock(), crawl=True))
+
+        # Every event page is extracted, and the listing note deleted once,
+        # after them
+        self.assertEqual(
+            steps,
+            [
+                "Url: https://venue.example/agenda/a",
+                "Url: https://venue.example/agenda/b",
+                "listing note",
+            ],
+        )
+
+    @patch("manage_agenda.utils._get_links_from_notes")
+    @patch("manage_agenda.utils._get_note_manager")
+    @patch("manage_agenda.utils._crawl_event_pages")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_listing_note_queued_once_for_review(
+        self, mock_process_flow, mock_crawl, mock_get_manager, mock_get_links
+    ):
+        listing = "https://venue.example/agenda"
+        mock_get_links.return_value = {listing: ["listing note"]}
+        mock_crawl.return_value = [
+            ("https://venue.example/agenda/a", None, "<p>A", listing),
+            ("https://venue.example/agenda/b", None, "<p>B", listing),
+        ]
+        cleanups = []
+
+        def side_effect(args, model, items, *rest, deferred_cleanup=None, **kwargs):
+            for i, item in enumerate(items):
+                cleanups.append(deferred_cleanup(item, i, f"id{i}")["notes"])
+            return True
+
+        mock_process_flow.side_effect = side_effect
+
+        with patch("manage_agenda.utils._review_queue", MagicMock()), patch(
+            "builtins.input", return_value=""
+        ):
+            process_web_cli(self.args, MagicMock(), crawl=True)
+
+        self.assertEqual(cleanups, [["listing note"], []])
+        mock_get_manager.return_value.delete_note.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,13 @@
 import datetime
+import os
+import shutil
 import sys
+import tempfile
+import threading
 import unittest
 from collections import namedtuple
 from email.utils import formatdate
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 from socialModules.configMod import select_from_list
 
@@ -13,14 +17,19 @@ from manage_agenda.utils import (
     authorize,
     create_event_dict,
     extract_json,
+    get_events_from_llm_in_chunks,
     list_emails_folder,
     list_events_folder,
     process_email_cli,
     process_event_data,
+    process_feed_cli,
+    process_txt_cli,
     safe_get,
     select_api_source,
     select_calendar,
     select_llm,
+    watch_email_cli,
+    watch_txt_cli,
 )
 
 # from manage_agenda.utils_base import select_from_list
@@ -32,6 +41,25 @@ class TestProcessEmailCli(unittest.TestCase):
             "args",
             ["interactive", "delete", "source", "verbose", "destination", "text"],
         )
+        # Process the whole folder, without touching the user's sync state
+        self.delta_patcher = patch(
+            "manage_agenda.utils.mailbox_delta", return_value=(None, None)
+        )
+        self.delta_patcher.start()
+        self.recent_patcher = patch("manage_agenda.utils.recent_positions", return_value=None)
+        self.recent_patcher.start()
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue_patcher = patch(
+            "manage_agenda.utils_mail.config.CLEANUP_QUEUE_FILE",
+            os.path.join(self.temp_dir, "cleanup_queue.json"),
+        )
+        self.queue_patcher.start()
+
+    def tearDown(self):
+        self.delta_patcher.stop()
+        self.recent_patcher.stop()
+        self.queue_patcher.stop()
+        shutil.rmtree(self.temp_dir)
 
     @patch("manage_agenda.utils.select_api_source")
     @patch("manage_agenda.utils.select_email_source")
@@ -74,6 +102,7 @@ class TestProcessEmailCli(unittest.TestCase):
 
         mock_api_src = MagicMock()
         mock_api_src.service = "gmail"
+        mock_api_src.getChannel.return_value = "zAgenda"
         mock_api_src.getLabels.return_value = [{"id": "Label_0"}]
         mock_api_src.getPosts.return_value = ["post_id"]
         mock_api_src.getPostId.return_value = "post_id"
@@ -110,7 +139,10 @@ class TestProcessEmailCli(unittest.TestCase):
         self.assertEqual(mock_write_file.call_count, 4)  # email, vcal, json, _times.json
         mock_select_calendar.assert_called_once()
         mock_api_dst.publishPost.assert_called_once()
-        mock_api_src.modifyLabels.assert_called_once()
+        # The label is removed at the end, in one batch
+        mock_api_src.getClient().users().messages().batchModify.assert_called_once_with(
+            userId="me", body={"ids": ["post_id"], "removeLabelIds": ["Label_0"]}
+        )
 
         self.Args = namedtuple(
             "args",
@@ -812,6 +844,18 @@ more text"""
 
         self.assertFalse(result)
 
+    def test_is_email_too_old_configured_window(self):
+        """Test _is_post_too_old uses MAX_POST_AGE_DAYS (0: no limit)."""
+        from manage_agenda.utils import _is_post_too_old
+
+        args = Args(interactive=False, verbose=False)
+        time_diff = datetime.timedelta(days=10)
+
+        with patch("manage_agenda.utils.config.MAX_POST_AGE_DAYS", 30):
+            self.assertFalse(_is_post_too_old(args, time_diff))
+        with patch("manage_agenda.utils.config.MAX_POST_AGE_DAYS", 0):
+            self.assertFalse(_is_post_too_old(args, time_diff))
+
     def test_create_llm_prompt(self):
         """Test _create_llm_prompt generates correct prompt."""
         from manage_agenda.utils import _create_llm_prompt
@@ -1238,6 +1282,1102 @@ more text"""
         self.assertEqual(mock_api_dst.publishPost.call_count, 2)
 
 
+class TestPublishOrUpdateEvent(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        patcher = patch(
+            "manage_agenda.utils.config.EVENT_MAP_FILE", f"{self.temp_dir}/event_map.json"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def event(start):
+        return {
+            "summary": "Concierto",
+            "location": "Auditorio",
+            "description": "",
+            "start": {"dateTime": start, "timeZone": "Europe/Madrid"},
+            "end": {"dateTime": "", "timeZone": ""},
+        }
+
+    def test_second_version_patches_the_event(self):
+        from manage_agenda.utils import _publish_or_update_event
+
+        api_dst = MagicMock()
+        api_dst.publishPost.return_value = {"id": "ev1"}
+
+        _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T20:00:00"), "page")
+        # Same event extracted again: nothing to do
+        _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T20:00:00"), "page")
+        api_dst.getClient.return_value.events.return_value.patch.assert_not_called()
+
+        _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T21:00:00"), "page")
+
+        api_dst.publishPost.assert_called_once()
+        api_dst.getClient.return_value.events.return_value.patch.assert_called_once_with(
+            calendarId="cal1",
+            eventId="ev1",
+            body={"start": {"dateTime": "2026-05-07T21:00:00", "timeZone": "Europe/Madrid"}},
+        )
+
+    def test_map_is_read_once(self):
+        from manage_agenda.utils import _publish_or_update_event
+        from manage_agenda.utils_events import EventMap
+
+        api_dst = MagicMock()
+        api_dst.publishPost.side_effect = [{"id": "ev1"}, {"id": "ev2"}]
+
+        with patch("manage_agenda.utils.EventMap", wraps=EventMap) as mock_map:
+            _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T20:00:00"), "a")
+            _publish_or_update_event(api_dst, "cal1", self.event("2026-05-08T20:00:00"), "b")
+
+        mock_map.assert_called_once()
+        saved = EventMap(f"{self.temp_dir}/event_map.json")
+        self.assertEqual([e["id"] for e in saved.events_for("b")], ["ev2"])
+
+    def test_pages_of_the_same_directory_are_not_matched(self):
+        from manage_agenda.utils import _publish_or_update_event
+        from manage_agenda.utils_web import page_item_id
+
+        api_dst = MagicMock()
+        api_dst.publishPost.side_effect = [{"id": "ev1"}, {"id": "ev2"}]
+        first = self.event("2026-05-07T20:00:00")
+        # Extracted without summary from another page
+        second = dict(self.event("2026-05-09T20:00:00"), summary="")
+
+        _publish_or_update_event(
+            api_dst, "cal1", first, page_item_id("https://venue.com/agenda/concierto-a")
+        )
+        _publish_or_update_event(
+            api_dst, "cal1", second, page_item_id("https://venue.com/agenda/concierto-b")
+        )
+
+        self.assertEqual(api_dst.publishPost.call_count, 2)
+        api_dst.getClient.return_value.events.return_value.patch.assert_not_called()
+
+    def test_without_event_id_events_are_created(self):
+        from manage_agenda.utils import _publish_or_update_event
+
+        api_dst = MagicMock()
+        api_dst.publishPost.return_value = "ok"
+
+        _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T20:00:00"), "page")
+        _publish_or_update_event(api_dst, "cal1", self.event("2026-05-07T20:00:00"), "page")
+
+        self.assertEqual(api_dst.publishPost.call_count, 2)
+
+
+class TestGetEventsFromLlmInChunks(unittest.TestCase):
+    @patch("manage_agenda.utils.get_event_from_llm_with_retry")
+    @patch("manage_agenda.utils.split_into_chunks")
+    def test_chunks_are_merged(self, mock_split, mock_get_event):
+        mock_split.return_value = ["chunk 1", "chunk 2", "chunk 3"]
+
+        def reply(model, prompt, args):
+            self.assertFalse(args.interactive)
+            if "chunk 1" in prompt:
+                return {"summary": "A", "start": {"dateTime": "2026-05-01T20:00"}}, {}, 3
+            if "chunk 2" in prompt:
+                return [
+                    {"summary": "A", "start": {"dateTime": "2026-05-01T20:00"}},
+                    {"summary": "B", "start": {"dateTime": "2026-05-02T20:00"}},
+                ], [], 5
+            return None, "MemoryError", 1
+
+        mock_get_event.side_effect = reply
+        args = Args(interactive=True, verbose=False)
+
+        events, vcal_json, elapsed = get_events_from_llm_in_chunks(
+            MagicMock(), "long text", datetime.datetime(2026, 5, 1), args
+        )
+
+        self.assertEqual([e["summary"] for e in events], ["A", "B"])
+        self.assertEqual(vcal_json, events)
+        self.assertEqual(elapsed, 5)
+
+    @patch("manage_agenda.utils.get_event_from_llm_with_retry")
+    @patch("manage_agenda.utils.split_into_chunks")
+    def test_no_events(self, mock_split, mock_get_event):
+        mock_split.return_value = ["chunk 1", "chunk 2"]
+        mock_get_event.return_value = (None, "MemoryError", 2)
+
+        events, vcal_json, elapsed = get_events_from_llm_in_chunks(
+            MagicMock(), "long text", datetime.datetime(2026, 5, 1), Args()
+        )
+
+        self.assertIsNone(events)
+        self.assertEqual(vcal_json, "MemoryError")
+
+
+class TestProcessFeedCli(unittest.TestCase):
+    def setUp(self):
+        self.args = Args(interactive=False, verbose=False)
+
+    @patch("manage_agenda.utils.commit_feeds")
+    @patch("manage_agenda.utils.poll_feeds")
+    @patch("manage_agenda.utils.FeedState")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_new_entries_are_processed_then_committed(
+        self, mock_process_flow, mock_state_class, mock_poll, mock_commit
+    ):
+        from manage_agenda.utils_feed import FeedEntry
+
+        entry = FeedEntry(
+            "https://venue.example/rss", "venue-1", "Concert", "https://venue.example/concert",
+            "Fri, 16 Oct 2026 10:00:00 +0200", "Friday at 21:00",
+        )
+        validators = {"https://venue.example/rss": ('"v1"', None)}
+        mock_poll.return_value = ([entry], validators)
+        mock_process_flow.return_value = True
+
+        result = process_feed_cli(self.args, MagicMock(), feeds=["https://venue.example/rss"])
+
+        self.assertTrue(result)
+        items, metadata_extractor, content_extractor = mock_process_flow.call_args[0][2:5]
+        self.assertEqual(items, [entry])
+        self.assertEqual(
+            metadata_extractor(entry, 0),
+            (entry.post_id, "Concert", "Fri, 16 Oct 2026 10:00:00 +0200"),
+        )
+        content = content_extractor(entry, 0, "2026-10-16", "Concert")
+        self.assertIn("URL: https://venue.example/concert", content)
+        self.assertIn("Friday at 21:00", content)
+        mock_commit.assert_called_once_with(mock_state_class.return_value, validators, [entry])
+
+    @patch("manage_agenda.utils.commit_feeds")
+    @patch("manage_agenda.utils.poll_feeds")
+    @patch("manage_agenda.utils.FeedState")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_no_new_entries(self, mock_process_flow, mock_state_class, mock_poll, mock_commit):
+        mock_poll.return_value = ([], {"https://venue.example/rss": (None, None)})
+
+        result = process_feed_cli(self.args, MagicMock(), feeds=["https://venue.example/rss"])
+
+        self.assertFalse(result)
+        mock_process_flow.assert_not_called()
+        mock_commit.assert_called_once()
+
+
+class TestProcessEmailCliBodies(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sync_file = os.path.join(self.temp_dir, "mail_sync.json")
+        self.sync_file_patcher = patch(
+            "manage_agenda.utils_mail.config.MAIL_SYNC_FILE", self.sync_file
+        )
+        self.sync_file_patcher.start()
+        self.queue_file = os.path.join(self.temp_dir, "cleanup_queue.json")
+        self.queue_file_patcher = patch(
+            "manage_agenda.utils_mail.config.CLEANUP_QUEUE_FILE", self.queue_file
+        )
+        self.queue_file_patcher.start()
+        self.recent_patcher = patch("manage_agenda.utils.recent_positions", return_value=None)
+        self.mock_recent = self.recent_patcher.start()
+
+    def tearDown(self):
+        self.sync_file_patcher.stop()
+        self.queue_file_patcher.stop()
+        self.recent_patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    @patch("manage_agenda.utils.mailbox_delta", return_value=(None, None))
+    @patch("manage_agenda.utils.fetch_email_bodies")
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_bodies_are_fetched_in_bulk(
+        self, mock_process_flow, mock_get_emails, mock_fetch, mock_delta
+    ):
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getPostBody.return_value = "Body read alone"
+        mock_get_emails.return_value = (api_src, ["post0", "post1"])
+        mock_fetch.return_value = {0: "<p>Body from batch</p>\n\n-- \nSignature"}
+
+        process_email_cli(Args(interactive=False), MagicMock(), source_name="source")
+
+        mock_fetch.assert_called_once_with(api_src, ["post0", "post1"], [0, 1])
+        content_extractor = mock_process_flow.call_args[0][4]
+        # Normalized before extraction
+        self.assertIn("Message: Body from batch\n", content_extractor("post0", 0, "2026-10-16", "A"))
+        api_src.getPostBody.assert_not_called()
+        # Messages missing from the batch are read one by one
+        self.assertIn("Message: Body read alone", content_extractor("post1", 1, "2026-10-16", "B"))
+
+    @patch("manage_agenda.utils.folder_message_ids", return_value=(None, None))
+    @patch("manage_agenda.utils.mailbox_delta", return_value=(None, None))
+    @patch("manage_agenda.utils.fetch_email_bodies", return_value={})
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._delete_email")
+    def test_connection_is_not_shared_at_once(
+        self, mock_delete, mock_get_emails, mock_fetch, mock_delta, mock_ids
+    ):
+        from manage_agenda.utils import _EmailBatch
+
+        api_src = MagicMock()
+        api_src.service = "imap"
+        mock_get_emails.return_value = (api_src, ["post0", "post1"])
+        batch = _EmailBatch(Args(interactive=False, delete=True), "source", None)
+        held = []
+        api_src.getPostBody.side_effect = lambda post: held.append(batch.lock.locked()) or "Body"
+        mock_delete.side_effect = lambda *args, **kwargs: held.append(batch.lock.locked())
+
+        # Body read in a content worker, message deleted in the calling thread
+        worker = threading.Thread(
+            target=batch.content_extractor, args=("post0", 0, "2026-10-16", "A")
+        )
+        worker.start()
+        batch.item_cleaner("post1", 1, "id1")
+        worker.join()
+
+        self.assertEqual(held, [True, True])
+        self.assertFalse(batch.lock.locked())
+
+    @patch("manage_agenda.utils.folder_message_ids", return_value=(None, None))
+    @patch("manage_agenda.utils.mailbox_delta")
+    @patch("manage_agenda.utils.fetch_email_bodies", return_value={})
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._delete_email")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_only_new_messages_are_processed(
+        self, mock_process_flow, mock_delete, mock_get_emails, mock_fetch, mock_delta, mock_ids
+    ):
+        from manage_agenda.utils_mail import MailSyncState
+
+        api_src = MagicMock()
+        api_src.service = "imap"
+        mock_get_emails.return_value = (api_src, ["post0", "post1", "post2"])
+        mock_delta.return_value = ([2], {"uidvalidity": 1, "uidnext": 13})
+        state = MailSyncState()
+        state.update("source", {"uidvalidity": 1, "uidnext": 12})
+        state.save()
+
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner, **kwargs
+        ):
+            self.assertEqual(items, ["post2"])
+            item_cleaner("post2", 0, "id2")
+            return True
+
+        mock_process_flow.side_effect = side_effect
+
+        self.assertTrue(process_email_cli(Args(interactive=False), MagicMock(), source_name="source"))
+
+        self.assertEqual(mock_delta.call_args[0][2]["uidnext"], 12)
+        # Without UIDs, deleted by its position in the folder
+        self.assertEqual(mock_delete.call_args[0][2], 3)
+        self.assertEqual(MailSyncState().get("source")["uidnext"], 13)
+
+    @patch("manage_agenda.utils.mailbox_delta")
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_cursor_is_kept_when_processing_fails(
+        self, mock_process_flow, mock_get_emails, mock_delta
+    ):
+        from manage_agenda.utils_mail import MailSyncState
+
+        mock_get_emails.return_value = (MagicMock(), ["post0"])
+        mock_delta.return_value = (None, {"history_id": "200"})
+        mock_process_flow.side_effect = RuntimeError("LLM unavailable")
+
+        with self.assertRaises(RuntimeError):
+            process_email_cli(Args(interactive=False), MagicMock(), source_name="source")
+        self.assertEqual(MailSyncState().get("source"), {})
+
+    @patch("manage_agenda.utils.mailbox_delta")
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_force_refresh_is_a_full_resync(self, mock_process_flow, mock_get_emails, mock_delta):
+        from manage_agenda.utils_mail import MailSyncState
+
+        state = MailSyncState()
+        state.update("source", {"history_id": "100"})
+        state.save()
+        mock_get_emails.return_value = (MagicMock(), ["post0"])
+        mock_delta.return_value = ([], {"history_id": "200"})
+
+        self.assertFalse(process_email_cli(Args(interactive=False), MagicMock(), source_name="source"))
+        self.assertEqual(mock_delta.call_args[0][2], {"history_id": "100", "synced": ANY})
+        mock_process_flow.assert_not_called()
+
+        process_email_cli(
+            Args(interactive=False), MagicMock(), source_name="source", force_refresh=True
+        )
+        self.assertEqual(mock_delta.call_args[0][2], {})
+
+    @patch("manage_agenda.utils.mailbox_delta", return_value=(None, None))
+    @patch("manage_agenda.utils.fetch_email_bodies", return_value={})
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_old_messages_are_not_downloaded(
+        self, mock_process_flow, mock_get_emails, mock_fetch, mock_delta
+    ):
+        api_src = MagicMock()
+        mock_get_emails.return_value = (api_src, ["post0", "post1", "post2"])
+        self.mock_recent.return_value = [2]
+
+        with patch("builtins.print") as mock_print:
+            process_email_cli(Args(interactive=True), MagicMock(), source_name="source")
+
+        mock_fetch.assert_called_once_with(api_src, ["post0", "post1", "post2"], [2])
+        self.assertEqual(mock_process_flow.call_args[0][2], ["post2"])
+        mock_print.assert_any_call("2 messages older than 7 days were not downloaded.")
+
+    @patch("manage_agenda.utils.mailbox_delta", return_value=(None, None))
+    @patch("manage_agenda.utils.fetch_email_bodies")
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_all_messages_old(self, mock_process_flow, mock_get_emails, mock_fetch, mock_delta):
+        mock_get_emails.return_value = (MagicMock(), ["post0"])
+        self.mock_recent.return_value = []
+
+        self.assertFalse(process_email_cli(Args(interactive=False), MagicMock(), source_name="source"))
+        mock_fetch.assert_not_called()
+        mock_process_flow.assert_not_called()
+
+
+class TestWatchEmailCli(unittest.TestCase):
+    @patch("manage_agenda.utils._watch_email_source")
+    def test_each_source_is_watched(self, mock_watch_source):
+        stop = threading.Event()
+        watched = []
+
+        def watch_source(args, model, source_name, rules, stop, lock, interval):
+            watched.append(source_name)
+            if len(watched) == 2:
+                stop.set()
+            stop.wait(5)
+
+        mock_watch_source.side_effect = watch_source
+        rules = MagicMock()
+
+        result = watch_email_cli(
+            Args(interactive=False), MagicMock(), rules=rules,
+            source_names=["gmail1", "imap1"], stop=stop,
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(sorted(watched), ["gmail1", "imap1"])
+
+    def test_no_sources(self):
+        rules = MagicMock()
+        rules.selectRule.return_value = []
+        self.assertFalse(watch_email_cli(Args(interactive=False), MagicMock(), rules=rules))
+
+    @patch("manage_agenda.utils.process_email_cli")
+    @patch("manage_agenda.utils.watch_imap")
+    def test_imap_source_is_watched_with_idle(self, mock_watch_imap, mock_process_email):
+        from manage_agenda.utils import _watch_email_source
+
+        api_src = MagicMock()
+        api_src.service = "imap"
+        api_src.getClient.return_value.select.return_value = ("OK", [b"3"])
+        rules = MagicMock()
+        rules.readConfigSrc.return_value = api_src
+        mock_process_email.side_effect = RuntimeError("LLM unavailable")
+
+        _watch_email_source(
+            Args(interactive=False), MagicMock(), "imap1", rules, threading.Event(), threading.Lock()
+        )
+
+        connect, on_new_mail, _ = mock_watch_imap.call_args[0]
+        self.assertIs(connect(), api_src.getClient.return_value)
+        api_src.getClient.return_value.select.assert_called_with("INBOX/zAgenda")
+        # Processing errors do not stop the watch
+        on_new_mail()
+        mock_process_email.assert_called_once()
+
+
+class TestEmailCleanupQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patchers = [
+            patch(
+                "manage_agenda.utils_mail.config.MAIL_SYNC_FILE",
+                os.path.join(self.temp_dir, "mail_sync.json"),
+            ),
+            patch(
+                "manage_agenda.utils_mail.config.CLEANUP_QUEUE_FILE",
+                os.path.join(self.temp_dir, "cleanup_queue.json"),
+            ),
+            patch("manage_agenda.utils.mailbox_delta", return_value=([1, 2], None)),
+            patch("manage_agenda.utils.folder_message_ids", return_value=([7, 8, 9], 1)),
+            patch("manage_agenda.utils.recent_positions", return_value=None),
+            patch("manage_agenda.utils.fetch_email_bodies", return_value={}),
+            patch("manage_agenda.utils._get_emails_from_folder"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.api_src = MagicMock()
+        self.api_src.service = "imap"
+        self.api_src.getChannel.return_value = "INBOX/zAgenda"
+        from manage_agenda import utils
+
+        utils._get_emails_from_folder.return_value = (self.api_src, ["post0", "post1", "post2"])
+        self.args = Args(interactive=False, delete=True)
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def flow(fail_after=None):
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner, **kwargs
+        ):
+            for i, item in enumerate(items):
+                if i == fail_after:
+                    raise KeyboardInterrupt
+                item_cleaner(item, i, f"id{i}")
+            return True
+
+        return side_effect
+
+    @patch("manage_agenda.utils.remove_messages", return_value=2)
+    @patch("manage_agenda.utils._delete_email")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_removed_in_bulk_at_the_end(self, mock_process_flow, mock_delete, mock_remove):
+        from manage_agenda.utils_mail import CleanupQueue
+
+        mock_process_flow.side_effect = self.flow()
+
+        process_email_cli(self.args, MagicMock(), source_name="imap1")
+
+        mock_delete.assert_not_called()
+        mock_remove.assert_called_once_with(self.api_src, "INBOX/zAgenda", [8, 9], 1)
+        self.assertEqual(CleanupQueue().pending("imap1"), {})
+
+    @patch("manage_agenda.utils.remove_messages", return_value=2)
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_interrupted_run_is_resumed(self, mock_process_flow, mock_remove):
+        from manage_agenda.utils_mail import CleanupQueue
+
+        mock_process_flow.side_effect = self.flow(fail_after=1)
+        with self.assertRaises(KeyboardInterrupt):
+            process_email_cli(self.args, MagicMock(), source_name="imap1")
+        self.assertEqual(CleanupQueue().pending("imap1")["ids"], [8])
+        mock_remove.assert_not_called()
+
+        # The queued message was processed: it is not extracted again
+        mock_process_flow.side_effect = self.flow()
+        process_email_cli(self.args, MagicMock(), source_name="imap1")
+        self.assertEqual(mock_process_flow.call_args[0][2], ["post2"])
+        mock_remove.assert_called_once_with(self.api_src, "INBOX/zAgenda", [8, 9], 1)
+
+    @patch("manage_agenda.utils.remove_messages", side_effect=OSError("Connection reset"))
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_failed_removal_is_kept(self, mock_process_flow, mock_remove):
+        from manage_agenda.utils_mail import CleanupQueue
+
+        mock_process_flow.side_effect = self.flow()
+        process_email_cli(self.args, MagicMock(), source_name="imap1")
+        self.assertEqual(CleanupQueue().pending("imap1")["ids"], [8, 9])
+
+    @patch("manage_agenda.utils.input", return_value="n")
+    @patch("manage_agenda.utils.remove_messages")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_interactive_confirmation_once(self, mock_process_flow, mock_remove, mock_input):
+        from manage_agenda.utils_mail import CleanupQueue
+
+        mock_process_flow.side_effect = self.flow()
+        process_email_cli(Args(interactive=True), MagicMock(), source_name="imap1")
+
+        mock_input.assert_called_once()
+        mock_remove.assert_not_called()
+        self.assertEqual(CleanupQueue().pending("imap1"), {})
+
+    @patch("manage_agenda.utils.remove_messages", return_value=2)
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_flushed_when_folder_is_empty(self, mock_process_flow, mock_remove):
+        from manage_agenda import utils
+        from manage_agenda.utils_mail import CleanupQueue
+
+        queue = CleanupQueue()
+        queue.add("imap1", "INBOX/zAgenda", 8, 1)
+        queue.add("imap1", "INBOX/zAgenda", 9, 1)
+        utils._get_emails_from_folder.return_value = (self.api_src, None)
+
+        self.assertFalse(process_email_cli(self.args, MagicMock(), source_name="imap1"))
+
+        mock_process_flow.assert_not_called()
+        mock_remove.assert_called_once_with(self.api_src, "INBOX/zAgenda", [8, 9], 1)
+        self.assertEqual(CleanupQueue().pending("imap1"), {})
+
+
+class TestProcessAllEmailCli(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patchers = [
+            patch(
+                "manage_agenda.utils_mail.config.MAIL_SYNC_FILE",
+                os.path.join(self.temp_dir, "mail_sync.json"),
+            ),
+            patch(
+                "manage_agenda.utils_mail.config.CLEANUP_QUEUE_FILE",
+                os.path.join(self.temp_dir, "cleanup_queue.json"),
+            ),
+            patch("manage_agenda.utils.recent_positions", return_value=None),
+            patch("manage_agenda.utils.folder_message_ids", return_value=(None, None)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.rules = MagicMock()
+        self.sources = {}
+        for name, service in (("gmail1", "gmail"), ("imap1", "imap"), ("broken", "imap")):
+            api_src = MagicMock()
+            api_src.service = service
+            api_src.getPostTitle.side_effect = lambda post: post
+            self.sources[name] = api_src
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def get_emails(self, args, source_name, rules=None):
+        if source_name == "broken":
+            raise OSError("Authentication failed")
+        posts = {"gmail1": ["g0", "g1"], "imap1": ["i0"]}[source_name]
+        return self.sources[source_name], posts
+
+    @patch("manage_agenda.utils._delete_email")
+    @patch("manage_agenda.utils.mailbox_delta")
+    @patch("manage_agenda.utils.fetch_email_bodies")
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._get_email_sources", return_value=["gmail1", "imap1", "broken"])
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_accounts_merged_in_one_queue(
+        self, mock_process_flow, mock_sources, mock_get_emails, mock_fetch, mock_delta, mock_delete
+    ):
+        from manage_agenda.utils import process_all_email_cli
+        from manage_agenda.utils_mail import MailSyncState
+
+        mock_get_emails.side_effect = self.get_emails
+        mock_fetch.side_effect = lambda api_src, posts, positions: {
+            n: f"Body {posts[n]}" for n in positions
+        }
+        mock_delta.side_effect = lambda api_src, posts, cursor: (
+            None,
+            {"history_id": "7"} if api_src.service == "gmail" else {"uidvalidity": 1, "uidnext": 5},
+        )
+        seen = []
+
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner, **kwargs
+        ):
+            for i, item in enumerate(items):
+                post_id, title, _ = metadata_extractor(item, i)
+                seen.append((title, content_extractor(item, i, "2026-10-19", title)))
+                item_cleaner(item, i, post_id)
+            return True
+
+        mock_process_flow.side_effect = side_effect
+
+        self.assertTrue(process_all_email_cli(Args(delete=True), MagicMock(), rules=self.rules))
+
+        # One extraction queue with the messages of the accounts that could be read
+        mock_process_flow.assert_called_once()
+        self.assertEqual([title for title, _ in seen], ["g0", "g1", "i0"])
+        self.assertIn("Message: Body i0\n", seen[2][1])
+        # Removed from the account each message came from
+        self.assertEqual(
+            [(c[0][1], c[0][2]) for c in mock_delete.call_args_list],
+            [
+                (self.sources["gmail1"], self.sources["gmail1"].getPostIdM("g0")),
+                (self.sources["gmail1"], self.sources["gmail1"].getPostIdM("g1")),
+                (self.sources["imap1"], 1),
+            ],
+        )
+        self.assertEqual(MailSyncState().get("gmail1")["history_id"], "7")
+        self.assertEqual(MailSyncState().get("imap1")["uidnext"], 5)
+        self.assertEqual(MailSyncState().get("broken"), {})
+
+    @patch("manage_agenda.utils.mailbox_delta", return_value=([], None))
+    @patch("manage_agenda.utils._get_emails_from_folder")
+    @patch("manage_agenda.utils._get_email_sources", return_value=["gmail1", "imap1"])
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_nothing_new(self, mock_process_flow, mock_sources, mock_get_emails, mock_delta):
+        from manage_agenda.utils import process_all_email_cli
+
+        mock_get_emails.side_effect = self.get_emails
+
+        self.assertFalse(process_all_email_cli(Args(), MagicMock(), rules=self.rules))
+        mock_process_flow.assert_not_called()
+
+    @patch("manage_agenda.utils.ensure_rules")
+    def test_shared_calendar_clients(self, mock_ensure_rules):
+        from manage_agenda.utils import select_api_source, shared_api_sources
+
+        rules = mock_ensure_rules.return_value
+        rules.selectRule.return_value = ["calendar1"]
+        rules.readConfigSrc.side_effect = lambda *args: MagicMock()
+        args = Args(interactive=False)
+
+        with shared_api_sources():
+            first = select_api_source(args, "gcalendar", title="Concert")
+            second = select_api_source(args, "gcalendar", title="Talk")
+        self.assertIs(first, second)
+        self.assertEqual(rules.readConfigSrc.call_count, 1)
+
+        # Outside the block, the source is read again
+        self.assertIsNot(select_api_source(args, "gcalendar"), first)
+
+
+class TxtDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.txt_dir = os.path.join(self.temp_dir, "msgs")
+        os.mkdir(self.txt_dir)
+        self.patchers = [
+            patch("manage_agenda.utils.config.MSG_TXT_DIR", self.txt_dir),
+            patch(
+                "manage_agenda.utils_txt.config.TXT_MANIFEST_FILE",
+                os.path.join(self.temp_dir, "txt_manifest.json"),
+            ),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, subject, mtime):
+        path = os.path.join(self.txt_dir, name)
+        with open(path, "w") as f:
+            f.write(f"From: venue\nSubject: {subject}\n\nBody\nDate: 2026-10-19")
+        os.utime(path, (mtime, mtime))
+
+
+class TestProcessTxtCli(TxtDirTestCase):
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_processed_files_are_skipped_next_run(self, mock_process_flow):
+        self.write("b.txt", "Talk", 2000)
+        self.write("a.txt", "Concert", 1000)
+        titles = []
+
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner, **kwargs
+        ):
+            for i, item in enumerate(items):
+                post_id, title, _ = metadata_extractor(item, i)
+                titles.append(title)
+                if title == "Concert":
+                    item_cleaner(item, i, post_id)
+            return True
+
+        mock_process_flow.side_effect = side_effect
+
+        self.assertTrue(process_txt_cli(Args(), MagicMock()))
+        self.assertEqual(titles, ["Concert", "Talk"])
+
+        titles.clear()
+        process_txt_cli(Args(), MagicMock())
+        # Talk produced no event: it is tried again
+        self.assertEqual(titles, ["Talk"])
+
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_empty_folder(self, mock_process_flow):
+        self.assertFalse(process_txt_cli(Args(), MagicMock()))
+        mock_process_flow.assert_not_called()
+
+
+class TestWatchTxtCli(TxtDirTestCase):
+    @patch("manage_agenda.utils.watch_directory")
+    @patch("manage_agenda.utils._process_common_flow")
+    def test_only_new_files_are_read(self, mock_process_flow, mock_watch_directory):
+        from manage_agenda import utils
+        from manage_agenda.utils_txt import TxtManifest
+
+        self.write("a.txt", "Concert", 1000)
+        self.write("b.txt", "Talk", 2000)
+        batches = []
+
+        def side_effect(
+            args, model, items, metadata_extractor, content_extractor, item_cleaner, **kwargs
+        ):
+            # Calendar clients are shared while watching
+            self.assertIsNotNone(utils._api_source_cache)
+            batch = []
+            for i, item in enumerate(items):
+                post_id, title, _ = metadata_extractor(item, i)
+                batch.append(title)
+                item_cleaner(item, i, post_id)
+            batches.append(batch)
+            return True
+
+        def watch(directory, on_files, stop, poll_interval=None):
+            self.assertEqual(directory, self.txt_dir)
+            on_files([os.path.join(self.txt_dir, "a.txt")])
+            # a.txt closed again without changes: already processed
+            on_files([os.path.join(self.txt_dir, "a.txt"), os.path.join(self.txt_dir, "b.txt")])
+            raise KeyboardInterrupt
+
+        mock_process_flow.side_effect = side_effect
+        mock_watch_directory.side_effect = watch
+        model = MagicMock()
+
+        self.assertTrue(watch_txt_cli(Args(), model))
+
+        self.assertEqual(batches, [["Concert"], ["Talk"]])
+        self.assertIs(mock_process_flow.call_args[0][1], model)
+        self.assertIsNone(utils._api_source_cache)
+        self.assertEqual(len(TxtManifest(self.txt_dir).files), 2)
+
+class TestProcessCommonFlow(unittest.TestCase):
+    def setUp(self):
+        self.patchers = [
+            patch("manage_agenda.utils.write_file"),
+            patch("manage_agenda.utils.print_first_10_lines"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.threads = {}
+        self.cleaned = []
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def run_flow(self, args, mock_llm):
+        from manage_agenda.utils import _process_common_flow
+
+        def metadata_extractor(item, i):
+            return f"id{i}", item, datetime.datetime.now()
+
+        def content_extractor(item, i, post_date_time, post_title):
+            self.threads.setdefault("content", set()).add(threading.current_thread().name)
+            return None if item == "empty" else f"Subject: {item}"
+
+        def llm(args, model, content_text, post_date_time, post_id, post_title):
+            self.threads.setdefault("extract", set()).add(threading.current_thread().name)
+            return [{"summary": post_title}], None
+
+        def item_cleaner(item, i, post_id):
+            self.threads.setdefault("cleanup", set()).add(threading.current_thread().name)
+            self.cleaned.append((item, i, post_id))
+
+        mock_llm.side_effect = llm
+        return _process_common_flow(
+            args,
+            MagicMock(),
+            iter(["concert", "empty", "talk"]),
+            metadata_extractor,
+            content_extractor,
+            item_cleaner,
+        )
+
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_staged(self, mock_llm):
+        self.assertTrue(self.run_flow(Args(interactive=False), mock_llm))
+
+        self.assertEqual(self.cleaned, [("concert", 0, "id0"), ("talk", 2, "id2")])
+        self.assertEqual(mock_llm.call_count, 2)
+        main = threading.current_thread().name
+        self.assertNotIn(main, self.threads["content"] | self.threads["extract"])
+        # Cleaners run in the calling thread
+        self.assertEqual(self.threads["cleanup"], {main})
+
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_interactive_in_sequence(self, mock_llm):
+        self.assertTrue(self.run_flow(Args(interactive=True), mock_llm))
+
+        self.assertEqual(self.cleaned, [("concert", 0, "id0"), ("talk", 2, "id2")])
+        main = threading.current_thread().name
+        self.assertEqual(set().union(*self.threads.values()), {main})
+
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    def test_no_events(self, mock_llm):
+        from manage_agenda.utils import _process_common_flow
+
+        mock_llm.return_value = (None, None)
+        self.assertFalse(
+            _process_common_flow(
+                Args(),
+                MagicMock(),
+                ["concert"],
+                lambda item, i: ("id", item, datetime.datetime.now()),
+                lambda item, i, date, title: "Subject: concert",
+                lambda item, i, post_id: self.fail("Nothing to clean"),
+            )
+        )
+
+
+def _candidate_events(summary="Concert"):
+    return [{"summary": summary, "start": {"dateTime": "2026-03-10T19:00:00+01:00"}}]
+
+
+class TestDeferredReview(unittest.TestCase):
+    def setUp(self):
+        from manage_agenda.utils_review import ReviewQueue
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = ReviewQueue(os.path.join(self.temp_dir, "review_queue.json"))
+        self.now = datetime.datetime.now().replace(microsecond=0)
+        self.patchers = [
+            patch("manage_agenda.utils.write_file"),
+            patch("manage_agenda.utils.print_first_10_lines"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    @patch("builtins.input", side_effect=AssertionError("No questions in deferred mode"))
+    @patch("manage_agenda.utils._process_event_with_llm_and_calendar")
+    @patch("manage_agenda.utils._extract_event_with_llm_retry")
+    def test_candidates_queued(self, mock_extract, mock_publish, mock_input):
+        from manage_agenda.utils import _process_common_flow, deferred_review
+
+        mock_extract.return_value = (_candidate_events(), None, 1.0, True, False, False)
+        cleaned = []
+        with deferred_review(self.queue):
+            result = _process_common_flow(
+                Args(interactive=True),
+                MagicMock(),
+                ["concert", "talk"],
+                lambda item, i: (f"id{i}", item, self.now),
+                lambda item, i, date, title: f"Subject: {item}",
+                lambda item, i, post_id: cleaned.append(post_id),
+                deferred_cleanup=lambda item, i, post_id: {"txt": {"dir": "d", "name": item}},
+            )
+
+        self.assertTrue(result)
+        mock_publish.assert_not_called()
+        # Extracted without -i: no prompts for the dates or the fallbacks
+        self.assertFalse(mock_extract.call_args[0][0].interactive)
+        # Cleaned only once accepted in the review
+        self.assertEqual(cleaned, [])
+        candidates = self.queue.pending()
+        self.assertEqual([c["source"] for c in candidates], ["id0", "id1"])
+        self.assertEqual(candidates[1]["cleanup"], {"txt": {"dir": "d", "name": "talk"}})
+        self.assertEqual(candidates[0]["content"], "Subject: concert")
+        self.assertTrue(candidates[0]["reference"].startswith(self.now.isoformat()))
+        self.assertIn("ai_model_used", candidates[0]["events"][0]["extendedProperties"]["private"])
+
+    @patch("manage_agenda.utils._extract_event_with_llm_retry")
+    def test_failed_extraction_not_queued(self, mock_extract):
+        from manage_agenda.utils import _process_common_flow, deferred_review
+
+        mock_extract.return_value = (None, None, 1.0, False, False, False)
+        with deferred_review(self.queue):
+            result = _process_common_flow(
+                Args(),
+                MagicMock(),
+                ["concert"],
+                lambda item, i: ("id", item, self.now),
+                lambda item, i, date, title: "Subject: concert",
+                lambda item, i, post_id: self.fail("Nothing to clean"),
+            )
+
+        self.assertFalse(result)
+        self.assertEqual(self.queue.pending(), [])
+
+
+class TestReviewCli(unittest.TestCase):
+    def setUp(self):
+        from manage_agenda.utils_review import ReviewQueue
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = ReviewQueue(os.path.join(self.temp_dir, "review_queue.json"))
+        for source in ("msg1", "msg2"):
+            self.queue.add(
+                source, f"Title {source}", "Subject: concert", datetime.datetime(2026, 3, 1),
+                _candidate_events(),
+            )
+        self.args = Args(interactive=True)
+        self.patchers = [
+            patch("manage_agenda.utils.select_api_source"),
+            patch("manage_agenda.utils.select_calendar", return_value="cal"),
+            patch("manage_agenda.utils._publish_or_update_event"),
+            patch("manage_agenda.utils.write_file"),
+        ]
+        self.mock_api, self.mock_calendar, self.mock_publish, _ = [
+            patcher.start() for patcher in self.patchers
+        ]
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def review(self, answers, model=None):
+        from manage_agenda.utils import review_cli
+
+        with patch("builtins.input", side_effect=answers):
+            return review_cli(self.args, model, review_queue=self.queue)
+
+    def published(self):
+        return [(c[0][2]["summary"], c[0][3]) for c in self.mock_publish.call_args_list]
+
+    def test_accept_and_skip(self):
+        self.assertTrue(self.review(["a", "s"]))
+
+        self.assertEqual(self.published(), [("Concert", "msg1")])
+        # One calendar for all the accepted events
+        self.mock_calendar.assert_called_once()
+        self.assertEqual(self.queue.candidates, [])
+
+    def test_edit(self):
+        # New summary, dates confirmed, then accepted
+        self.review(["e", "Jazz concert", "s", "a", "a"])
+
+        self.assertEqual(self.published(), [("Jazz concert", "msg1"), ("Concert", "msg2")])
+        self.mock_calendar.assert_called_once()
+
+    @patch("manage_agenda.utils._extract_event_with_llm_retry")
+    def test_retry(self, mock_extract):
+        mock_extract.return_value = (_candidate_events("Talk"), None, 2.0, True, False, False)
+
+        self.review(["r", "a", "s"], model=MagicMock())
+
+        self.assertEqual(self.published(), [("Talk", "msg1")])
+        args, model, content, reference, source, title = mock_extract.call_args[0]
+        self.assertTrue(args.interactive)
+        self.assertEqual(content, "Subject: concert")
+        self.assertEqual(reference, datetime.datetime(2026, 3, 1))
+        self.assertEqual((source, title), ("msg1", "Title msg1"))
+
+    def test_quit_keeps_pending(self):
+        self.review(["a", "q"])
+
+        self.assertEqual(self.published(), [("Concert", "msg1")])
+        self.assertEqual([c["source"] for c in self.queue.pending()], ["msg2"])
+
+    def test_publish_error_kept(self):
+        import googleapiclient.errors
+
+        self.mock_publish.side_effect = googleapiclient.errors.HttpError(MagicMock(), b"error")
+        self.assertFalse(self.review(["a", "a"]))
+
+        self.assertEqual(len(self.queue.accepted()), 2)
+
+    @patch("manage_agenda.utils.CleanupQueue")
+    def test_cleaned_when_accepted(self, mock_cleanup_queue):
+        message = {"account": "gmail1", "folder": "agenda", "id": "m1", "uidvalidity": None}
+        for n, candidate in enumerate(self.queue.pending()):
+            self.queue.set_cleanup(candidate["source"], {"email": dict(message, id=f"m{n}")})
+
+        self.review(["s", "a"])
+
+        # The skipped message is left in the folder, to be extracted again
+        mock_cleanup_queue.return_value.add.assert_called_once_with("gmail1", "agenda", "m1", None)
+
+    @patch("manage_agenda.utils.TxtManifest")
+    def test_txt_not_published(self, mock_manifest):
+        self.queue.add("/msgs/1.txt", "Text", "Subject: t", None, _candidate_events())
+        self.queue.set_cleanup("/msgs/1.txt", {"txt": {"dir": "/msgs", "name": "1.txt"}})
+
+        self.review(["s", "s", "a"])
+
+        mock_manifest.assert_called_once_with("/msgs")
+        mock_manifest.return_value.mark_processed.assert_called_once_with("1.txt")
+        self.mock_publish.assert_not_called()
+        self.mock_calendar.assert_not_called()
+        self.assertEqual(self.queue.candidates, [])
+
+    def test_nothing_to_review(self):
+        self.queue.candidates = []
+        self.assertFalse(self.review([]))
+
+
+class TestResumeRun(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "run_journal.jsonl")
+        self.now = datetime.datetime.now()
+        self.cleaned = []
+        self.patchers = [
+            patch("manage_agenda.utils.write_file"),
+            patch("manage_agenda.utils.print_first_10_lines"),
+            patch("manage_agenda.utils.select_api_source"),
+            patch("manage_agenda.utils.select_calendar", return_value="cal"),
+            patch("manage_agenda.utils._publish_or_update_event"),
+            patch("manage_agenda.utils._extract_event_with_llm_retry"),
+        ]
+        mocks = [patcher.start() for patcher in self.patchers]
+        self.mock_publish, self.mock_extract = mocks[-2:]
+        self.mock_extract.side_effect = lambda args, model, content, *rest: (
+            _candidate_events(content), None, 1.0, True, False, False
+        )
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def run_flow(self, resume=False, item_cleaner=None):
+        from manage_agenda.utils import _process_common_flow, run_journal
+        from manage_agenda.utils_journal import RunJournal
+
+        with run_journal(journal=RunJournal(self.path, resume=resume)):
+            return _process_common_flow(
+                Args(),
+                MagicMock(),
+                ["concert", "talk"],
+                lambda item, i: (f"id{i}", item, self.now),
+                lambda item, i, date, title: item,
+                item_cleaner or (lambda item, i, post_id: self.cleaned.append(post_id)),
+            )
+
+    def published(self):
+        return [c[0][2]["summary"] for c in self.mock_publish.call_args_list]
+
+    def test_resume_after_interruption(self):
+        def network_drop(item, i, post_id):
+            if item == "talk":
+                raise ConnectionError("network drop")
+            self.cleaned.append(post_id)
+
+        with self.assertRaises(ConnectionError):
+            self.run_flow(item_cleaner=network_drop)
+        self.assertEqual(self.published(), ["concert", "talk"])
+        self.assertEqual(self.cleaned, ["id0"])
+        self.assertTrue(os.path.exists(self.path))
+
+        self.mock_extract.reset_mock()
+        self.mock_publish.reset_mock()
+        self.assertTrue(self.run_flow(resume=True))
+
+        # Only the cleaning of the interrupted item is left
+        self.mock_extract.assert_not_called()
+        self.mock_publish.assert_not_called()
+        self.assertEqual(self.cleaned, ["id0", "id1"])
+        # The run completed: nothing to resume
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_extracted_not_asked_again(self):
+        from manage_agenda.utils_journal import DONE, EXTRACTED, RunJournal
+
+        journal = RunJournal(self.path)
+        journal.record("id0", DONE)
+        journal.record("id1", EXTRACTED, _candidate_events("journaled talk"))
+
+        self.assertTrue(self.run_flow(resume=True))
+
+        self.mock_extract.assert_not_called()
+        self.assertEqual(self.published(), ["journaled talk"])
+        self.assertEqual(self.cleaned, ["id1"])
+
+    def test_without_resume_starts_over(self):
+        from manage_agenda.utils_journal import DONE, RunJournal
+
+        RunJournal(self.path).record("id0", DONE)
+
+        self.run_flow()
+
+        self.assertEqual(self.mock_extract.call_count, 2)
+        self.assertEqual(self.published(), ["concert", "talk"])
+
+
 if __name__ == "__main__":
     unittest.main()
 
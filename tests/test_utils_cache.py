@@ -0,0 +1,139 @@
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.append(".")
+
+from manage_agenda import utils_cache
+from manage_agenda.utils_cache import WebCache, atomic_write, compress, decompress
+
+
+class TestCompression(unittest.TestCase):
+    def test_gzip_roundtrip(self):
+        """Test that gzip-compressed data is detected and decompressed."""
+        data = b"<html>" + b"x" * 1000 + b"</html>"
+        compressed = compress(data, "gzip")
+        self.assertTrue(compressed.startswith(utils_cache.GZIP_MAGIC))
+        self.assertLess(len(compressed), len(data))
+        self.assertEqual(decompress(compressed), data)
+
+    def test_no_compression(self):
+        """Test that uncompressed entries are returned as they are."""
+        self.assertEqual(compress(b"plain", "none"), b"plain")
+        self.assertEqual(decompress(b"plain"), b"plain")
+
+    def test_zstd_falls_back_to_gzip(self):
+        """Test that asking for zstd without the module uses gzip."""
+        with patch.object(utils_cache, "zstandard", None):
+            compressed = compress(b"data", "zstd")
+            self.assertEqual(gzip.decompress(compressed), b"data")
+            self.assertTrue(compress(b"data", "auto").startswith(utils_cache.GZIP_MAGIC))
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_atomic_write_creates_dirs_and_leaves_no_temp_files(self):
+        path = os.path.join(self.temp_dir, "a", "b", "entry")
+        atomic_write(path, b"content")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"content")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["entry"])
+
+    def test_atomic_write_keeps_old_content_on_failure(self):
+        path = os.path.join(self.temp_dir, "entry")
+        atomic_write(path, b"old")
+        with patch("manage_agenda.utils_cache.os.replace", side_effect=OSError("boom")):
+            with self.assertRaises(OSError):
+                atomic_write(path, b"new")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"old")
+        self.assertEqual(os.listdir(self.temp_dir), ["entry"])
+
+
+class TestWebCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = WebCache(self.temp_dir, max_bytes=0, compression="gzip")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_set_and_get(self):
+        self.assertIsNone(self.cache.get("example.com/agenda"))
+        self.cache.set("example.com/agenda", "<html>Agenda</html>")
+        self.assertEqual(self.cache.get("example.com/agenda"), "<html>Agenda</html>")
+        self.assertTrue(self.cache.contains("example.com/agenda"))
+
+    def test_entries_are_sharded(self):
+        self.cache.set("example.com", "text")
+        path = self.cache.path_for("example.com")
+        relative = os.path.relpath(path, self.temp_dir).split(os.sep)
+        self.assertEqual(len(relative), 3)
+        self.assertEqual(relative[0], relative[2][:2])
+        self.assertEqual(relative[1], relative[2][2:4])
+
+    def test_corrupt_entry_is_discarded(self):
+        path = self.cache.path_for("bad")
+        atomic_write(path, utils_cache.GZIP_MAGIC + b"not really gzip")
+        self.assertIsNone(self.cache.get("bad"))
+        self.assertFalse(os.path.exists(path))
+
+    def test_delete(self):
+        self.cache.set("key", "value")
+        self.cache.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+        # Deleting a missing key is not an error
+        self.cache.delete("key")
+
+    def test_stats(self):
+        self.cache.set("one", "1")
+        self.cache.set("two", "2")
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["directory"], self.temp_dir)
+        self.assertGreater(stats["bytes"], 0)
+
+    def test_prune_evicts_least_recently_used(self):
+        for i, key in enumerate(["old", "used", "new"]):
+            self.cache.set(key, "x" * 100)
+            os.utime(self.cache.path_for(key), (1000 + i, 1000 + i))
+        # Reading an entry makes it the most recently used
+        self.cache.get("old")
+
+        entry_size = os.path.getsize(self.cache.path_for("new"))
+        removed, freed = self.cache.prune(max_bytes=2 * entry_size)
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(freed, entry_size)
+        self.assertFalse(self.cache.contains("used"))
+        self.assertTrue(self.cache.contains("old"))
+        self.assertTrue(self.cache.contains("new"))
+
+    def test_prune_zero_clears_cache(self):
+        self.cache.set("one", "1")
+        self.cache.set("two", "2")
+        removed, _ = self.cache.prune(max_bytes=0)
+        self.assertEqual(removed, 2)
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_set_enforces_budget(self):
+        cache = WebCache(self.temp_dir, compression="none", max_bytes=250)
+        for i in range(5):
+            cache.set(f"key{i}", "x" * 100)
+            os.utime(cache.path_for(f"key{i}"), (1000 + i, 1000 + i))
+        self.assertLessEqual(cache.stats()["bytes"], 250)
+        self.assertTrue(cache.contains("key4"))
+        self.assertFalse(cache.contains("key0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
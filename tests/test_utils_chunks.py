@@ -0,0 +1,108 @@
+import re
+import sys
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_chunks import merge_events, split_into_chunks
+
+
+def festival(sessions=30):
+    body = "\n".join(
+        f"{day} de mayo\nConcierto {day}: " + "texto " * 40 for day in range(1, sessions + 1)
+    )
+    return (
+        "Url: https://festival.example/programa\n"
+        "Subject: Festival\n"
+        f"Message: Programa\n{body}\n"
+        "Message date: 2026-05-01\n"
+    )
+
+
+def event(summary, start, location=""):
+    return {
+        "summary": summary,
+        "location": location,
+        "description": "",
+        "start": {"dateTime": start, "timeZone": ""},
+        "end": {"dateTime": "", "timeZone": ""},
+    }
+
+
+class TestSplitIntoChunks(unittest.TestCase):
+    def test_short_text_is_one_chunk(self):
+        text = "Subject: Concert\nMessage: Friday\nMessage date: 2026-05-01\n"
+        self.assertEqual(split_into_chunks(text, max_chars=1000), [text])
+
+    def test_chunks_keep_header_and_date(self):
+        chunks = split_into_chunks(festival(), max_chars=2000, overlap=300)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertTrue(chunk.startswith("Url: https://festival.example/programa\nSubject: Festival\nMessage:"))
+            self.assertTrue(chunk.endswith("Message date: 2026-05-01"))
+
+    def test_chunks_cover_everything_with_overlap(self):
+        chunks = split_into_chunks(festival(), max_chars=2000, overlap=300)
+        sessions = [re.findall(r"Concierto (\d+)", chunk) for chunk in chunks]
+        found = {int(s) for chunk in sessions for s in chunk}
+        self.assertEqual(found, set(range(1, 31)))
+        for previous, following in zip(sessions, sessions[1:]):
+            self.assertEqual(previous[-1], following[0])
+
+    def test_chunks_start_at_dated_headings(self):
+        chunks = split_into_chunks(festival(), max_chars=2000, overlap=300)
+        for chunk in chunks[1:]:
+            body = chunk.split("Message:\n", 1)[1]
+            self.assertRegex(body, r"^\d+ de mayo")
+
+    def test_chunks_fit_the_limit(self):
+        header_and_trailer = len(
+            "Url: https://festival.example/programa\nSubject: Festival\nMessage:\n\n"
+            "Message date: 2026-05-01"
+        )
+        for chunk in split_into_chunks(festival(), max_chars=2000, overlap=300):
+            self.assertLessEqual(len(chunk) - header_and_trailer, 2000)
+
+    def test_long_lines_are_split(self):
+        text = "Message: " + "palabra " * 1000
+        chunks = split_into_chunks(text, max_chars=1000, overlap=0)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(" ".join(c.split("\n", 1)[1] for c in chunks).split(), text.split()[1:])
+
+
+class TestMergeEvents(unittest.TestCase):
+    def test_duplicates_from_overlaps_are_merged(self):
+        first = [event("Concierto 7", "2026-05-07T20:00:00", "Auditorio")]
+        second = [
+            event("concierto 7!", "2026-05-07T20:00", ""),
+            event("Concierto 8", "2026-05-08T20:00:00"),
+        ]
+        second[0]["description"] = "Jazz"
+
+        merged = merge_events([first, second])
+
+        self.assertEqual([e["summary"] for e in merged], ["Concierto 7", "Concierto 8"])
+        self.assertEqual(merged[0]["location"], "Auditorio")
+        self.assertEqual(merged[0]["description"], "Jazz")
+
+    def test_same_show_in_different_venues_is_kept(self):
+        merged = merge_events(
+            [
+                [event("Obra", "2026-05-07T20:00:00", "Teatro Principal")],
+                [event("Obra", "2026-05-07T20:00:00", "Sala Pequeña")],
+            ]
+        )
+        self.assertEqual(len(merged), 2)
+
+    def test_accents_and_case_are_ignored(self):
+        merged = merge_events(
+            [
+                [event("Canción de otoño", "2026-05-07T20:00:00", "Plaza Mayor")],
+                [event("CANCION DE OTOÑO", "2026-05-07T20:00:00", "plaza mayor")],
+            ]
+        )
+        self.assertEqual(len(merged), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
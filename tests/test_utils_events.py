@@ -0,0 +1,96 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_events import EventMap, created_event_id, event_changes
+
+
+def event(summary="Concierto", start="2026-05-07T20:00:00", location="Auditorio"):
+    return {
+        "summary": summary,
+        "location": location,
+        "description": "Message: ...",
+        "start": {"dateTime": start, "timeZone": "Europe/Madrid"},
+        "end": {"dateTime": "2026-05-07T22:00:00", "timeZone": "Europe/Madrid"},
+    }
+
+
+class TestEventChanges(unittest.TestCase):
+    def test_no_changes(self):
+        self.assertEqual(event_changes(event(), event()), {})
+
+    def test_changed_fields_only(self):
+        new = event(start="2026-05-07T21:00:00", location="Teatro")
+        new["description"] = "Something else"
+        self.assertEqual(
+            event_changes(event(), new),
+            {
+                "location": "Teatro",
+                "start": {"dateTime": "2026-05-07T21:00:00", "timeZone": "Europe/Madrid"},
+            },
+        )
+
+    def test_partial_extraction_keeps_missing_fields(self):
+        new = {
+            "summary": "",
+            "location": "",
+            "start": {"dateTime": "2026-05-07T21:30:00", "timeZone": ""},
+            "end": {"dateTime": "", "timeZone": ""},
+        }
+        self.assertEqual(
+            event_changes(event(), new),
+            {"start": {"dateTime": "2026-05-07T21:30:00", "timeZone": "Europe/Madrid"}},
+        )
+
+    def test_created_event_id(self):
+        self.assertEqual(created_event_id({"id": "abc", "status": "confirmed"}), "abc")
+        self.assertIsNone(created_event_id("Calendar event created"))
+        self.assertIsNone(created_event_id(None))
+
+
+class TestEventMap(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "event_map.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_add_and_find(self):
+        EventMap(self.path).add("example.com_agenda", "cal1", "ev1", event())
+
+        event_map = EventMap(self.path)
+        found = event_map.find("example.com_agenda", event(summary="CONCIERTO!"))
+        self.assertEqual((found["id"], found["calendar"]), ("ev1", "cal1"))
+        self.assertNotIn("description", found["event"])
+        self.assertIsNone(event_map.find("example.com_agenda", event(summary="Teatro")))
+        self.assertIsNone(event_map.find("other", event()))
+
+    def test_event_without_summary_matches_single_event(self):
+        event_map = EventMap(self.path)
+        event_map.add("source", "cal1", "ev1", event())
+        self.assertEqual(event_map.find("source", event(summary=""))["id"], "ev1")
+
+        event_map.add("source", "cal1", "ev2", event(summary="Teatro"))
+        self.assertIsNone(event_map.find("source", event(summary="")))
+
+    def test_update(self):
+        event_map = EventMap(self.path)
+        event_map.add("source", "cal1", "ev1", event())
+        entry = event_map.find("source", event())
+        event_map.update(entry, {"location": "Teatro"})
+
+        self.assertEqual(EventMap(self.path).events_for("source")[0]["event"]["location"], "Teatro")
+
+    def test_corrupt_map_starts_empty(self):
+        with open(self.path, "w") as f:
+            f.write("[oops")
+        self.assertEqual(EventMap(self.path).sources, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import urllib.error
+from unittest.mock import MagicMock, patch
+
+sys.path.append(".")
+
+from manage_agenda.utils_feed import (
+    FeedState,
+    commit_feeds,
+    fetch_feed,
+    parse_feed,
+    poll_feeds,
+    read_feed_list,
+)
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>Venue</title>
+  <item>
+    <title>Concert</title><link>https://venue.example/concert</link>
+    <guid>venue-1</guid><pubDate>Fri, 16 Oct 2026 10:00:00 +0200</pubDate>
+    <description>&lt;p&gt;Friday at &lt;b&gt;21:00&lt;/b&gt;&lt;/p&gt;</description>
+  </item>
+  <item>
+    <title>Theatre</title><link>https://venue.example/theatre</link>
+  </item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Blog</title>
+  <entry>
+    <title>Workshop</title>
+    <link rel="alternate" href="https://blog.example/workshop"/>
+    <id>tag:blog.example,2026:1</id>
+    <updated>2026-10-15T09:00:00Z</updated>
+    <summary>Saturday morning</summary>
+  </entry>
+</feed>"""
+
+ICAL = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+UID:event-1@venue.example\r
+DTSTAMP:20261015T080000Z\r
+DTSTART;TZID=Europe/Madrid:20261024T200000\r
+SUMMARY:Jazz night with a very long title that is folded into\r
+  two lines\r
+URL:https://venue.example/jazz\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+class TestParseFeed(unittest.TestCase):
+    def test_rss(self):
+        entries = parse_feed("https://venue.example/rss", RSS)
+        self.assertEqual([e.guid for e in entries], ["venue-1", "https://venue.example/theatre"])
+        self.assertEqual(entries[0].title, "Concert")
+        self.assertEqual(entries[0].text, "Friday at\n21:00")
+        self.assertEqual(entries[0].published, "Fri, 16 Oct 2026 10:00:00 +0200")
+
+    def test_atom(self):
+        (entry,) = parse_feed("https://blog.example/atom", ATOM)
+        self.assertEqual(entry.guid, "tag:blog.example,2026:1")
+        self.assertEqual(entry.link, "https://blog.example/workshop")
+        self.assertEqual(entry.text, "Saturday morning")
+        self.assertEqual(entry.published, "2026-10-15T09:00:00Z")
+
+    def test_ical(self):
+        (entry,) = parse_feed("https://venue.example/events.ics", ICAL)
+        self.assertEqual(entry.guid, "event-1@venue.example")
+        self.assertEqual(entry.title, "Jazz night with a very long title that is folded into two lines")
+        self.assertEqual(entry.link, "https://venue.example/jazz")
+        self.assertEqual(entry.published.year, 2026)
+        self.assertIn("DTSTART;TZID=Europe/Madrid:20261024T200000", entry.text)
+
+    def test_invalid_feed(self):
+        self.assertEqual(parse_feed("https://venue.example/rss", b"<html><p>oops"), [])
+
+    def test_post_id_is_safe(self):
+        (entry,) = parse_feed("https://blog.example/atom", ATOM)
+        self.assertRegex(entry.post_id, r"^feed_blog\.example_[0-9a-f]{12}$")
+
+
+class TestFetchFeed(unittest.TestCase):
+    @patch("manage_agenda.utils_feed.urllib.request.urlopen")
+    def test_conditional_headers(self, mock_urlopen):
+        response = MagicMock()
+        response.read.return_value = RSS
+        response.headers = {"ETag": '"v2"', "Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"}
+        mock_urlopen.return_value.__enter__.return_value = response
+
+        body, etag, last_modified = fetch_feed(
+            "https://venue.example/rss", etag='"v1"', last_modified="Fri, 16 Oct 2026"
+        )
+
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.get_header("If-none-match"), '"v1"')
+        self.assertEqual(request.get_header("If-modified-since"), "Fri, 16 Oct 2026")
+        self.assertEqual((body, etag), (RSS, '"v2"'))
+        self.assertEqual(last_modified, "Sat, 17 Oct 2026 10:00:00 GMT")
+
+    @patch("manage_agenda.utils_feed.urllib.request.urlopen")
+    def test_not_modified(self, mock_urlopen):
+        mock_urlopen.side_effect = urllib.error.HTTPError(
+            "https://venue.example/rss", 304, "Not Modified", {}, io.BytesIO()
+        )
+        self.assertEqual(fetch_feed("https://venue.example/rss", etag='"v1"'), (None, '"v1"', None))
+
+
+class TestFeedPolling(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.temp_dir, "state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_read_feed_list(self):
+        path = os.path.join(self.temp_dir, "feeds.txt")
+        with open(path, "w") as f:
+            f.write("# Venues\nhttps://venue.example/rss\n\nhttps://blog.example/atom\n")
+        self.assertEqual(
+            read_feed_list(path), ["https://venue.example/rss", "https://blog.example/atom"]
+        )
+        self.assertEqual(read_feed_list(os.path.join(self.temp_dir, "missing")), [])
+
+    @patch("manage_agenda.utils_feed.fetch_feed")
+    def test_only_new_entries_are_returned(self, mock_fetch):
+        url = "https://venue.example/rss"
+        mock_fetch.return_value = (RSS, '"v1"', None)
+
+        state = FeedState(self.state_file)
+        entries, validators = poll_feeds([url], state)
+        self.assertEqual(len(entries), 2)
+        # Cursors only advance once the entries are handled
+        self.assertEqual(len(poll_feeds([url], state)[0]), 2)
+        commit_feeds(state, validators, entries)
+
+        state = FeedState(self.state_file)
+        self.assertEqual(state.get(url)["etag"], '"v1"')
+        self.assertEqual(state.get(url)["last_guid"], "venue-1")
+        self.assertEqual(poll_feeds([url], state)[0], [])
+        mock_fetch.assert_called_with(url, '"v1"', None)
+
+    @patch("manage_agenda.utils_feed.fetch_feed")
+    def test_unchanged_and_failing_feeds(self, mock_fetch):
+        def fetch(url, etag=None, last_modified=None):
+            if "down" in url:
+                raise OSError("Connection refused")
+            return None, etag, last_modified
+
+        mock_fetch.side_effect = fetch
+        state = FeedState(self.state_file)
+        entries, validators = poll_feeds(
+            ["https://venue.example/rss", "https://down.example/rss"], state
+        )
+        self.assertEqual(entries, [])
+        self.assertEqual(list(validators), ["https://venue.example/rss"])
+
+    def test_corrupt_state_starts_empty(self):
+        with open(self.state_file, "w") as f:
+            f.write("{broken")
+        self.assertEqual(FeedState(self.state_file).feeds, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_journal import DONE, EXTRACTED, PUBLISHED, RunJournal
+
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "run_journal.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_resume(self):
+        journal = RunJournal(self.path)
+        journal.record("msg1", EXTRACTED, [{"summary": "Concert"}])
+        journal.record("msg1", PUBLISHED)
+        journal.record("msg2", EXTRACTED, [{"summary": "Talk"}])
+
+        resumed = RunJournal(self.path, resume=True)
+        self.assertEqual(resumed.stage("msg1"), PUBLISHED)
+        # The events are kept with the later stages
+        self.assertEqual(resumed.events("msg1"), [{"summary": "Concert"}])
+        self.assertTrue(resumed.reached("msg1", EXTRACTED))
+        self.assertFalse(resumed.reached("msg2", PUBLISHED))
+        self.assertIsNone(resumed.stage("msg3"))
+        self.assertFalse(resumed.reached("msg3", EXTRACTED))
+
+    def test_append_only(self):
+        journal = RunJournal(self.path)
+        journal.record("msg1", EXTRACTED, [])
+        journal.record("msg1", DONE)
+        with open(self.path) as f:
+            stages = [json.loads(line)["stage"] for line in f]
+        self.assertEqual(stages, [EXTRACTED, DONE])
+
+    def test_cut_line_ignored(self):
+        journal = RunJournal(self.path)
+        journal.record("msg1", DONE)
+        with open(self.path, "a") as f:
+            f.write('{"item": "msg2", "sta')
+
+        resumed = RunJournal(self.path, resume=True)
+        self.assertEqual(resumed.stage("msg1"), DONE)
+        self.assertIsNone(resumed.stage("msg2"))
+
+    def test_new_run_replaces_journal(self):
+        RunJournal(self.path).record("msg1", DONE)
+
+        journal = RunJournal(self.path)
+        # Nothing from the previous run, and the file is kept until an item is recorded
+        self.assertIsNone(journal.stage("msg1"))
+        self.assertTrue(os.path.exists(self.path))
+        journal.record("msg2", DONE)
+
+        resumed = RunJournal(self.path, resume=True)
+        self.assertEqual(list(resumed.items), ["msg2"])
+
+    def test_clear(self):
+        journal = RunJournal(self.path)
+        journal.record("msg1", DONE)
+        journal.clear()
+        self.assertFalse(os.path.exists(self.path))
+        journal.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,524 @@
+import base64
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(".")
+
+from manage_agenda.utils_mail import (
+    CleanupQueue,
+    MailSyncState,
+    fetch_email_bodies,
+    folder_message_ids,
+    gmail_added_since,
+    gmail_batch_get,
+    gmail_message_text,
+    gmail_recent_ids,
+    imap_date,
+    imap_message_text,
+    imap_uid_fetch,
+    mailbox_delta,
+    normalize_email_body,
+    recent_positions,
+    remove_messages,
+    uid_set,
+)
+
+
+def b64(text):
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def gmail_message(message_id, text):
+    return {
+        "id": message_id,
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "parts": [
+                {"mimeType": "text/html", "body": {"data": b64(f"<p>{text}</p>")}},
+                {"mimeType": "text/plain", "body": {"data": b64(text)}},
+            ],
+        },
+    }
+
+
+def raw_email(text, subtype="plain"):
+    return (
+        "From: venue@example.com\r\n"
+        "Subject: Concert\r\n"
+        f"Content-Type: text/{subtype}; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: 8bit\r\n"
+        "\r\n"
+        f"{text}\r\n"
+    ).encode()
+
+
+class FakeGmail:
+    """Gmail service recording the batches sent."""
+
+    def __init__(self, failing=()):
+        self.batches = []
+        self.failing = failing
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, format):
+        return (id, format)
+
+    def new_batch_http_request(self, callback):
+        client = self
+        requests = []
+
+        class Batch:
+            def add(self, request, request_id):
+                requests.append(request_id)
+
+            def execute(self):
+                client.batches.append(list(requests))
+                for request_id in requests:
+                    if request_id in client.failing:
+                        callback(request_id, None, OSError("404"))
+                    else:
+                        callback(request_id, gmail_message(request_id, f"Body {request_id}"), None)
+
+        return Batch()
+
+
+def imap_api(uids, uidvalidity=b"1"):
+    """IMAP source whose folder holds messages with the given UIDs."""
+    client = MagicMock()
+    client.response.return_value = ("UIDVALIDITY", [uidvalidity])
+
+    def uid(command, *args):
+        if command == "SEARCH":
+            return "OK", [" ".join(str(u) for u in uids).encode()]
+        data = []
+        for n, u in enumerate(uids, 1):
+            data += [(f"{n} (UID {u} BODY[] {{1}}".encode(), raw_email(f"Message {u}")), b")"]
+        return "OK", data
+
+    client.uid.side_effect = uid
+    api_src = MagicMock()
+    api_src.service = "imap"
+    api_src.getClient.return_value = client
+    api_src.getChannel.return_value = "INBOX/zAgenda"
+    return api_src
+
+
+class TestMessageText(unittest.TestCase):
+    def test_gmail_prefers_plain_text(self):
+        self.assertEqual(gmail_message_text(gmail_message("1", "Sábado 20:00")), "Sábado 20:00")
+
+    def test_gmail_html_only(self):
+        message = {"payload": {"mimeType": "text/html", "body": {"data": b64("<p>Hola</p>")}}}
+        self.assertEqual(gmail_message_text(message), "Hola")
+
+    def test_imap(self):
+        self.assertEqual(imap_message_text(raw_email("Viernes")).strip(), "Viernes")
+        self.assertEqual(imap_message_text(raw_email("<b>Jazz</b>", "html")), "Jazz")
+
+
+class TestGmailBatch(unittest.TestCase):
+    def test_batches_are_capped(self):
+        client = FakeGmail(failing={"m3"})
+        ids = [f"m{n}" for n in range(5)]
+
+        messages = gmail_batch_get(client, ids + ["m0"], batch_size=2)
+
+        self.assertEqual(client.batches, [["m0", "m1"], ["m2", "m3"], ["m4"]])
+        self.assertEqual(sorted(messages), ["m0", "m1", "m2", "m4"])
+
+    def test_fetch_email_bodies(self):
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getClient.return_value = FakeGmail(failing={"b"})
+        posts = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+
+        bodies = fetch_email_bodies(api_src, posts, batch_size=50)
+
+        self.assertEqual(bodies, {0: "Body a", 2: "Body c"})
+        self.assertEqual(len(api_src.getClient.return_value.batches), 1)
+        api_src.getPostBody.assert_not_called()
+
+
+class TestImapFetch(unittest.TestCase):
+    def test_uid_set(self):
+        self.assertEqual(uid_set([9, 3, 4, 5, 11, 12]), "3:5,9,11:12")
+        self.assertEqual(uid_set([b"7"]), "7")
+
+    def test_single_uid_fetch(self):
+        client = MagicMock()
+        client.uid.return_value = (
+            "OK",
+            [
+                (b"1 (UID 3 BODY[] {10}", b"message 3"),
+                b")",
+                (b"2 (BODY[] {10}", b"message 4"),
+                b" UID 4)",
+            ],
+        )
+
+        self.assertEqual(imap_uid_fetch(client, [3, 4]), {3: b"message 3", 4: b"message 4"})
+        client.uid.assert_called_once_with("FETCH", "3:4", "(UID BODY.PEEK[])")
+
+    def test_fetch_email_bodies(self):
+        api_src = imap_api([7, 8])
+
+        bodies = fetch_email_bodies(api_src, ["post1", "post2"])
+
+        client = api_src.getClient.return_value
+        client.select.assert_called_once_with("INBOX/zAgenda")
+        self.assertEqual([bodies[0].strip(), bodies[1].strip()], ["Message 7", "Message 8"])
+        self.assertEqual(client.uid.call_count, 2)
+
+    def test_fetch_some_positions(self):
+        api_src = imap_api([7, 8, 9])
+        bodies = fetch_email_bodies(api_src, ["post1", "post2", "post3"], positions=[2])
+        self.assertEqual(list(bodies), [2])
+        self.assertEqual(bodies[2].strip(), "Message 9")
+        api_src.getClient.return_value.uid.assert_called_with("FETCH", "9", "(UID BODY.PEEK[])")
+
+    def test_mismatch_falls_back(self):
+        api_src = imap_api([7, 8, 9])
+        self.assertEqual(fetch_email_bodies(api_src, ["post1", "post2"]), {})
+
+    def test_errors_fall_back(self):
+        api_src = MagicMock()
+        api_src.service = "imap"
+        api_src.getClient.return_value.select.side_effect = OSError("Connection reset")
+        self.assertEqual(fetch_email_bodies(api_src, ["post1"]), {})
+
+
+class TestMailboxDelta(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "mail_sync.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_state_round_trip(self):
+        state = MailSyncState(self.path)
+        state.update("imap_account", {"uidvalidity": 1, "uidnext": 10})
+        state.save()
+        self.assertEqual(MailSyncState(self.path).get("imap_account")["uidnext"], 10)
+        self.assertEqual(MailSyncState(self.path).get("other"), {})
+
+    def test_corrupt_state_starts_empty(self):
+        with open(self.path, "w") as f:
+            f.write("{broken")
+        self.assertEqual(MailSyncState(self.path).accounts, {})
+
+    def test_imap_first_run_is_full(self):
+        positions, cursor = mailbox_delta(imap_api([3, 5]), ["a", "b"], {})
+        self.assertIsNone(positions)
+        self.assertEqual(cursor, {"uidvalidity": 1, "uidnext": 6})
+
+    def test_imap_new_messages(self):
+        positions, cursor = mailbox_delta(
+            imap_api([3, 5, 8, 9]), ["a", "b", "c", "d"], {"uidvalidity": 1, "uidnext": 6}
+        )
+        self.assertEqual(positions, [2, 3])
+        self.assertEqual(cursor["uidnext"], 10)
+
+    def test_imap_cursor_never_goes_back(self):
+        positions, cursor = mailbox_delta(imap_api([3]), ["a"], {"uidvalidity": 1, "uidnext": 9})
+        self.assertEqual(positions, [])
+        self.assertEqual(cursor["uidnext"], 9)
+
+    def test_imap_uidvalidity_change_is_full(self):
+        positions, cursor = mailbox_delta(
+            imap_api([1, 2], uidvalidity=b"2"), ["a", "b"], {"uidvalidity": 1, "uidnext": 6}
+        )
+        self.assertIsNone(positions)
+        self.assertEqual(cursor, {"uidvalidity": 2, "uidnext": 3})
+
+    def gmail_api(self, history_pages):
+        client = MagicMock()
+        client.users().getProfile().execute.return_value = {"historyId": "500"}
+        client.users().history().list().execute.side_effect = history_pages
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getClient.return_value = client
+        api_src.getLabels.return_value = [{"id": "Label_7"}]
+        return api_src
+
+    def test_gmail_first_run_is_full(self):
+        api_src = self.gmail_api([])
+        self.assertEqual(mailbox_delta(api_src, [{"id": "a"}], {}), (None, {"history_id": "500"}))
+
+    def test_gmail_added_since(self):
+        pages = [
+            {
+                "historyId": "510",
+                "history": [
+                    {"messagesAdded": [{"message": {"id": "m1", "labelIds": ["Label_7"]}}]},
+                    {"messagesAdded": [{"message": {"id": "m2", "labelIds": ["INBOX"]}}]},
+                ],
+                "nextPageToken": "p2",
+            },
+            {
+                "historyId": "510",
+                "history": [{"labelsAdded": [{"message": {"id": "m3"}, "labelIds": ["Label_7"]}]}],
+            },
+        ]
+        api_src = self.gmail_api(pages)
+        posts = [{"id": "m0"}, {"id": "m1"}, {"id": "m3"}]
+
+        positions, cursor = mailbox_delta(api_src, posts, {"history_id": "400"})
+
+        self.assertEqual(positions, [1, 2])
+        self.assertEqual(cursor, {"history_id": "510"})
+        history = api_src.getClient.return_value.users().history()
+        self.assertEqual(history.list.call_args.kwargs["startHistoryId"], "400")
+        self.assertEqual(history.list.call_args.kwargs["pageToken"], "p2")
+
+    def test_gmail_unlisted_messages_keep_cursor(self):
+        added = {"message": {"id": "late", "labelIds": ["Label_7"]}}
+        pages = [{"historyId": "510", "history": [{"messagesAdded": [added]}]}]
+        api_src = self.gmail_api(pages)
+        positions, cursor = mailbox_delta(api_src, [{"id": "m0"}], {"history_id": "400"})
+        self.assertEqual((positions, cursor), ([], {"history_id": "400"}))
+
+    def test_expired_history_is_full(self):
+        import googleapiclient.errors
+
+        expired = googleapiclient.errors.HttpError(MagicMock(status=404), b"Not Found")
+        api_src = self.gmail_api(expired)
+        # Full resync, and the cursor starts again from the current history
+        self.assertEqual(
+            mailbox_delta(api_src, [{"id": "a"}], {"history_id": "1"}),
+            (None, {"history_id": "500"}),
+        )
+
+    def test_sync_error_is_full(self):
+        api_src = self.gmail_api(OSError("Connection reset"))
+        self.assertEqual(mailbox_delta(api_src, [{"id": "a"}], {"history_id": "1"}), (None, None))
+
+    def test_gmail_added_since_filters_label(self):
+        client = MagicMock()
+        client.users().history().list().execute.return_value = {
+            "historyId": "9",
+            "history": [{"labelsAdded": [{"message": {"id": "x"}, "labelIds": ["OTHER"]}]}],
+        }
+        self.assertEqual(gmail_added_since(client, "1", "Label_7"), (set(), "9"))
+
+
+class TestRecentPositions(unittest.TestCase):
+    def test_imap_date(self):
+        self.assertEqual(imap_date(datetime.date(2025, 10, 7)), "7-Oct-2025")
+
+    @patch("manage_agenda.utils_mail.datetime")
+    def test_imap_search_since(self, mock_datetime):
+        mock_datetime.date.today.return_value = datetime.date(2026, 10, 19)
+        mock_datetime.timedelta = datetime.timedelta
+        api_src = imap_api([3, 5, 8])
+        uid = api_src.getClient().uid.side_effect
+
+        def search(command, *args):
+            if args[1:] and args[1] == "SINCE":
+                return "OK", [b"5 8"]
+            return uid(command, *args)
+
+        api_src.getClient().uid.side_effect = search
+
+        self.assertEqual(recent_positions(api_src, ["a", "b", "c"], days=7), [1, 2])
+        api_src.getClient().uid.assert_any_call("SEARCH", None, "SINCE", "11-Oct-2026")
+
+    def test_gmail_query_pages(self):
+        client = MagicMock()
+        client.users().messages().list().execute.side_effect = [
+            {"messages": [{"id": "m1"}], "nextPageToken": "p2"},
+            {"messages": [{"id": "m3"}]},
+        ]
+        self.assertEqual(gmail_recent_ids(client, "Label_0", 8), {"m1", "m3"})
+        self.assertEqual(client.users().messages().list.call_args[1]["q"], "newer_than:8d")
+
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getLabels.return_value = [{"id": "Label_0"}]
+        api_src.getClient.return_value = client
+        client.users().messages().list().execute.side_effect = [{"messages": [{"id": "m2"}]}]
+        posts = [{"id": "m1"}, {"id": "m2"}]
+        self.assertEqual(recent_positions(api_src, posts, days=7), [1])
+
+    def test_no_limit_or_errors(self):
+        self.assertIsNone(recent_positions(imap_api([3]), ["a"], days=0))
+        api_src = imap_api([3])
+        api_src.getClient().select.side_effect = OSError("Connection reset")
+        self.assertIsNone(recent_positions(api_src, ["a"], days=7))
+
+
+class TestCleanupQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "cleanup_queue.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_queue_persists(self):
+        queue = CleanupQueue(self.path)
+        queue.add("imap1", "INBOX/zAgenda", 7, 1)
+        queue.add("imap1", "INBOX/zAgenda", 8, 1)
+        queue.add("imap1", "INBOX/zAgenda", 8, 1)
+        self.assertEqual(CleanupQueue(self.path).pending("imap1")["ids"], [7, 8])
+
+        queue.done("imap1")
+        self.assertEqual(CleanupQueue(self.path).pending("imap1"), {})
+
+    def test_stale_entries_are_dropped(self):
+        queue = CleanupQueue(self.path)
+        queue.add("imap1", "INBOX/zAgenda", 7, 1)
+        queue.add("imap1", "INBOX/zAgenda", 2, 2)
+        self.assertEqual(queue.pending("imap1")["ids"], [2])
+
+    def test_folder_message_ids(self):
+        self.assertEqual(folder_message_ids(imap_api([3, 5]), ["a", "b"]), ([3, 5], 1))
+        # Cannot be matched to the posts
+        self.assertEqual(folder_message_ids(imap_api([3]), ["a", "b"]), (None, None))
+
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getPostId.side_effect = lambda post: post["id"]
+        self.assertEqual(
+            folder_message_ids(api_src, [{"id": "m1"}, {"id": "m2"}]), (["m1", "m2"], None)
+        )
+
+
+class TestRemoveMessages(unittest.TestCase):
+    def test_imap_uidplus(self):
+        api_src = imap_api([7, 8, 9])
+        client = api_src.getClient()
+        client.capabilities = ("IMAP4REV1", "UIDPLUS")
+
+        self.assertEqual(remove_messages(api_src, "INBOX/zAgenda", [7, 8, 9], 1), 3)
+
+        client.uid.assert_any_call("STORE", "7:9", "+FLAGS.SILENT", "(\\Deleted)")
+        client.uid.assert_any_call("EXPUNGE", "7:9")
+        client.expunge.assert_not_called()
+
+    def test_imap_move_without_uidplus(self):
+        api_src = imap_api([7, 9])
+        client = api_src.getClient()
+        client.capabilities = ("IMAP4REV1", "MOVE")
+
+        with patch("manage_agenda.utils_mail.config.IMAP_TRASH_FOLDER", "Papelera"):
+            self.assertEqual(remove_messages(api_src, "INBOX/zAgenda", [7, 9], 1), 2)
+
+        client.uid.assert_any_call("MOVE", "7,9", "Papelera")
+        commands = [c[0][0] for c in client.uid.call_args_list]
+        self.assertNotIn("STORE", commands)
+        client.expunge.assert_not_called()
+
+    def test_imap_without_uidplus_nor_move(self):
+        api_src = imap_api([7, 9])
+        client = api_src.getClient()
+        client.capabilities = ("IMAP4REV1",)
+
+        remove_messages(api_src, "INBOX/zAgenda", [7, 9], 1)
+
+        client.uid.assert_any_call("STORE", "7,9", "+FLAGS.SILENT", "(\\Deleted)")
+        # Expunging would also remove other messages flagged as deleted
+        client.expunge.assert_not_called()
+        commands = [c[0][0] for c in client.uid.call_args_list]
+        self.assertNotIn("EXPUNGE", commands)
+
+    def test_imap_recreated_folder(self):
+        api_src = imap_api([7, 8], uidvalidity=b"2")
+        self.assertEqual(remove_messages(api_src, "INBOX/zAgenda", [7, 8], 1), 0)
+        commands = [c[0][0] for c in api_src.getClient().uid.call_args_list]
+        self.assertNotIn("STORE", commands)
+
+    def test_gmail_batches(self):
+        api_src = MagicMock()
+        api_src.service = "gmail"
+        api_src.getLabels.return_value = [{"id": "Label_0"}]
+        batch_modify = api_src.getClient().users().messages().batchModify
+        ids = [f"m{i}" for i in range(2500)]
+
+        self.assertEqual(remove_messages(api_src, "zAgenda", ids), 2500)
+
+        self.assertEqual(batch_modify.call_count, 3)
+        first = batch_modify.call_args_list[0][1]["body"]
+        self.assertEqual(first["ids"], ids[:1000])
+        self.assertEqual(first["removeLabelIds"], ["Label_0"])
+        self.assertEqual(batch_modify.call_args_list[2][1]["body"]["ids"], ids[2000:])
+
+
+ANNOUNCEMENT = (
+    "Concierto de jazz el viernes 24 de octubre a las 21:00 en el Auditorio.\n"
+    "Entradas a la venta en taquilla desde el lunes. " + "Programa: standards. " * 10
+)
+NORMALIZED = "\n".join(" ".join(line.split()) for line in ANNOUNCEMENT.splitlines())
+
+
+class TestNormalizeEmailBody(unittest.TestCase):
+    def test_html_newsletter(self):
+        html = (
+            "<html><head><style>p {color: red}</style></head><body>"
+            '<div style="display:none">Preheader text</div>'
+            f"<p>{ANNOUNCEMENT}</p>"
+            '<img src="https://track.example/open.gif" width="1" height="1">'
+            '<p>Si no quieres recibir más correos, <a href="https://x.example/u">darte de baja</a>.</p>'
+            "</body></html>"
+        )
+        text = normalize_email_body(html)
+        self.assertEqual(text, NORMALIZED)
+
+    def test_quoted_reply_and_signature(self):
+        body = (
+            f"{ANNOUNCEMENT}\n\n"
+            "-- \nJuan\nTel. 600 000 000\n\n"
+            "On Mon, 20 Oct 2026 at 10:00, Ana <ana@example.com> wrote:\n"
+            "> Old message\n> with more text\n"
+        )
+        self.assertEqual(normalize_email_body(body), NORMALIZED)
+
+    def test_short_reply_keeps_the_quoted_message(self):
+        body = (
+            "Mira esto\n\n"
+            "El lun, 20 oct 2026 a las 10:00, Ana <ana@example.com>\nescribió:\n"
+            "> Concierto el viernes a las 21:00\n"
+        )
+        text = normalize_email_body(body)
+        self.assertIn("Concierto el viernes a las 21:00", text)
+        self.assertNotIn("> Concierto", text)
+
+    def test_forwarded_message_is_kept(self):
+        body = (
+            "---------- Forwarded message ---------\n"
+            "From: Teatro <info@teatro.example>\n\n"
+            "Estreno el sábado a las 20:00\n"
+        )
+        self.assertIn("Estreno el sábado a las 20:00", normalize_email_body(body))
+
+    def test_footers_base64_and_whitespace(self):
+        body = (
+            "Taller   de\u00a0cerámica\u200b el martes data:image/png;base64,iVBORw0KGgo=\n\n\n\n"
+            + "QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVphYmNkZWZnaGlqa2xtbm9wcXJzdHV2d3h5ejAxMjM0\n" * 3
+            + "\n"
+            "AVISO LEGAL: Este mensaje y sus archivos adjuntos son confidenciales.\n"
+        )
+        self.assertEqual(normalize_email_body(body), "Taller de cerámica el martes")
+
+    def test_long_blocks_are_not_dropped(self):
+        body = "Unsubscribe\n" + ANNOUNCEMENT * 3
+        text = normalize_email_body(body)
+        self.assertNotIn("Unsubscribe", text)
+        self.assertIn("Concierto de jazz", text)
+
+    def test_bytes(self):
+        self.assertEqual(normalize_email_body(b"Cine  al aire libre"), "Cine al aire libre")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_notes import NotesLinkIndex
+
+
+class FakeNote:
+    def __init__(self, text):
+        self.text = text
+
+    def get_urls(self):
+        return []
+
+    def get_links(self):
+        return [word for word in self.text.split() if word.startswith("http")]
+
+
+class FakeNoteManager:
+    """Minimal NoteManager storing each note as <title>.md."""
+
+    def __init__(self, storage_dir):
+        self.storage_dir = storage_dir
+        self.reads = []
+
+    def list_notes(self):
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.storage_dir))
+
+    def read_note(self, title):
+        self.reads.append(title)
+        with open(os.path.join(self.storage_dir, f"{title}.md")) as f:
+            return FakeNote(f.read())
+
+
+class TestNotesLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.notes_dir = os.path.join(self.temp_dir, "notes")
+        os.makedirs(self.notes_dir)
+        self.index_file = os.path.join(self.temp_dir, "index.json")
+        self.manager = FakeNoteManager(self.notes_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_note(self, title, text, mtime=None):
+        path = os.path.join(self.notes_dir, f"{title}.md")
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    def refresh(self):
+        self.manager.reads = []
+        return NotesLinkIndex(self.notes_dir, self.index_file).refresh(self.manager)
+
+    def test_builds_url_to_notes(self):
+        self.write_note("a", "See http://example.com/1 and http://example.com/2")
+        self.write_note("b", "Also http://example.com/1")
+
+        url_to_notes = self.refresh()
+
+        self.assertEqual(
+            url_to_notes,
+            {"http://example.com/1": ["a", "b"], "http://example.com/2": ["a"]},
+        )
+        self.assertEqual(self.manager.reads, ["a", "b"])
+
+    def test_unchanged_notes_are_not_read_again(self):
+        self.write_note("a", "http://example.com/1", mtime=1000)
+        self.write_note("b", "http://example.com/2", mtime=1000)
+        self.refresh()
+
+        self.write_note("b", "http://example.com/3", mtime=2000)
+        url_to_notes = self.refresh()
+
+        self.assertEqual(self.manager.reads, ["b"])
+        self.assertEqual(
+            url_to_notes, {"http://example.com/1": ["a"], "http://example.com/3": ["b"]}
+        )
+
+        self.refresh()
+        self.assertEqual(self.manager.reads, [])
+
+    def test_deleted_notes_are_dropped(self):
+        self.write_note("a", "http://example.com/1")
+        self.write_note("b", "http://example.com/2")
+        self.refresh()
+
+        os.remove(os.path.join(self.notes_dir, "b.md"))
+
+        self.assertEqual(self.refresh(), {"http://example.com/1": ["a"]})
+        self.assertEqual(self.manager.reads, [])
+
+    def test_corrupt_index_is_rebuilt(self):
+        self.write_note("a", "http://example.com/1")
+        with open(self.index_file, "w") as f:
+            f.write("{not json")
+
+        self.assertEqual(self.refresh(), {"http://example.com/1": ["a"]})
+        self.assertEqual(self.manager.reads, ["a"])
+
+    def test_index_for_other_directory_is_ignored(self):
+        self.write_note("a", "http://example.com/1")
+        self.refresh()
+
+        other = NotesLinkIndex(os.path.join(self.temp_dir, "other"), self.index_file)
+        self.assertEqual(other.notes, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
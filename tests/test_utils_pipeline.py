@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_pipeline import SKIP, Pipeline, Stage, StageTimer
+
+
+def slow_double(n):
+    # The first items are the slowest
+    time.sleep(0.01 * (5 - n % 5))
+    return n * 2
+
+
+class TestPipeline(unittest.TestCase):
+    def test_ordered_output(self):
+        pipeline = Pipeline(
+            [Stage("double", slow_double, workers=4), Stage("add", lambda n: n + 1)]
+        )
+        self.assertEqual(list(pipeline.run(range(10))), [n * 2 + 1 for n in range(10)])
+
+    def test_unordered_output(self):
+        pipeline = Pipeline([Stage("double", slow_double, workers=4)], ordered=False)
+        results = list(pipeline.run(range(10)))
+        self.assertEqual(sorted(results), [n * 2 for n in range(10)])
+        self.assertNotEqual(results, [n * 2 for n in range(10)])
+
+    def test_skipped_items(self):
+        pipeline = Pipeline(
+            [
+                Stage("odd", lambda n: n if n % 2 else SKIP),
+                Stage("square", lambda n: n * n),
+            ]
+        )
+        self.assertEqual(list(pipeline.run(range(6))), [1, 9, 25])
+
+    def test_stages_overlap(self):
+        active = set()
+        overlapped = threading.Event()
+
+        def stage(name):
+            def func(n):
+                active.add(name)
+                if len(active) > 1:
+                    overlapped.set()
+                time.sleep(0.02)
+                active.discard(name)
+                return n
+
+            return func
+
+        pipeline = Pipeline([Stage("content", stage("content")), Stage("extract", stage("extract"))])
+        self.assertEqual(list(pipeline.run(range(5))), list(range(5)))
+        self.assertTrue(overlapped.is_set())
+
+    def test_backpressure(self):
+        read = []
+
+        def items():
+            for n in range(30):
+                read.append(n)
+                yield n
+
+        pipeline = Pipeline([Stage("slow", lambda n: time.sleep(0.01) or n)], queue_size=2)
+        results = pipeline.run(items())
+        next(results)
+        # Only a few items were read ahead of the slow stage
+        self.assertLess(len(read), 10)
+        self.assertEqual(len(list(results)), 29)
+
+    def test_errors_are_raised(self):
+        def fail(n):
+            if n == 3:
+                raise ValueError("Invalid item")
+            return n
+
+        pipeline = Pipeline([Stage("check", fail, workers=2)])
+        with self.assertRaises(ValueError):
+            list(pipeline.run(range(10)))
+        self.assertTrue(pipeline.stop.is_set())
+
+    def test_timer(self):
+        timer = StageTimer()
+        pipeline = Pipeline([Stage("double", lambda n: n * 2)], timer=timer)
+        list(pipeline.run(range(3)))
+        timer.add("cleanup", 0.5)
+        self.assertEqual(timer.stages["double"][0], 3)
+        self.assertIn("cleanup: 1 items, 0.50s (max 0.50s)", timer.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_review import ACCEPTED, ReviewQueue, reference_datetime
+
+
+class TestReviewQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "review_queue.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def add(self, queue, source="msg1"):
+        return queue.add(
+            source,
+            "Concert",
+            "Subject: Concert",
+            datetime.datetime(2026, 3, 1, 10, 0),
+            [{"summary": "Concert"}],
+            1.5,
+        )
+
+    def test_persisted(self):
+        queue = ReviewQueue(self.path)
+        self.add(queue)
+        self.add(queue, "msg2")
+
+        reloaded = ReviewQueue(self.path)
+        self.assertEqual([c["source"] for c in reloaded.pending()], ["msg1", "msg2"])
+        self.assertEqual([c["id"] for c in reloaded.pending()], [1, 2])
+        self.assertEqual(
+            reference_datetime(reloaded.pending()[0]), datetime.datetime(2026, 3, 1, 10, 0)
+        )
+        # Ids are not reused after a restart
+        self.assertEqual(self.add(reloaded, "msg3")["id"], 3)
+
+    def test_accept_and_remove(self):
+        queue = ReviewQueue(self.path)
+        first = self.add(queue)
+        second = self.add(queue, "msg2")
+        queue.accept(first)
+        queue.remove(second)
+
+        reloaded = ReviewQueue(self.path)
+        self.assertEqual(reloaded.pending(), [])
+        self.assertEqual([c["source"] for c in reloaded.accepted()], ["msg1"])
+        self.assertEqual(reloaded.accepted()[0]["status"], ACCEPTED)
+
+    def test_extracted_again_replaces_pending(self):
+        queue = ReviewQueue(self.path)
+        first = self.add(queue)
+        queue.set_cleanup("msg1", {"txt": {"dir": "/msgs", "name": "msg1"}})
+        again = queue.add("msg1", "Concert", "Subject: Concert", None, [{"summary": "New"}])
+
+        self.assertEqual(again["id"], first["id"])
+        self.assertEqual(len(queue.candidates), 1)
+        self.assertEqual(queue.pending()[0]["events"], [{"summary": "New"}])
+        self.assertEqual(queue.pending()[0]["cleanup"]["txt"]["name"], "msg1")
+
+    def test_corrupt_file(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        with self.assertLogs(level="WARNING"):
+            queue = ReviewQueue(self.path)
+        self.assertEqual(queue.pending(), [])
+
+    def test_reference_missing(self):
+        self.assertIsNone(reference_datetime({"reference": None}))
+        self.assertIsNone(reference_datetime({"reference": "yesterday"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.append(".")
+
+from manage_agenda.utils_txt import TxtManifest, iter_txt_messages
+
+
+class TestIterTxtMessages(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.txt_dir = os.path.join(self.temp_dir, "msgs")
+        os.mkdir(self.txt_dir)
+        self.manifest_file = os.path.join(self.temp_dir, "txt_manifest.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, text, mtime):
+        path = os.path.join(self.txt_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def manifest(self):
+        return TxtManifest(self.txt_dir, self.manifest_file)
+
+    def test_yields_lazily_oldest_first(self):
+        self.write("b.txt", "Second", 2000)
+        self.write("a.txt", "Third", 3000)
+        self.write("c.txt", "First", 1000)
+        self.write("notes.md", "Not a message", 500)
+
+        messages = iter_txt_messages(self.txt_dir, self.manifest())
+        first = next(messages)
+        self.assertEqual(first, [Path(self.txt_dir, "c.txt"), "First"])
+        # The others are read when their turn comes
+        os.remove(os.path.join(self.txt_dir, "a.txt"))
+        self.assertEqual([content for _, content in messages], ["Second"])
+
+    def test_processed_files_are_not_opened(self):
+        self.write("a.txt", "Concert", 1000)
+        self.write("b.txt", "Talk", 2000)
+        manifest = self.manifest()
+        for path, _ in iter_txt_messages(self.txt_dir, manifest):
+            if path.name == "a.txt":
+                manifest.mark_processed(path.name)
+        manifest.save()
+
+        stats = {}
+        with patch("builtins.open", wraps=open) as mock_open:
+            messages = list(iter_txt_messages(self.txt_dir, self.manifest(), stats))
+        opened = [os.path.basename(c[0][0]) for c in mock_open.call_args_list]
+        self.assertNotIn("a.txt", opened)
+        self.assertEqual([content for _, content in messages], ["Talk"])
+        self.assertEqual(stats, {"read": 1, "skipped": 1})
+
+    def test_modified_and_copied_files(self):
+        self.write("a.txt", "Concert", 1000)
+        manifest = self.manifest()
+        for path, _ in iter_txt_messages(self.txt_dir, manifest):
+            manifest.mark_processed(path.name)
+
+        # Only touched, or copied under another name: same content
+        self.write("a.txt", "Concert", 1500)
+        self.write("copy.txt", "Concert", 1600)
+        self.assertEqual(list(iter_txt_messages(self.txt_dir, self.manifest())), [])
+
+        self.write("a.txt", "Concert, new date", 2000)
+        messages = list(iter_txt_messages(self.txt_dir, self.manifest()))
+        self.assertEqual([content for _, content in messages], ["Concert, new date"])
+
+    def test_manifest_of_another_directory(self):
+        manifest = self.manifest()
+        manifest.files["a.txt"] = {"status": "processed"}
+        manifest.save()
+        self.assertEqual(TxtManifest(self.temp_dir, self.manifest_file).files, {})
+
+    def test_missing_directory(self):
+        missing = os.path.join(self.temp_dir, "none")
+        self.assertEqual(list(iter_txt_messages(missing, self.manifest())), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
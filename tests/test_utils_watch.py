@@ -0,0 +1,274 @@
+import imaplib
+import os
+import select
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(".")
+
+from manage_agenda.utils_watch import imap_idle, watch_directory, watch_gmail, watch_imap
+
+
+class FakeImapHandler(socketserver.StreamRequestHandler):
+    """Minimal IMAP server: LOGIN, SELECT, NOOP, IDLE and LOGOUT."""
+
+    def send(self, *lines):
+        self.wfile.write(b"".join(line.encode() + b"\r\n" for line in lines))
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.send("* OK IMAP4rev1 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, command = line.decode().strip().split(" ", 1)
+            command = command.split(" ", 1)[0].upper()
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1 IDLE", f"{tag} OK CAPABILITY completed")
+            elif command == "SELECT":
+                self.send(
+                    f"* {server.messages} EXISTS",
+                    "* OK [UIDVALIDITY 1] UIDs valid",
+                    f"{tag} OK [READ-WRITE] SELECT completed",
+                )
+            elif command == "LOGOUT":
+                self.send("* BYE logging out", f"{tag} OK LOGOUT completed")
+                return
+            elif command == "IDLE":
+                if not self.idle(tag):
+                    return
+            else:
+                self.send(f"{tag} OK {command} completed")
+
+    def idle(self, tag):
+        server = self.server
+        server.idles += 1
+        self.send("+ idling")
+        while True:
+            if server.drop.is_set():
+                server.drop.clear()
+                self.request.shutdown(socket.SHUT_RDWR)
+                return False
+            if server.new_mail.wait(0.02):
+                server.new_mail.clear()
+                self.send(f"* {server.messages} EXISTS")
+            ready, _, _ = select.select([self.request], [], [], 0)
+            if ready:
+                if self.rfile.readline().strip().upper() == b"DONE":
+                    self.send(f"{tag} OK IDLE terminated")
+                    return True
+                return False
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeImapHandler)
+        self.messages = 1
+        self.connections = 0
+        self.idles = 0
+        self.new_mail = threading.Event()
+        self.drop = threading.Event()
+
+    def deliver(self):
+        self.messages += 1
+        self.new_mail.set()
+
+
+class ImapServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeImapServer()
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connect(self):
+        client = imaplib.IMAP4("127.0.0.1", self.port)
+        client.login("user", "password")
+        client.select("INBOX/zAgenda")
+        return client
+
+
+class TestImapIdle(ImapServerTestCase):
+    def test_new_mail(self):
+        client = self.connect()
+        threading.Timer(0.1, self.server.deliver).start()
+
+        self.assertTrue(imap_idle(client, timeout=5))
+        # The connection is still usable after DONE
+        self.assertEqual(client.noop()[0], "OK")
+        client.logout()
+
+    def test_timeout(self):
+        client = self.connect()
+        self.assertFalse(imap_idle(client, timeout=0.2))
+        self.assertEqual(client.noop()[0], "OK")
+        client.logout()
+
+    def test_connection_lost(self):
+        client = self.connect()
+        threading.Timer(0.1, self.server.drop.set).start()
+        with self.assertRaises(imaplib.IMAP4.abort):
+            imap_idle(client, timeout=5)
+
+
+class TestWatchImap(ImapServerTestCase):
+    def test_processes_new_mail_and_reconnects(self):
+        stop = threading.Event()
+        calls = []
+        called = threading.Semaphore(0)
+
+        def on_new_mail():
+            calls.append(self.server.messages)
+            called.release()
+
+        thread = threading.Thread(
+            target=watch_imap,
+            args=(self.connect, on_new_mail, stop),
+            kwargs={"idle_timeout": 5, "backoff": 0.01},
+            daemon=True,
+        )
+        thread.start()
+
+        # Catch-up on connection
+        self.assertTrue(called.acquire(timeout=5))
+        self.server.deliver()
+        self.assertTrue(called.acquire(timeout=5))
+        # Connection lost: reconnects and catches up again
+        self.server.drop.set()
+        self.assertTrue(called.acquire(timeout=5))
+        self.assertEqual(self.server.connections, 2)
+
+        stop.set()
+        self.server.deliver()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(calls[:3], [1, 2, 2])
+
+    def test_backoff_until_connected(self):
+        stop = threading.Event()
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionRefusedError("Connection refused")
+            return self.connect()
+
+        def on_new_mail():
+            stop.set()
+
+        watch_imap(connect, on_new_mail, stop, idle_timeout=0.1, backoff=0.01)
+
+        self.assertEqual(len(attempts), 3)
+
+
+class TestWatchDirectory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+        self.stop = threading.Event()
+        self.batches = []
+        self.called = threading.Semaphore(0)
+
+    def tearDown(self):
+        self.stop.set()
+        self.temp_dir.cleanup()
+
+    def on_files(self, paths):
+        self.batches.append([os.path.basename(path) for path in paths])
+        self.called.release()
+
+    def write(self, name, text, mtime=None):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def start(self, **kwargs):
+        thread = threading.Thread(
+            target=watch_directory,
+            args=(self.directory, self.on_files, self.stop),
+            kwargs=kwargs,
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def finish(self, thread):
+        self.stop.set()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+    def test_inotify(self):
+        self.write("old.txt", "Already there", mtime=1000)
+        thread = self.start(poll_interval=5)
+        # Catch-up with the files already there
+        self.assertTrue(self.called.acquire(timeout=5))
+
+        # Written under another name and moved into place
+        os.rename(self.write("new.tmp", "Concert"), os.path.join(self.directory, "new.txt"))
+        self.write("talk.txt", "Talk")
+        while self.called.acquire(timeout=2):
+            pass
+        self.finish(thread)
+
+        self.assertEqual(self.batches[0], ["old.txt"])
+        received = [name for batch in self.batches[1:] for name in batch]
+        self.assertEqual(sorted(set(received)), ["new.txt", "talk.txt"])
+
+    def test_polling_waits_for_complete_files(self):
+        thread = self.start(poll_interval=0.05, use_inotify=False)
+        # After the first snapshot (the catch-up)
+        time.sleep(0.1)
+        path = self.write("concert.txt", "Con")
+        # Still being written: size changes between polls
+        for part in "cert on Friday":
+            time.sleep(0.01)
+            with open(path, "a") as f:
+                f.write(part)
+        self.assertTrue(self.called.acquire(timeout=5))
+        time.sleep(0.2)
+        self.finish(thread)
+
+        # Reported once, when complete
+        self.assertEqual(self.batches, [["concert.txt"]])
+
+
+class TestWatchGmail(unittest.TestCase):
+    def test_processes_when_history_changes(self):
+        stop = threading.Event()
+        history = iter(["100", "100", OSError("Backend error"), "100", "105"])
+        calls = []
+
+        def check():
+            value = next(history, None)
+            if value is None:
+                stop.set()
+                return "105"
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        watch_gmail(check, lambda: calls.append(1), stop, interval=0.01, max_backoff=0.02)
+
+        # First check (catch-up) and the change to 105
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,26 @@ from unittest.mock import patch
 
 sys.path.append(".")
 
-from manage_agenda.utils_web import CACHE_DIR, extract_domain_and_path_from_url, reduce_html
+from manage_agenda.utils_cache import WebCache
+from manage_agenda.utils_web import (
+    CACHE_DIR,
+    DomainTemplate,
+    KeywordMatcher,
+    canonicalize_url,
+    dedup_urls,
+    extract_domain_and_path_from_url,
+    find_event_links,
+    get_memo,
+    html_content_hash,
+    is_protected_fragment,
+    page_item_id,
+    reduce_html,
+    reduce_pages_in_pool,
+    remember_events,
+    shrink_html,
+    strip_template_boilerplate,
+    triage_page,
+)
 
 
 class TestUtilsWeb(unittest.TestCase):
@@ -84,10 +103,18 @@ class TestReduceHtml(unittest.TestCase):
         self.assertIn("Hello World", result)
         self.assertNotIn("alert", result)
 
-        # Cache file should be created
-        safe_filename = "example.com"  # URL without /test becomes just domain
-        cache_path = os.path.join(self.temp_cache, safe_filename)
-        self.assertTrue(os.path.exists(cache_path))
+        # Cache entry should be created
+        cache = WebCache(self.temp_cache)
+        self.assertTrue(cache.contains("example.com"))  # URL without /test becomes just domain
+        self.assertEqual(cache.get("example.com"), html_content)
+
+    def test_cache_size_is_scanned_once(self):
+        """Test that the writes of several pages walk the cache only once."""
+        with patch.object(WebCache, "entries", autospec=True, return_value=[]) as mock_entries:
+            for i in range(5):
+                reduce_html(f"https://example.com/page{i}", f"<html><body><p>Page {i}</p></body></html>")
+
+        self.assertEqual(mock_entries.call_count, 1)
 
     def test_reduce_html_cached_version(self):
         """Test reduce_html when URL is already cached."""
@@ -162,22 +189,73 @@ class TestReduceHtml(unittest.TestCase):
 
         # Second call - cached
         mock_logging_info.reset_mock()
-        reduce_html(url, html)
+        reduce_html(url, "<html><body>Test again</body></html>")
         mock_logging_info.assert_called_with("URL found in cache. Comparing...")
 
+    @patch("manage_agenda.utils_web.BeautifulSoup")
+    def test_reduce_html_memoizes_identical_content(self, mock_soup):
+        """Test that byte-identical content is not parsed again."""
+        from bs4 import BeautifulSoup
+
+        mock_soup.side_effect = BeautifulSoup
+        url = "https://example.com/memo"
+        html = "<html><body><p>Concert on Friday</p></body></html>"
+
+        first = reduce_html(url, html)
+        calls = mock_soup.call_count
+        second = reduce_html("https://example.com/other", html)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_soup.call_count, calls)
+
+    def test_reduce_html_memo_before_shrinking(self):
+        """Test that memoized content is returned before any other work."""
+        html = "<html><body><p>Concert on Friday</p></body></html>"
+        first = reduce_html("https://example.com/memo", html)
+
+        with patch("manage_agenda.utils_web.shrink_html") as mock_shrink, patch(
+            "manage_agenda.utils_web.triage_page"
+        ) as mock_triage:
+            self.assertEqual(reduce_html("https://example.com/memo", html), first)
+        mock_shrink.assert_not_called()
+        mock_triage.assert_not_called()
+
+    def test_reduce_html_force_refresh_ignores_memo(self):
+        """Test that force_refresh reduces the content again."""
+        url = "https://example.com/memo"
+        html = "<html><body><p>Concert on Friday</p></body></html>"
+        reduce_html(url, html)
+
+        with patch("manage_agenda.utils_web.logging.info") as mock_logging_info:
+            reduce_html(url, html, force_refresh=True)
+        mock_logging_info.assert_any_call(
+            "Force refresh enabled. Returning full content after cleaning..."
+        )
+
+    def test_remember_events(self):
+        """Test that extracted events are stored with the reduced text."""
+        html = "<html><body><p>Concert on Friday</p></body></html>"
+        reduce_html("https://example.com/memo", html)
+        content_hash = html_content_hash(html)
+
+        remember_events(content_hash, "https://example.com/memo", {"summary": "Concert"})
+
+        memo = get_memo(content_hash)
+        self.assertEqual(memo["events"], [{"summary": "Concert"}])
+        self.assertIn("Concert on Friday", memo["reduced"])
+        self.assertIsNone(get_memo(html_content_hash("<html>other</html>")))
+
     def test_reduce_html_safe_filename_generation(self):
-        """Test that special characters in URL are converted to safe filename."""
+        """Test that special characters in URL are converted to a hashed, sharded path."""
         url = "https://example.com/path/to:file?param=1&other=2"
         html = "<html><body>Test</body></html>"
 
         reduce_html(url, html)
 
-        # Check that a file was created with safe characters
-        files = os.listdir(self.temp_cache)
-        self.assertEqual(len(files), 1)
-        # Should only contain safe characters
-        filename = files[0]
-        self.assertRegex(filename, r"^[a-zA-Z0-9._-]+$")
+        cache = WebCache(self.temp_cache)
+        self.assertTrue(cache.contains("example.com/path"))
+        relative = os.path.relpath(cache.path_for("example.com/path"), self.temp_cache)
+        self.assertRegex(relative, r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$")
 
     def test_reduce_html_extracts_scripts(self):
         """Test that reduce_html extracts relevant script content."""
@@ -240,5 +318,344 @@ class TestReduceHtml(unittest.TestCase):
         self.assertIsNotNone(reduce_html(url, legit_html))
 
 
+class TestCanonicalizeUrl(unittest.TestCase):
+    def test_variants_collapse(self):
+        """Test that copies of the same page get the same canonical URL."""
+        variants = [
+            "https://example.com/events/concert",
+            "http://example.com/events/concert",
+            "https://www.example.com/events/concert/",
+            "https://EXAMPLE.com/events/concert?utm_source=news&utm_medium=email",
+            "https://example.com/events/concert?fbclid=abc#tickets",
+            "https://m.example.com/events/concert",
+            "https://example.com/events/concert/amp/",
+            "https://example.com:443/events/concert",
+        ]
+        canonical = {canonicalize_url(url) for url in variants}
+        self.assertEqual(canonical, {"https://example.com/events/concert"})
+
+    def test_page_item_id(self):
+        """Test that pages of the same directory get different item ids."""
+        first = page_item_id("https://venue.com/agenda/concierto-a")
+        self.assertTrue(first.startswith("venue.com_agenda_"))
+        self.assertNotEqual(first, page_item_id("https://venue.com/agenda/concierto-b"))
+        # Copies of the same page share it
+        self.assertEqual(first, page_item_id("http://www.venue.com/agenda/concierto-a/"))
+
+    def test_meaningful_differences_are_kept(self):
+        self.assertNotEqual(
+            canonicalize_url("https://example.com/events?id=1"),
+            canonicalize_url("https://example.com/events?id=2"),
+        )
+        self.assertNotEqual(
+            canonicalize_url("https://example.com/a"), canonicalize_url("https://example.org/a")
+        )
+        self.assertEqual(
+            canonicalize_url("https://example.com/events?b=2&a=1"),
+            canonicalize_url("https://example.com/events?a=1&b=2"),
+        )
+
+    def test_dedup_urls(self):
+        urls = [
+            "http://example.com/a/",
+            "https://other.org/b",
+            "https://example.com/a?utm_source=x",
+        ]
+        unique_urls, origins = dedup_urls(urls)
+        self.assertEqual(unique_urls, ["https://example.com/a?utm_source=x", "https://other.org/b"])
+        self.assertEqual(
+            origins["https://example.com/a?utm_source=x"],
+            ["http://example.com/a/", "https://example.com/a?utm_source=x"],
+        )
+        self.assertEqual(origins["https://other.org/b"], ["https://other.org/b"])
+
+
+class TestFindEventLinks(unittest.TestCase):
+    LISTING = """
+    <html><body>
+      <script type="application/ld+json">
+      {"@graph": [
+        {"@type": "MusicEvent", "name": "Concert", "url": "https://tickets.example.org/concert"},
+        {"@type": "Organization", "url": "https://venue.example/"}
+      ]}
+      </script>
+      <a href="/agenda/concert-1">Concert 1</a>
+      <a href="/agenda/concert-1?utm_source=web">Concert 1 again</a>
+      <a href="https://www.venue.example/eventos/teatro">Theatre</a>
+      <a href="/about">About us</a>
+      <a href="/agenda/">Agenda</a>
+      <a href="/agenda/poster.jpg">Poster</a>
+      <a href="https://other.example/event/1">Other site</a>
+      <a href="mailto:info@venue.example">Mail</a>
+    </body></html>
+    """
+
+    def test_find_event_links(self):
+        links = find_event_links("https://venue.example/agenda", self.LISTING)
+        self.assertEqual(
+            links,
+            [
+                "https://tickets.example.org/concert",
+                "https://venue.example/agenda/concert-1",
+                "https://www.venue.example/eventos/teatro",
+            ],
+        )
+
+    def test_find_event_links_max_links(self):
+        links = find_event_links("https://venue.example/agenda", self.LISTING, max_links=1)
+        self.assertEqual(links, ["https://tickets.example.org/concert"])
+
+    def test_find_event_links_empty(self):
+        self.assertEqual(find_event_links("https://venue.example/agenda", None), [])
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher(
+            ["Fecha", "Fechas", "Dónde"], pattern=r"(?P<time>\d{1,2}:\d{2})|(?P<date>\d{1,2}/\d{1,2})"
+        )
+
+    def test_scan_finds_every_category(self):
+        self.assertEqual(
+            self.matcher.scan("FECHA: 12/05 a las 20:30"), {"keyword", "date", "time"}
+        )
+        self.assertEqual(self.matcher.scan("¿dónde?"), {"keyword"})
+        self.assertEqual(self.matcher.scan("Próximas fechas"), {"keyword"})
+        self.assertEqual(self.matcher.scan("Nothing here"), frozenset())
+
+    def test_search(self):
+        self.assertTrue(self.matcher.search("Abre a las 9:15"))
+        self.assertFalse(self.matcher.search("Sin datos"))
+
+    def test_results_are_cached(self):
+        self.matcher.search("Fecha")
+        self.matcher.search("Fecha")
+        self.assertEqual(self.matcher._cached_search.cache_info().hits, 1)
+        long_text = "x" * (KeywordMatcher.MAX_CACHED_LENGTH + 1)
+        self.assertFalse(self.matcher.search(long_text))
+        self.assertEqual(self.matcher._cached_search.cache_info().currsize, 1)
+
+    def test_is_protected_fragment(self):
+        self.assertTrue(is_protected_fragment("Lugar: Teatro Principal"))
+        self.assertTrue(is_protected_fragment("Sábado 3 de marzo"))
+        self.assertTrue(is_protected_fragment("Puertas 21:00"))
+        self.assertTrue(is_protected_fragment("01/02"))
+        self.assertFalse(is_protected_fragment("Aviso legal | Cookies"))
+
+
+class TestReducePagesInPool(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_results_match_sequential_reduction(self):
+        pages = [
+            (f"https://example.com/event{i}", f"<html><body><p>Concert {i} on Friday</p></body></html>")
+            for i in range(4)
+        ]
+        with patch("manage_agenda.utils_web.CACHE_DIR", self.temp_dir):
+            results = dict(reduce_pages_in_pool(pages, workers=2))
+
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        for i in range(4):
+            self.assertEqual(results[i], f"Concert {i} on Friday")
+        # Workers used the cache directory of the caller
+        cache = WebCache(self.temp_dir)
+        self.assertTrue(
+            cache.contains(extract_domain_and_path_from_url("https://example.com/event0"))
+        )
+
+    def test_failed_pages_give_none(self):
+        pages = [("https://example.com/empty", "   "), ("https://example.com/ok", "<p>Concert</p>")]
+        with patch("manage_agenda.utils_web.CACHE_DIR", self.temp_dir):
+            results = dict(reduce_pages_in_pool(pages, workers=2))
+        self.assertEqual(results, {0: None, 1: "Concert"})
+
+
+class TestShrinkHtml(unittest.TestCase):
+    JSON_LD = '<script type="application/ld+json">{"@type": "Event", "name": "Concert"}</script>'
+
+    def test_small_page_is_unchanged(self):
+        html = "<html><body><p>Concert</p><script>var x = 1;</script></body></html>"
+        self.assertIs(shrink_html(html), html)
+
+    def test_drops_styles_svg_and_large_scripts(self):
+        big_script = "<script>" + "x" * 20000 + "</script>"
+        html = (
+            "<html><head><style>body {color: red}</style>" + self.JSON_LD + big_script
+            + '<script src="app.js"></script></head><body><svg><path d="M0"/></svg>'
+            "<p>Concert</p><script>window.__DATA__ = {};</script></body></html>"
+        )
+        result = shrink_html(html, max_block_bytes=1000)
+        self.assertEqual(
+            result,
+            "<html><head>" + self.JSON_LD + "</head><body><p>Concert</p>"
+            "<script>window.__DATA__ = {};</script></body></html>",
+        )
+
+    def test_truncates_at_max_bytes_keeping_json_ld(self):
+        html = "<p>" + "a" * 1000 + "</p>" + self.JSON_LD
+        result = shrink_html(html, max_bytes=100)
+        self.assertTrue(result.startswith("<p>aaa"))
+        self.assertTrue(result.endswith(self.JSON_LD))
+        self.assertEqual(len(result), 100 + len(self.JSON_LD))
+
+    def test_truncates_at_max_nodes(self):
+        html = "".join(f"<p>{i}</p>" for i in range(100))
+        result = shrink_html(html, max_nodes=10)
+        self.assertEqual(result, "".join(f"<p>{i}</p>" for i in range(10)))
+
+    def test_reduce_html_keeps_json_ld_of_huge_page(self):
+        html = (
+            "<html><body><p>Concert on Friday</p>" + "<div>filler</div>" * 100
+            + "<script>" + "y" * 50000 + "</script>" + self.JSON_LD + "</body></html>"
+        )
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with patch("manage_agenda.utils_web.CACHE_DIR", temp_dir):
+                with patch("manage_agenda.utils_web.config.PAGE_MAX_NODES", 20):
+                    result = reduce_html("https://example.com/agenda", html)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertIn("Concert on Friday", result)
+        self.assertIn('"name": "Concert"', result)
+        self.assertNotIn("yyyy", result)
+
+
+class TestTriagePage(unittest.TestCase):
+    def test_ok_page(self):
+        triage = triage_page("<html><head><title>Agenda</title></head><body>Concert</body></html>")
+        self.assertTrue(triage.ok)
+        self.assertEqual(triage.title, "Agenda")
+        self.assertEqual(triage.text_length, len("Agenda Concert"))
+
+    def test_binary_document(self):
+        triage = triage_page(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n1 0 obj")
+        self.assertFalse(triage.ok)
+        self.assertEqual(triage.reason, "Not a text document")
+        self.assertFalse(triage_page(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR").ok)
+
+    def test_error_title(self):
+        self.assertFalse(triage_page("<title>\n  404 Not Found</title><p>x</p>").ok)
+
+    def test_challenge_page(self):
+        html = "<html><title>Just a moment...</title><body><div id='cf-browser-verification'></div></body></html>"
+        triage = triage_page(html.encode("utf-8"))
+        self.assertFalse(triage.ok)
+
+    def test_no_visible_text(self):
+        html = "<html><head><script>var a = 1;</script><style>p {}</style></head><body><svg><text>x</text></svg></body></html>"
+        triage = triage_page(html)
+        self.assertFalse(triage.ok)
+        self.assertEqual(triage.reason, "No visible text")
+
+    @patch("manage_agenda.utils_web.BeautifulSoup")
+    def test_reduce_html_does_not_parse_rejected_pages(self, mock_soup):
+        html = "<html><title>500 Internal Server Error</title><body>Hi</body></html>"
+        self.assertIsNone(reduce_html("https://example.com/x", html))
+        mock_soup.assert_not_called()
+
+
+class TestDomainTemplate(unittest.TestCase):
+    def setUp(self):
+        self.temp_cache = tempfile.mkdtemp()
+        self.original_cache = CACHE_DIR
+        import manage_agenda.utils_web
+
+        manage_agenda.utils_web.CACHE_DIR = self.temp_cache
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_cache)
+        import manage_agenda.utils_web
+
+        manage_agenda.utils_web.CACHE_DIR = self.original_cache
+
+    @staticmethod
+    def _page(body):
+        footer = (
+            "<footer>We use cookies to improve your experience on this site. "
+            "By browsing you accept our cookie policy and terms of use.</footer>"
+        )
+        nav = '<nav><a href="/">Home</a><a href="/agenda">Agenda</a></nav>'
+        return f"<html><body>{nav}<main>{body}</main>{footer}</body></html>"
+
+    def test_learn_counts_each_page_once(self):
+        template = DomainTemplate("example.com")
+        self.assertTrue(template.learn("https://example.com/a", ["Footer", "A"]))
+        self.assertFalse(template.learn("https://example.com/a", ["Footer", "A"]))
+        self.assertEqual(template.total_pages, 1)
+
+    @patch("manage_agenda.utils_web.TEMPLATE_MAX_FRAGMENTS", 6)
+    def test_new_fragments_enter_a_full_template(self):
+        template = DomainTemplate("example.com")
+        for page in ["a", "b", "c", "d"]:
+            template.learn(f"https://example.com/{page}", ["Footer", f"Event {page}"])
+        self.assertTrue(template.is_boilerplate("Footer"))
+
+        # A site redesign: its new footer is learned and becomes boilerplate
+        for page in ["e", "f", "g", "h", "i", "j"]:
+            template.learn(f"https://example.com/{page}", ["New footer", f"Event {page}"])
+            self.assertLessEqual(len(template.counts), 6)
+        self.assertTrue(template.is_boilerplate("New footer"))
+        self.assertFalse(template.is_boilerplate("Footer"))
+        self.assertFalse(template.is_boilerplate("Event j"))
+
+    @patch("manage_agenda.utils_web.TEMPLATE_MAX_PAGES", 4)
+    def test_pages_and_counts_age_together(self):
+        template = DomainTemplate("example.com")
+        for page in range(10):
+            template.learn(f"https://example.com/{page}", ["Footer"])
+            self.assertEqual(template.total_pages, len(template.pages))
+            self.assertLessEqual(len(template.pages), 4)
+        self.assertTrue(template.is_boilerplate("Footer"))
+
+    def test_is_boilerplate_needs_enough_pages(self):
+        template = DomainTemplate("example.com")
+        template.learn("https://example.com/a", ["Footer", "A"])
+        template.learn("https://example.com/b", ["Footer", "B"])
+        self.assertFalse(template.is_boilerplate("Footer"))
+        template.learn("https://example.com/c", ["Footer", "C"])
+        self.assertTrue(template.is_boilerplate("Footer"))
+        self.assertFalse(template.is_boilerplate("C"))
+
+    def test_strip_keeps_protected_fragments(self):
+        from bs4 import BeautifulSoup
+
+        template = DomainTemplate("example.com")
+        for page in ["a", "b", "c"]:
+            template.learn(
+                f"https://example.com/{page}",
+                ["Lugar: Teatro Principal", ("Cookies " * 20).strip()],
+            )
+        soup = BeautifulSoup(
+            "<div><p>Lugar: Teatro Principal</p><div>" + "Cookies " * 20 + "</div></div>",
+            "html.parser",
+        )
+        self.assertEqual(strip_template_boilerplate(soup, template), 1)
+        self.assertIn("Lugar: Teatro Principal", soup.get_text())
+        self.assertNotIn("Cookies", soup.get_text())
+
+    def test_reduce_html_strips_template_on_first_fetch(self):
+        for i in range(3):
+            reduce_html(f"https://venue.example/events/{i}/", self._page(f"<p>Concert {i}</p>"))
+
+        result = reduce_html(
+            "https://venue.example/other/new-show/", self._page("<p>Brand new show</p>")
+        )
+
+        self.assertIn("Brand new show", result)
+        self.assertNotIn("cookie policy", result)
+        self.assertNotIn("Agenda", result)
+
+    def test_template_is_persisted(self):
+        reduce_html("https://venue.example/events/1/", self._page("<p>One</p>"))
+        from manage_agenda.utils_cache import WebCache
+
+        template = DomainTemplate.load(WebCache(self.temp_cache), "venue.example")
+        self.assertEqual(template.total_pages, 1)
+
+
 if __name__ == "__main__":
     unittest.main()